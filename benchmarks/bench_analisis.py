@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Mide el rendimiento del análisis en español en tokens por segundo.
+
+Genera páginas sintéticas con palabras acentuadas, plurales y palabras
+vacías y compara el tokenizado simple (``\\w+`` en minúsculas) con
+:func:`wiki_modular.core.analysis.analizar` en frío (caché vacía) y en
+caliente.
+
+Uso::
+
+    python benchmarks/bench_analisis.py --pages 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from wiki_modular.core.analysis import analizar, analizar_termino  # noqa: E402
+
+VOCABULARIO = (
+    "configuración configuraciones instalación instalaciones servidor servidores "
+    "réplica réplicas índice índices copia copias seguridad usuario usuarios "
+    "contraseña contraseñas versión versiones migración tablas particiones "
+    "memoria rendimiento consultas bloqueos permisos certificados cifrado "
+    "de la el los las en y que para con por del una un se su al lo como más"
+).split()
+
+
+def medir(fn, textos: list[str]) -> tuple[float, int]:
+    """Ejecuta ``fn`` sobre ``textos`` y devuelve (segundos, tokens producidos)."""
+    inicio = time.perf_counter()
+    total = sum(len(fn(t)) for t in textos)
+    return time.perf_counter() - inicio, total
+
+
+def main() -> None:
+    """Compara el tokenizado simple con el análisis en español."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=500, help="Palabras por página")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    textos = [
+        " ".join(rng.choices(VOCABULARIO, k=args.words)) for _ in range(args.pages)
+    ]
+    entrada = args.pages * args.words
+    token_re = re.compile(r"\w+")
+
+    print(f"{'análisis':>18} {'segundos':>9} {'tokens/s':>12} {'salida':>9}")
+    analizar_termino.cache_clear()
+    for nombre, fn in (
+        ("\\w+ minúsculas", lambda t: token_re.findall(t.lower())),
+        ("español (frío)", analizar),
+        ("español (caliente)", analizar),
+    ):
+        segundos, total = medir(fn, textos)
+        print(f"{nombre:>18} {segundos:>9.2f} {entrada / segundos:>12,.0f} {total:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Mide la construcción y las consultas de :class:`Autocompletado`.
+
+Reutiliza la wiki sintética de ``bench_indice_paralelo.py`` (por defecto
+10 000 páginas), construye el array de prefijos y consulta prefijos de 1 a 8
+caracteres de títulos y encabezados mostrando el tiempo medio y el
+percentil 95 en microsegundos.
+
+Uso::
+
+    python benchmarks/bench_autocompletado.py --pages 10000 --queries 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_indice_paralelo import crear_wiki  # noqa: E402
+
+from scripts.generar_indice_busqueda import generar_indice  # noqa: E402
+from wiki_modular.core.autocompletado import (  # noqa: E402
+    Autocompletado,
+    construir_autocompletado,
+)
+
+
+def main() -> None:
+    """Construye el autocompletado y mide las consultas."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wiki = Path(tmp) / "wiki"
+        crear_wiki(wiki, args.pages, args.seed)
+        paginas = generar_indice(wiki)
+
+    inicio = time.perf_counter()
+    data = construir_autocompletado(paginas)
+    build_s = time.perf_counter() - inicio
+    tam = len(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    auto = Autocompletado(data)
+
+    rng = random.Random(args.seed)
+    prefijos = []
+    for _ in range(args.queries):
+        palabras = rng.choice(auto.items)[0].split()
+        desde = rng.randrange(len(palabras))
+        prefijos.append(" ".join(palabras[desde:])[: rng.randint(1, 8)])
+    tiempos = []
+    for prefijo in prefijos:
+        inicio = time.perf_counter()
+        auto.suggest(prefijo, args.k)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    print(
+        f"{len(auto)} entradas, {len(data['keys'])} claves, "
+        f"construcción {build_s:.2f} s, {tam / 1e6:.1f} MB"
+    )
+    print(
+        f"consulta media {sum(tiempos) / len(tiempos):.0f} µs, "
+        f"p95 {tiempos[int(len(tiempos) * 0.95)]:.0f} µs"
+    )
+
+
+if __name__ == "__main__":
+    main()
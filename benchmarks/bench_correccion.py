@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Mide la construcción y las consultas de :class:`Corrector`.
+
+Genera un vocabulario sintético de palabras con sílabas aleatorias y
+frecuencias de Zipf (por defecto 30 000 palabras), construye la tabla de
+borrados y corrige palabras del vocabulario con una errata (borrado,
+inserción, sustitución o transposición) mostrando el tiempo medio por
+palabra, el percentil 95 y el porcentaje de aciertos.
+
+Uso::
+
+    python benchmarks/bench_correccion.py --words 30000 --queries 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from wiki_modular.core.correccion import (  # noqa: E402
+    Corrector,
+    construir_corrector,
+)
+
+SILABAS = [c + v for c in "bcdfglmnprstv" for v in "aeiou"]
+
+
+def errata(palabra: str, rng: random.Random) -> str:
+    """``palabra`` con un error de edición aleatorio."""
+    i = rng.randrange(len(palabra) - 1)
+    resto = i + 1
+    tipo = rng.randrange(4)
+    if tipo == 0:
+        return palabra[:i] + palabra[resto:]
+    if tipo == 1:
+        return palabra[:i] + rng.choice(string.ascii_lowercase) + palabra[i:]
+    if tipo == 2:
+        return palabra[:i] + rng.choice(string.ascii_lowercase) + palabra[resto:]
+    despues = resto + 1
+    return palabra[:i] + palabra[resto] + palabra[i] + palabra[despues:]
+
+
+def main() -> None:
+    """Construye el corrector y mide las consultas."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulario = set()
+    while len(vocabulario) < args.words:
+        vocabulario.add("".join(rng.choices(SILABAS, k=rng.randint(2, 5))))
+    palabras = sorted(vocabulario)
+    rng.shuffle(palabras)
+    contenido = " ".join(
+        " ".join([p] * max(1, args.words // (rango * 50)))
+        for rango, p in enumerate(palabras, 1)
+    )
+    indice = {"vocabulario.md": {"metadata": {}, "content": contenido}}
+
+    inicio = time.perf_counter()
+    data = construir_corrector(indice)
+    build_s = time.perf_counter() - inicio
+    tam = len(json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    corrector = Corrector(data)
+
+    objetivos = rng.sample(palabras, min(args.queries, len(palabras)))
+    consultas = [errata(p, rng) for p in objetivos]
+    tiempos = []
+    aciertos = 0
+    for objetivo, consulta in zip(objetivos, consultas):
+        inicio = time.perf_counter()
+        corregida = corrector.suggest_correction(consulta)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+        aciertos += corregida == objetivo
+    tiempos.sort()
+    print(
+        f"{len(corrector)} palabras, {len(data['deletes'])} borrados, "
+        f"construcción {build_s:.2f} s, {tam / 1e6:.1f} MB"
+    )
+    print(
+        f"corrección media {sum(tiempos) / len(tiempos):.0f} µs, "
+        f"p95 {tiempos[int(len(tiempos) * 0.95)]:.0f} µs, "
+        f"aciertos {100 * aciertos / len(tiempos):.0f} %"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Mide la detección de páginas casi duplicadas con MinHash y LSH.
+
+Reutiliza la wiki sintética de ``bench_indice_paralelo.py`` (por defecto
+10 000 páginas) y añade ``--duplicates`` copias de páginas al azar con unas
+pocas palabras cambiadas. Muestra el tiempo de la primera ejecución (todas
+las firmas), el de una segunda con la caché de firmas y cuántas de las
+copias se encuentran.
+
+Uso::
+
+    python benchmarks/bench_duplicados.py --pages 10000 --duplicates 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_indice_paralelo import VOCABULARIO, crear_wiki  # noqa: E402
+
+from scripts.generar_indice_busqueda import generar_indice  # noqa: E402
+from wiki_modular.core.duplicados import (  # noqa: E402
+    FirmasCache,
+    buscar_duplicados,
+    huella_firmas,
+)
+
+
+def main() -> None:
+    """Busca los duplicados sin caché y con caché y comprueba los encontrados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--duplicates", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wiki = Path(tmp) / "wiki"
+        crear_wiki(wiki, args.pages, args.seed)
+        paginas = generar_indice(wiki)
+
+        rng = random.Random(args.seed)
+        copias = {}
+        for n, ruta in enumerate(rng.sample(sorted(paginas), args.duplicates)):
+            palabras = str(paginas[ruta]["content"]).split()
+            for _ in range(3):
+                palabras[rng.randrange(len(palabras))] = rng.choice(VOCABULARIO)
+            copia = f"99_Nuevas_Secciones/copia_{n:05d}.md"
+            paginas[copia] = {"metadata": {}, "content": " ".join(palabras)}
+            copias[copia] = ruta
+
+        cache_path = Path(tmp) / "cache.npz"
+        tiempos = []
+        for _ in range(2):
+            cache = FirmasCache(cache_path, huella_firmas())
+            inicio = time.perf_counter()
+            grupos, calculadas = buscar_duplicados(paginas, cache=cache)
+            tiempos.append((time.perf_counter() - inicio, calculadas))
+            cache.save()
+
+    encontradas = sum(
+        1
+        for grupo in grupos
+        for ruta, _ in grupo.duplicadas
+        if copias.get(ruta) == grupo.canonica
+    )
+    print(f"{len(paginas)} páginas, {args.duplicates} copias")
+    for nombre, (segundos, calculadas) in zip(("sin caché", "con caché"), tiempos):
+        print(f"{nombre:>10}: {segundos:.2f} s, {calculadas} firmas calculadas")
+    print(f"{len(grupos)} grupos, {encontradas}/{args.duplicates} copias encontradas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""Compara ``difflib.get_close_matches`` con :class:`TrigramIndex`.
+
+Genera índices sintéticos de distinto tamaño, lanza las mismas consultas
+contra ambos caminos y muestra, por tipo de consulta, el tiempo medio, el
+porcentaje de resultados idénticos y el de candidatos cuya cota llegó a
+calcularse (``acotados``): con erratas basta la lista corta de candidatos
+que comparten trigramas, mientras que las consultas que no se parecen a
+nada obligan a acotar casi todo el índice para seguir siendo exactos. Los
+tipos son títulos del índice con erratas, títulos nuevos formados con el
+mismo vocabulario y cadenas aleatorias o fragmentos de palabra que no se
+parecen a ningún candidato. ``-n 1`` reproduce la búsqueda del destino en
+la ingesta y ``--palabras 2000`` da títulos tan variados como los de una
+wiki real, donde la lista corta es una fracción pequeña del índice.
+
+Uso::
+
+    python benchmarks/bench_fuzzy.py --sizes 1000 10000 50000 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import string
+import sys
+import time
+from difflib import get_close_matches
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from wiki_modular.core.fuzzy import TrigramIndex  # noqa: E402
+
+VOCABULARIO = (
+    "instancia sql server backup restauracion configuracion red seguridad "
+    "usuarios roles cluster alta disponibilidad replica indices mantenimiento "
+    "jobs agente correo logs auditoria parches version migracion datos tablas "
+    "particiones memoria rendimiento consultas bloqueos permisos certificados "
+    "cifrado monitorizacion alertas almacenamiento discos licencias"
+).split()
+
+
+def titulo_sintetico(rng: random.Random) -> str:
+    """Devuelve un slug de 2 a 5 palabras del vocabulario."""
+    return "_".join(rng.sample(VOCABULARIO, rng.randint(2, 5)))
+
+
+def con_erratas(rng: random.Random, texto: str) -> str:
+    """Aplica entre 0 y 3 borrados, inserciones o sustituciones."""
+    chars = list(texto)
+    for _ in range(rng.randint(0, 3)):
+        pos = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.33 and len(chars) > 1:
+            del chars[pos]
+        elif op < 0.66:
+            chars.insert(pos, rng.choice(string.ascii_lowercase))
+        else:
+            chars[pos] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def consultas_por_tipo(
+    rng: random.Random, candidatos: list[str], cuantas: int
+) -> dict[str, list[str]]:
+    """Consultas de cada tipo para comparar ambos caminos."""
+    letras = string.ascii_lowercase + "_"
+    return {
+        "erratas": [con_erratas(rng, rng.choice(candidatos)) for _ in range(cuantas)],
+        "nuevos": [titulo_sintetico(rng) for _ in range(cuantas)],
+        "ajenas": [
+            "".join(rng.choices(letras, k=rng.randint(2, 40)))
+            if rng.random() < 0.5
+            else rng.choice(VOCABULARIO)[: rng.randint(2, 6)] + rng.choice(["", "las"])
+            for _ in range(cuantas)
+        ],
+    }
+
+
+def medir(fn, consultas: list[str]) -> tuple[float, list[list[str]]]:
+    """Ejecuta ``fn`` por cada consulta y devuelve (ms por consulta, resultados)."""
+    inicio = time.perf_counter()
+    resultados = [fn(q) for q in consultas]
+    total = time.perf_counter() - inicio
+    return total * 1000 / len(consultas), resultados
+
+
+def main() -> None:
+    """Ejecuta la comparación para cada tamaño de índice."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 30000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--cutoff", type=float, default=0.5)
+    parser.add_argument("-n", type=int, default=3, help="Resultados por consulta")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--palabras",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Vocabulario de N palabras aleatorias en lugar de los 40 términos fijos",
+    )
+    args = parser.parse_args()
+    if args.palabras:
+        rng = random.Random(args.seed)
+        VOCABULARIO[:] = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))
+            for _ in range(args.palabras)
+        ]
+
+    print(
+        f"{'entradas':>9} {'consultas':>9} {'difflib ms':>11} {'trigram ms':>11} "
+        f"{'build ms':>9} {'iguales':>8} {'acotados':>9}"
+    )
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        candidatos = list(dict.fromkeys(titulo_sintetico(rng) for _ in range(size)))
+
+        inicio = time.perf_counter()
+        indice = TrigramIndex(candidatos)
+        build_ms = (time.perf_counter() - inicio) * 1000
+
+        for tipo, consultas in consultas_por_tipo(
+            rng, candidatos, args.queries
+        ).items():
+            base_ms, esperados = medir(
+                lambda q: get_close_matches(
+                    q, candidatos, n=args.n, cutoff=args.cutoff
+                ),
+                consultas,
+            )
+            acotados: list[int] = []
+
+            def trigram(q: str) -> list[str]:
+                matches = indice.close_matches(q, n=args.n, cutoff=args.cutoff)
+                acotados.append(indice.acotados)
+                return matches
+
+            tri_ms, obtenidos = medir(trigram, consultas)
+            iguales = sum(a == b for a, b in zip(esperados, obtenidos)) / len(consultas)
+            fraccion = sum(acotados) / len(acotados) / len(candidatos)
+            print(
+                f"{len(candidatos):>9} {tipo:>9} {base_ms:>11.2f} {tri_ms:>11.2f} "
+                f"{build_ms:>9.0f} {iguales:>8.0%} {fraccion:>9.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Mide cómo escala ``generar_indice_busqueda --jobs`` con el número de procesos.
+
+Genera una wiki sintética (por defecto 10 000 páginas con frontmatter YAML y
+varios encabezados), construye el índice con 1, 2, ... N procesos y muestra
+el tiempo, la aceleración respecto a la ejecución en serie y si la salida es
+idéntica byte a byte.
+
+Uso::
+
+    python benchmarks/bench_indice_paralelo.py --pages 10000 --jobs 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from scripts.generar_indice_busqueda import iter_indice  # noqa: E402
+from wiki_modular.core.jsonstream import escribir_json  # noqa: E402
+
+VOCABULARIO = (
+    "instancia sql server backup restauracion configuracion red seguridad "
+    "usuarios roles cluster alta disponibilidad replica indices mantenimiento "
+    "jobs agente correo logs auditoria parches version migracion datos tablas "
+    "particiones memoria rendimiento consultas bloqueos permisos certificados"
+).split()
+
+
+def pagina_sintetica(rng: random.Random, n: int) -> str:
+    """Markdown con frontmatter, 3 a 8 secciones y párrafos aleatorios."""
+    lineas = [
+        "---",
+        f"titulo: Página {n}",
+        f"source_file: doc_{n % 97}.docx",
+        f"conversion_date: '2024-0{1 + n % 9}-1{n % 10}'",
+        "tags: [" + ", ".join(rng.sample(VOCABULARIO, 3)) + "]",
+        "---",
+        f"# Página {n}",
+    ]
+    for s in range(rng.randint(3, 8)):
+        lineas.append(
+            f"{'#' * rng.randint(2, 4)} {' '.join(rng.sample(VOCABULARIO, 3))} {s}"
+        )
+        for _ in range(rng.randint(2, 6)):
+            lineas.append(" ".join(rng.choices(VOCABULARIO, k=rng.randint(8, 30))))
+    return "\n".join(lineas) + "\n"
+
+
+def crear_wiki(raiz: Path, paginas: int, seed: int) -> None:
+    """Escribe ``paginas`` Markdown repartidos en 50 secciones."""
+    rng = random.Random(seed)
+    for n in range(paginas):
+        seccion = raiz / f"seccion_{n % 50:02d}"
+        seccion.mkdir(parents=True, exist_ok=True)
+        (seccion / f"pagina_{n:05d}.md").write_text(
+            pagina_sintetica(rng, n), encoding="utf-8"
+        )
+
+
+def main() -> None:
+    """Construye el índice con cada número de procesos y compara."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument(
+        "--jobs", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1})
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wiki = Path(tmp) / "wiki"
+        crear_wiki(wiki, args.pages, args.seed)
+        print(f"{args.pages} páginas, {os.cpu_count()} CPU")
+        print(f"{'jobs':>5} {'segundos':>9} {'aceleración':>12} {'idéntico':>9}")
+        base_s = None
+        referencia = None
+        for jobs in args.jobs:
+            out = Path(tmp) / f"indice_{jobs}.json"
+            inicio = time.perf_counter()
+            escribir_json(iter_indice(wiki, jobs), out)
+            segundos = time.perf_counter() - inicio
+            data = out.read_bytes()
+            if base_s is None:
+                base_s, referencia = segundos, data
+            print(
+                f"{jobs:>5} {segundos:>9.2f} {base_s / segundos:>11.2f}x "
+                f"{'sí' if data == referencia else 'NO':>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Mide el cálculo completo e incremental de las páginas relacionadas.
+
+Reutiliza la wiki sintética de ``bench_indice_paralelo.py`` (por defecto
+10 000 páginas), calcula ``related.json`` desde cero y después modifica
+``--changed`` páginas y repite el cálculo con el estado anterior, mostrando
+el tiempo de cada uno y las filas recalculadas.
+
+Uso::
+
+    python benchmarks/bench_relacionadas.py --pages 10000 --changed 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_indice_paralelo import VOCABULARIO, crear_wiki  # noqa: E402
+
+from scripts.generar_indice_busqueda import generar_indice  # noqa: E402
+from wiki_modular.core.relacionadas import calcular_relacionadas  # noqa: E402
+
+
+def main() -> None:
+    """Calcula las relacionadas completas y tras cambiar algunas páginas."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--changed", type=int, default=20)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wiki = Path(tmp) / "wiki"
+        crear_wiki(wiki, args.pages, args.seed)
+        paginas = generar_indice(wiki)
+
+    inicio = time.perf_counter()
+    previo, estado, _ = calcular_relacionadas(paginas, k=args.k)
+    completo_s = time.perf_counter() - inicio
+
+    rng = random.Random(args.seed)
+    for ruta in rng.sample(sorted(paginas), args.changed):
+        info = dict(paginas[ruta])
+        info["content"] = " ".join(rng.choices(VOCABULARIO, k=200))
+        paginas[ruta] = info
+    inicio = time.perf_counter()
+    _, _, recalculadas = calcular_relacionadas(
+        paginas, k=args.k, previo=previo, estado=estado
+    )
+    incremental_s = time.perf_counter() - inicio
+
+    print(f"{len(paginas)} páginas, k={args.k}")
+    print(f"completo {completo_s:.2f} s")
+    print(
+        f"incremental {incremental_s:.2f} s "
+        f"({args.changed} cambiadas, {len(recalculadas)} filas recalculadas)"
+    )
+
+
+if __name__ == "__main__":
+    main()
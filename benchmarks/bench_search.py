@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Mide la construcción y las consultas de :class:`BM25Index`.
+
+Reutiliza la wiki sintética de ``bench_indice_paralelo.py`` (por defecto
+10 000 páginas), construye el índice BM25 y lanza consultas de 1 a 4
+términos del vocabulario mostrando el tiempo medio y el percentil 95.
+
+Uso::
+
+    python benchmarks/bench_search.py --pages 10000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_indice_paralelo import VOCABULARIO, crear_wiki  # noqa: E402
+
+from scripts.generar_indice_busqueda import generar_indice  # noqa: E402
+from wiki_modular.core.search import BM25Index  # noqa: E402
+
+
+def main() -> None:
+    """Construye el índice y mide las consultas."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wiki = Path(tmp) / "wiki"
+        crear_wiki(wiki, args.pages, args.seed)
+        paginas = generar_indice(wiki)
+
+    inicio = time.perf_counter()
+    indice = BM25Index(paginas)
+    build_s = time.perf_counter() - inicio
+
+    rng = random.Random(args.seed)
+    consultas = [
+        " ".join(rng.sample(VOCABULARIO, rng.randint(1, 4)))
+        for _ in range(args.queries)
+    ]
+    tiempos = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        indice.search(consulta, args.k)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    print(f"{len(indice)} páginas, construcción {build_s:.2f} s")
+    print(
+        f"consulta media {sum(tiempos) / len(tiempos):.2f} ms, "
+        f"p95 {tiempos[int(len(tiempos) * 0.95)]:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,625 @@
+// Búsqueda de buscar-avanzado.html en un Web Worker.
+//
+// Carga los índices, ejecuta las consultas de lunr y prepara los fragmentos
+// resaltados fuera del hilo principal. La página envía mensajes
+// ``{type: 'search' | 'page' | 'suggest', id, ...}`` y recibe la respuesta
+// con el mismo ``id``; los resultados se devuelven por páginas de
+// ``PAGE_SIZE`` para no generar fragmentos ni nodos que nadie va a ver.
+
+// Misma versión que serializa lunr.py en generar_indice_busqueda.py
+importScripts('https://unpkg.com/lunr@2.3.9/lunr.js');
+
+const PAGE_SIZE = 50;
+let idx; let headerIdx; let docs = []; let headers = []; let docMap = {};
+// Encabezados por documento y por ref; ``pos``/``end`` vienen del índice
+let headersByDoc = {}; let headerMap = {};
+// Directorio de los índices relativo a este script: generar_indice_busqueda.py
+// los escribe dentro de la wiki. La página puede indicar otro con
+// ``buscar-worker.js?base=...``
+const INDEX_BASE = (self.location &&
+  new URL(self.location.href).searchParams.get('base')) || '../wiki/';
+// Modo fragmentado (generar_indice_busqueda.py --shards wiki/search)
+const SHARDS_DIR = INDEX_BASE + 'search/';
+let shardManifest = null; const shardCache = new Map();
+// Autocompletado (search_index.suggest.json)
+let suggestData = null; let suggestFolded = [];
+// Facetas de metadatos (search_index.facets.json)
+let facets = null; let facetIndex = {}; const facetBytes = new Map();
+// Corrector ortográfico (search_index.spell.json); se carga la primera vez
+// que una consulta no encuentra nada
+let spell = null; let spellLoad = null;
+// Última consulta: resultados ordenados, sin fragmentos hasta que se piden
+let current = null;
+// Id de la última búsqueda recibida; las anteriores que terminen después
+// (p. ej. esperando fragmentos) no deben sustituir a ``current``
+let latestSearch = 0;
+
+function escapeRegExp(str) {
+  return str.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+// Análisis en español; replica wiki_modular/core/analysis.py
+const STOPWORDS_ES = new Set((
+  'a al algo algun alguna algunas alguno algunos ante antes aquel aquella ' +
+  'aquellas aquellos aqui asi aun cada como con contra cual cuales cuando de del ' +
+  'desde donde durante e el ella ellas ello ellos en entre era eran eres es esa ' +
+  'esas ese eso esos esta estaba estaban estado estan estar estas este esto estos ' +
+  'fue fueron ha habia han hasta hay la las le les lo los mas me mi mis mucho ' +
+  'muchos muy nada ni no nos nosotros o os otra otras otro otros para pero poco ' +
+  'por porque que quien quienes se sea ser si sido sin sobre son su sus tambien ' +
+  'tan tanto te tiene tienen todo todos tu tus u un una uno unos usted ustedes y ' +
+  'ya yo '
+).split(/\s+/).filter(Boolean));
+const analysisCache = new Map();
+
+function foldAccents(str) {
+  return str.normalize('NFKD').replace(/\p{Mn}/gu, '');
+}
+
+// Replica stem_es: quita el plural, luego la vocal de género y cambia -z por -c
+const MIN_RAIZ = 3;
+function stemEs(w) {
+  if (w.endsWith('s') && w.length > MIN_RAIZ) {
+    const plural = w.endsWith('es') && !'aeiou'.includes(w[w.length - 3]) && w.length > MIN_RAIZ + 1;
+    w = w.slice(0, plural ? -2 : -1);
+  }
+  if ('oae'.includes(w[w.length - 1] || '_') && w.length > MIN_RAIZ) w = w.slice(0, -1);
+  if (w.endsWith('z')) w = w.slice(0, -1) + 'c';
+  return w;
+}
+
+function analizarTermino(term) {
+  let out = analysisCache.get(term);
+  if (out === undefined) {
+    const folded = foldAccents(term.toLowerCase());
+    out = STOPWORDS_ES.has(folded) ? null : stemEs(folded);
+    analysisCache.set(term, out);
+  }
+  return out;
+}
+
+function analizarEs(token) {
+  const m = foldAccents(token.toString()).match(/^\W*?([^\W]+)\W*?$/);
+  const term = analizarTermino(m ? m[1] : token.toString());
+  return term ? token.update(() => term) : undefined;
+}
+lunr.Pipeline.registerFunction(analizarEs, 'analizarEs');
+
+// Misma tubería que el índice precalculado (en lugar de la inglesa de lunr)
+function useSpanish(builder) {
+  builder.pipeline.reset();
+  builder.searchPipeline.reset();
+  builder.pipeline.add(analizarEs);
+  builder.searchPipeline.add(analizarEs);
+}
+
+function highlight(text, terms) {
+  terms.forEach(t => {
+    if (!t) return;
+    const re = new RegExp(escapeRegExp(t), 'gi');
+    text = text.replace(re, m => `<mark>${m}</mark>`);
+  });
+  return text;
+}
+
+function docUrl(id) {
+  return '../index.html#/' + id.replace(/\.md$/, '');
+}
+
+// Índice precalculado por generar_indice_busqueda.py (search_index.lunr.json)
+async function loadPrebuilt() {
+  const res = await fetch(INDEX_BASE + 'search_index.lunr.json');
+  if (!res.ok) return false;
+  const data = await res.json();
+  idx = lunr.Index.load(data.index);
+  headerIdx = lunr.Index.load(data.headerIndex);
+  docs = data.docs.map(d => Object.assign(d, { url: docUrl(d.id) }));
+  headers = data.headers.map(h => Object.assign(h, { url: docUrl(h.doc) + '#' + h.slug }));
+  return true;
+}
+
+// Filtro Bloom de términos por fragmento; replica wiki_modular/core/shards.py
+function fnv1a(bytes, seed) {
+  let h = seed >>> 0;
+  for (const b of bytes) h = Math.imul(h ^ b, 0x01000193) >>> 0;
+  return h;
+}
+
+function bloomHas(filter, term) {
+  if (!filter.bytes) filter.bytes = Uint8Array.from(atob(filter.bits), c => c.charCodeAt(0));
+  const data = new TextEncoder().encode(term);
+  const h1 = fnv1a(data, 0x811c9dc5);
+  const h2 = (fnv1a(data, (0x01000193 ^ 0x5bd1e995) >>> 0) | 1) >>> 0;
+  for (let i = 0; i < filter.k; i++) {
+    const pos = (h1 + i * h2) % filter.m;
+    if (!(filter.bytes[pos >> 3] & (1 << (pos & 7)))) return false;
+  }
+  return true;
+}
+
+function queryTerms(q) {
+  return lunr.tokenizer(q)
+    .map(t => analizarEs(t))
+    .filter(Boolean)
+    .map(t => t.toString());
+}
+
+// Fragmentos que pueden contener la consulta; comodines o campos → todos
+function candidateShards(q) {
+  const all = Object.keys(shardManifest.shards);
+  if (/[*~:^+-]/.test(q)) return all;
+  const terms = queryTerms(q);
+  return all.filter(key => terms.some(t => bloomHas(shardManifest.shards[key].terms, t)));
+}
+
+async function loadShard(key) {
+  if (shardCache.has(key)) return shardCache.get(key);
+  const promise = fetch(SHARDS_DIR + shardManifest.shards[key].file)
+    .then(res => res.json())
+    .then(json => {
+      const shardDocs = Object.entries(json).map(([id, info]) => {
+        const doc = docMap[id];
+        doc.content = info.content || '';
+        return doc;
+      });
+      return lunr(function() {
+        useSpanish(this);
+        this.ref('id');
+        this.field('content');
+        this.field('source_file');
+        this.field('conversion_date');
+        shardDocs.forEach(d => this.add(d));
+      });
+    });
+  shardCache.set(key, promise);
+  return promise;
+}
+
+async function loadSharded() {
+  const res = await fetch(SHARDS_DIR + 'manifest.json');
+  if (!res.ok) return false;
+  shardManifest = await res.json();
+  docs = Object.entries(shardManifest.docs).map(([id, d]) => ({
+    id: id,
+    url: docUrl(id),
+    content: '',
+    title: d.title,
+    shard: d.shard,
+    source_file: d.source_file,
+    conversion_date: d.conversion_date
+  }));
+  headers = [];
+  Object.entries(shardManifest.docs).forEach(([id, d]) => {
+    d.headers.forEach(h => {
+      headers.push({
+        ref: id + '#' + h.slug,
+        header: h.text,
+        level: h.level,
+        slug: h.slug,
+        url: docUrl(id) + '#' + h.slug,
+        doc: id,
+        pos: h.pos,
+        end: h.end
+      });
+    });
+  });
+  headerIdx = lunr(function() {
+    useSpanish(this);
+    this.ref('ref');
+    this.field('header');
+    headers.forEach(h => this.add(h));
+  });
+  return true;
+}
+
+async function searchDocs(q) {
+  if (!shardManifest) return idx.search(q);
+  const indexes = await Promise.all(candidateShards(q).map(loadShard));
+  return indexes.flatMap(i => i.search(q)).sort((a, b) => b.score - a.score);
+}
+
+// Alternativa si no existe el índice serializado: indexar en el navegador
+async function buildClientSide() {
+  const res = await fetch(INDEX_BASE + 'search_index.json');
+  const json = await res.json();
+  docs = Object.entries(json).map(([id, info]) => {
+    const meta = info.metadata || {};
+    return {
+      id: id,
+      url: docUrl(id),
+      content: info.content || '',
+      source_file: meta.source_file || '',
+      conversion_date: meta.conversion_date || ''
+    };
+  });
+  headers = [];
+  Object.entries(json).forEach(([id, info]) => {
+    (info.headers || []).forEach(h => {
+      headers.push({
+        ref: id + '#' + h.slug,
+        header: h.text,
+        level: h.level,
+        slug: h.slug,
+        url: docUrl(id) + '#' + h.slug,
+        doc: id,
+        pos: h.pos,
+        end: h.end
+      });
+    });
+  });
+
+  idx = lunr(function() {
+    useSpanish(this);
+    this.ref('id');
+    this.field('content');
+    this.field('source_file');
+    this.field('conversion_date');
+    docs.forEach(d => this.add(d));
+  });
+  headerIdx = lunr(function() {
+    useSpanish(this);
+    this.ref('ref');
+    this.field('header');
+    headers.forEach(h => this.add(h));
+  });
+}
+
+// Autocompletado; replica wiki_modular/core/autocompletado.py
+function normalizarSugerencia(str) {
+  return foldAccents(str.toLowerCase()).replace(/[\u{10000}-\u{10FFFF}]/gu, '');
+}
+
+async function loadSuggest() {
+  const res = await fetch(INDEX_BASE + 'search_index.suggest.json');
+  if (!res.ok) return;
+  suggestData = await res.json();
+  suggestFolded = new Array(suggestData.items.length);
+}
+
+// Texto normalizado de la clave ``i`` (item * 256 + offset)
+function suggestKey(i) {
+  const code = suggestData.keys[i];
+  const item = Math.floor(code / 256);
+  if (suggestFolded[item] === undefined) {
+    suggestFolded[item] = normalizarSugerencia(suggestData.items[item][0]);
+  }
+  return suggestFolded[item].slice(code % 256);
+}
+
+function lowerBound(target, lo) {
+  let hi = suggestData.keys.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >>> 1;
+    if (suggestKey(mid) < target) lo = mid + 1; else hi = mid;
+  }
+  return lo;
+}
+
+function suggest(prefix, k) {
+  if (!suggestData) return [];
+  const p = normalizarSugerencia(prefix).trimStart();
+  if (!p || k <= 0) return [];
+  let chosen;
+  if (p.length <= 2 && k <= suggestData.topK) {
+    chosen = (suggestData.top[p] || []).slice(0, k);
+  } else {
+    const lo = lowerBound(p, 0);
+    const hi = lowerBound(p + '\uffff', lo);
+    // Los ``k`` items de mejor rango (menor índice) sin ordenar todo el rango
+    chosen = [];
+    for (let i = lo; i < hi; i++) {
+      const item = Math.floor(suggestData.keys[i] / 256);
+      if (chosen.length === k && item >= chosen[k - 1]) continue;
+      if (chosen.includes(item)) continue;
+      let j = chosen.length;
+      while (j > 0 && chosen[j - 1] > item) j--;
+      chosen.splice(j, 0, item);
+      if (chosen.length > k) chosen.pop();
+    }
+  }
+  return chosen.map(i => {
+    const [text, doc, slug, weight] = suggestData.items[i];
+    const url = docUrl(doc) + (slug ? '#' + slug : '');
+    return { text: text, doc: doc, slug: slug, weight: weight, url: url };
+  });
+}
+
+// Corrector; replica wiki_modular/core/correccion.py
+function loadSpell() {
+  if (!spellLoad) {
+    spellLoad = fetch(INDEX_BASE + 'search_index.spell.json')
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => {
+        if (data) data.ids = new Map(data.terms.map((t, i) => [t[0], i]));
+        spell = data;
+      })
+      .catch(() => { spell = null; });
+  }
+  return spellLoad;
+}
+
+function correctable(word) {
+  return word.length >= 3 && word.length <= 40 && !/^\d+$/.test(word) && !STOPWORDS_ES.has(word);
+}
+
+function deletes(word, maxDist) {
+  const out = new Set([word]);
+  let frontier = [word];
+  for (let n = 0; n < maxDist; n++) {
+    const next = [];
+    frontier.forEach(w => {
+      for (let i = 0; i < w.length; i++) {
+        const d = w.slice(0, i) + w.slice(i + 1);
+        if (!out.has(d)) { out.add(d); next.push(d); }
+      }
+    });
+    frontier = next;
+  }
+  return out;
+}
+
+// Damerau-Levenshtein acotada; ``max + 1`` si se supera ``max``
+function editDistance(a, b, max) {
+  if (Math.abs(a.length - b.length) > max) return max + 1;
+  let start = 0;
+  while (start < a.length && start < b.length && a[start] === b[start]) start++;
+  let endA = a.length; let endB = b.length;
+  while (endA > start && endB > start && a[endA - 1] === b[endB - 1]) { endA--; endB--; }
+  a = a.slice(start, endA); b = b.slice(start, endB);
+  const cap = max + 1;
+  if (!a.length || !b.length) return Math.min(a.length + b.length, cap);
+  const n = a.length; const m = b.length;
+  let prev2 = []; let prev = [];
+  for (let j = 0; j <= m; j++) prev.push(Math.min(j, cap));
+  for (let i = 1; i <= n; i++) {
+    const row = new Array(m + 1).fill(cap);
+    row[0] = Math.min(i, cap);
+    let low = row[0];
+    for (let j = Math.max(1, i - max); j <= Math.min(m, i + max); j++) {
+      let v = prev[j - 1] + (a[i - 1] === b[j - 1] ? 0 : 1);
+      v = Math.min(v, prev[j] + 1, row[j - 1] + 1);
+      if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+        v = Math.min(v, prev2[j - 2] + 1);
+      }
+      row[j] = Math.min(v, cap);
+      if (v < low) low = v;
+    }
+    if (low > max) return cap;
+    prev2 = prev; prev = row;
+  }
+  return prev[m];
+}
+
+// Mejor palabra del diccionario para ``word`` (ya normalizada) o null
+function correctWord(word) {
+  if (spell.ids.has(word)) return word;
+  const candidates = new Set();
+  deletes(word.slice(0, spell.prefixLength), spell.maxDistance).forEach(d => {
+    (spell.deletes[d] || []).forEach(id => candidates.add(id));
+  });
+  // Candidatos de más a menos frecuentes: el primero a distancia 1 gana
+  let best = null; let limit = spell.maxDistance;
+  [...candidates].sort((x, y) => x - y).forEach(id => {
+    if (limit < 1) return;
+    const term = spell.terms[id][0];
+    if (Math.abs(term.length - word.length) > limit) return;
+    const d = editDistance(word, term, limit);
+    if (d > limit) return;
+    best = term;
+    limit = d - 1;
+  });
+  return best;
+}
+
+async function correctQuery(q) {
+  await loadSpell();
+  if (!spell) return null;
+  const fixed = q.replace(/[\p{L}\p{M}\p{N}_]+/gu, token => {
+    const word = foldAccents(token.toLowerCase());
+    if (!correctable(word) || spell.ids.has(word)) return token;
+    return correctWord(word) || token;
+  });
+  return fixed !== q ? fixed : null;
+}
+
+// Mapas de bits de metadatos; replica wiki_modular/core/facetas.py
+async function loadFacets() {
+  const res = await fetch(INDEX_BASE + 'search_index.facets.json');
+  if (!res.ok) return;
+  const data = await res.json();
+  facetIndex = {};
+  data.docs.forEach((id, i) => { facetIndex[id] = i; });
+  facets = data;
+}
+
+function facetBits(field, value) {
+  const key = field + '\n' + value;
+  if (!facetBytes.has(key)) {
+    facetBytes.set(key, Uint8Array.from(atob(facets.facets[field][value]), c => c.charCodeAt(0)));
+  }
+  return facetBytes.get(key);
+}
+
+// OR de los mapas de bits de los valores de ``field`` que cumplen ``accept``
+function facetUnion(field, accept) {
+  const out = new Uint8Array((facets.docs.length + 7) >> 3);
+  Object.keys(facets.facets[field] || {}).forEach(value => {
+    if (!accept(value)) return;
+    const bits = facetBits(field, value);
+    for (let i = 0; i < out.length; i++) out[i] |= bits[i];
+  });
+  return out;
+}
+
+// Predicado de los filtros de metadatos: AND de mapas de bits si hay
+// facetas; si no, se comparan los metadatos de cada documento.
+function docFilter({ source, date, dateFrom }) {
+  source = (source || '').toLowerCase();
+  if (!source && !date && !dateFrom) return () => true;
+  if (!facets) {
+    return d => (!source || d.source_file.toLowerCase().includes(source)) &&
+                (!date || d.conversion_date === date) &&
+                (!dateFrom || d.conversion_date >= dateFrom);
+  }
+  const parts = [];
+  if (source) parts.push(facetUnion('source_file', v => v.toLowerCase().includes(source)));
+  if (date) parts.push(facetUnion('conversion_date', v => v === date));
+  if (dateFrom) parts.push(facetUnion('conversion_date', v => v >= dateFrom));
+  const mask = parts[0];
+  parts.slice(1).forEach(bits => {
+    for (let i = 0; i < mask.length; i++) mask[i] &= bits[i];
+  });
+  return d => {
+    const i = facetIndex[d.id];
+    return i !== undefined && (mask[i >> 3] & (1 << (i & 7))) !== 0;
+  };
+}
+
+async function init() {
+  loadSuggest().catch(() => { suggestData = null; });
+  await loadFacets().catch(() => { facets = null; });
+  let loaded = false;
+  for (const loader of [loadSharded, loadPrebuilt]) {
+    try {
+      loaded = await loader();
+    } catch (e) {
+      loaded = false;
+    }
+    if (loaded) break;
+  }
+  if (!loaded) await buildClientSide();
+  docMap = {};
+  docs.forEach(d => { docMap[d.id] = d; });
+  headersByDoc = {};
+  headerMap = {};
+  headers.forEach(h => {
+    (headersByDoc[h.doc] = headersByDoc[h.doc] || []).push(h);
+    headerMap[h.ref] = h;
+  });
+}
+
+function getDocSnippet(doc, terms) {
+  const lower = foldAccents(doc.content.toLowerCase());
+  let pos = -1;
+  terms.forEach(t => {
+    const p = lower.indexOf(foldAccents(t.toLowerCase()));
+    if (p !== -1 && (pos === -1 || p < pos)) pos = p;
+  });
+  if (pos === -1) pos = 0;
+  const start = Math.max(0, pos - 40);
+  const end = Math.min(doc.content.length, pos + 40);
+  let snippet = doc.content.slice(start, end).replace(/\n/g, ' ');
+  snippet = highlight(snippet, terms);
+  let anchor = '';
+  let headerTitle = '';
+  // Sección más interna que contiene la coincidencia
+  (headersByDoc[doc.id] || []).forEach(h => {
+    if (h.pos <= pos && pos < h.end) {
+      anchor = h.slug;
+      headerTitle = h.header;
+    }
+  });
+  return {
+    snippet: (start > 0 ? '...' : '') + snippet + (end < doc.content.length ? '...' : ''),
+    anchor: anchor,
+    header: headerTitle
+  };
+}
+
+function getHeaderSnippet(h, terms) {
+  const doc = docMap[h.doc];
+  if (!doc.content) return '';
+  const start = h.pos;
+  const end = Math.min(h.end, start + 80);
+  let snippet = doc.content.slice(start, end).replace(/\n/g, ' ');
+  snippet = highlight(snippet, terms);
+  return (end < h.end ? snippet + '...' : snippet);
+}
+
+
+// Lo que la página pinta de cada resultado; solo se calcula por páginas
+function docResult(d, terms) {
+  const info = getDocSnippet(d, terms);
+  return {
+    id: d.id,
+    url: info.anchor ? `${d.url}#${info.anchor}` : d.url,
+    source_file: d.source_file,
+    conversion_date: d.conversion_date,
+    header: info.header,
+    snippet: info.snippet
+  };
+}
+
+function headerResult(h, terms) {
+  return {
+    url: h.url,
+    header: h.header,
+    level: h.level,
+    snippet: getHeaderSnippet(h, terms)
+  };
+}
+
+async function page(query, kind, offset) {
+  const list = kind === 'docs' ? query.docs : query.headers;
+  const slice = list.slice(offset, offset + PAGE_SIZE);
+  if (kind === 'docs') return slice.map(d => docResult(d, query.terms));
+  if (shardManifest && query.q) {
+    // Contenido para los fragmentos de los encabezados de esta página
+    const keys = new Set(slice.map(h => docMap[h.doc].shard));
+    await Promise.all([...keys].map(loadShard));
+  }
+  return slice.map(h => headerResult(h, query.terms));
+}
+
+async function search({ id, q, source, date, dateFrom, level }) {
+  const terms = q.split(/\s+/).filter(Boolean);
+  let res = q ? await searchDocs(q) : docs.map(d => ({ ref: d.id }));
+  res = res.map(r => docMap[r.ref]);
+  res = res.filter(docFilter({ source: source, date: date, dateFrom: dateFrom }));
+  let headerRes = q ? headerIdx.search(q) : headers.map(h => ({ ref: h.ref }));
+  headerRes = headerRes.map(r => headerMap[r.ref]);
+  headerRes = headerRes.filter(h => (!level || String(h.level) === level));
+  if (id !== latestSearch) return null;
+  const query = { id: id, q: q, terms: terms, docs: res, headers: headerRes };
+  current = query;
+  return {
+    search: id,
+    didYouMean: q && !res.length ? await correctQuery(q) : null,
+    totalDocs: res.length,
+    totalHeaders: headerRes.length,
+    docs: await page(query, 'docs', 0),
+    headers: await page(query, 'headers', 0)
+  };
+}
+
+const ready = init();
+
+self.onmessage = async e => {
+  const msg = e.data;
+  if (msg.type === 'search') latestSearch = msg.id;
+  await ready;
+  let reply;
+  if (msg.type === 'suggest') {
+    reply = { items: suggest(msg.q, msg.k) };
+  } else if (msg.type === 'search') {
+    try {
+      reply = await search(msg);
+    } catch (err) {
+      // Sintaxis de lunr inválida (p. ej. "title:" o "+"): se avisa a la página
+      if (!(err instanceof lunr.QueryParseError)) throw err;
+      reply = { search: msg.id, error: err.message };
+    }
+    // Sustituida por otra búsqueda mientras esperaba: no se responde
+    if (!reply) return;
+  } else if (msg.type === 'page') {
+    // Páginas de una consulta ya sustituida por otra: la página las descarta
+    const query = current && current.id === msg.search ? current : null;
+    reply = {
+      search: msg.search,
+      kind: msg.kind,
+      offset: msg.offset,
+      items: query ? await page(query, msg.kind, msg.offset) : []
+    };
+  }
+  self.postMessage(Object.assign({ type: msg.type, id: msg.id }, reply));
+};
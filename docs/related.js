@@ -0,0 +1,47 @@
+(function() {
+  // Páginas relacionadas precalculadas por scripts/generar_relacionadas.py
+  var related = null;
+
+  function loadRelated(basePath) {
+    if (!related) {
+      related = fetch(basePath + 'related.json')
+        .then(function(r) { return r.ok ? r.json() : null; })
+        .catch(function() { return null; });
+    }
+    return related;
+  }
+
+  function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, function(c) {
+      return '&#' + c.charCodeAt(0) + ';';
+    });
+  }
+
+  function relatedHtml(data, file) {
+    var pages = (data && data.pages && data.pages[file]) || [];
+    if (!pages.length) return '';
+    var items = pages.map(function(entry) {
+      var ruta = entry[0];
+      var title = (data.titles && data.titles[ruta]) || ruta;
+      var href = '#/' + ruta.replace(/\.md$/, '').split('/').map(encodeURIComponent).join('/');
+      return '<li><a href="' + href + '">' + escapeHtml(title) + '</a></li>';
+    });
+    return '<aside class="related-pages"><h2>Páginas relacionadas</h2><ul>' +
+      items.join('') + '</ul></aside>';
+  }
+
+  function relatedPlugin(hook, vm) {
+    hook.afterEach(function(html, next) {
+      var basePath = vm.config.basePath || '';
+      var file = (vm.route && vm.route.file) || '';
+      if (basePath && file.indexOf(basePath) === 0) file = file.slice(basePath.length);
+      loadRelated(basePath).then(function(data) {
+        next(html + relatedHtml(data, file));
+      });
+    });
+  }
+
+  if (window.$docsify) {
+    window.$docsify.plugins = [].concat(window.$docsify.plugins || [], relatedPlugin);
+  }
+})();
@@ -2,23 +2,25 @@
 """Editor WYSIWYG para archivos Markdown.
 
 Lanza un servidor Flask con SimpleMDE para editar el archivo indicado.
-Al pulsar "Guardar y publicar" se escribe el contenido y se actualiza el
-índice de búsqueda.
+Al pulsar "Guardar y publicar" se escribe el contenido y se actualiza en el
+índice de búsqueda solo la entrada de ese archivo.
 """
 
 from __future__ import annotations
 
 import argparse
-import sys
 import webbrowser
 from pathlib import Path
 
 from flask import Flask, render_template_string, request
 
-from utils.entorno import add_src_to_path, run, script_path
+from utils.entorno import add_src_to_path
 
 add_src_to_path()
 
+import wiki_modular.config as config  # noqa: E402
+from scripts.generar_indice_busqueda import update_index  # noqa: E402
+
 app = Flask(__name__)
 FILE: Path
 
@@ -62,7 +64,7 @@ def load_content():
 def save_content():
     """Guarda el archivo y actualiza el índice de búsqueda."""
     FILE.write_text(request.get_data(as_text=True), encoding="utf-8")
-    run([sys.executable, str(script_path("generar_indice_busqueda.py"))])
+    update_index([FILE], wiki_dir=config.WIKI_DIR)
     return "Guardado"
 
 
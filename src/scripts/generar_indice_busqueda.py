@@ -4,22 +4,107 @@
 
 Recorre la carpeta de la wiki, lee el YAML frontmatter de cada archivo
 Markdown y construye `search_index.json` con el contenido y metadatos.
+
+Con ``--lunr`` genera además `search_index.lunr.json`: los índices lunr de
+documentos y de encabezados ya construidos y serializados (índice invertido,
+vectores de campo) junto con los documentos que muestra
+`buscar-avanzado.html`, que los carga con `lunr.Index.load` en lugar de
+indexar en el navegador. Es opcional porque en wikis grandes es lento y
+ocupa varias veces lo que el propio índice (véase el README).
+
+Con ``--shards DIR`` se escribe además un fragmento por sección de primer
+nivel con nombre basado en su hash y un ``manifest.json`` con títulos,
+encabezados y un filtro Bloom de términos por fragmento; el buscador solo
+descarga los fragmentos que pueden contener la consulta.
+
+También se escribe ``search_index.bm25``, el índice BM25 en formato binario
+que ``wiki_cli.py search`` abre con ``mmap`` (``--no-postings`` lo omite),
+``search_index.suggest.json``, el array de prefijos de títulos y
+encabezados con el que se autocompleta la consulta (``--no-suggest``), y
+``search_index.facets.json``, los mapas de bits por valor de los metadatos
+(``source_file``, ``conversion_date``...) para filtrar resultados
+(``--no-facets``). Con ``--spell`` se genera ``search_index.spell.json``,
+el vocabulario de la wiki y su tabla de borrados para corregir consultas mal
+escritas; es opcional porque en wikis grandes tarda decenas de segundos.
+
+Junto a la salida se guarda ``search_index.manifest.json`` con ruta, mtime,
+tamaño y hash de cada archivo. En cada ejecución solo se vuelven a parsear
+los archivos nuevos o modificados y se eliminan los borrados (``--full``
+fuerza la reconstrucción). :func:`update_index` permite actualizar solo los
+archivos indicados, como hace el editor al guardar; las salidas derivadas
+no se reconstruyen entonces, sino que se anotan como pendientes en el
+manifest hasta la siguiente ejecución del script.
+
+Las entradas se escriben en streaming a un archivo temporal que se renombra
+al terminar (``--compact`` sin sangrías; ``--gzip`` y ``--brotli`` generan
+además las variantes precomprimidas en la misma pasada). ``--jobs N``
+reparte la lectura y el parseo de los Markdown entre ``N`` procesos; las
+entradas se escriben siempre ordenadas por ruta, por lo que la salida es
+idéntica a la de una ejecución en serie.
 """
 
 import argparse
+import hashlib
+import itertools
 import json
+import logging
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Tuple, List
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import yaml
+from lunr import lunr
 
+import wiki_modular.config as config
 from wiki_modular import limpiar_slug
+from wiki_modular.core.analysis import builder_lunr
+from wiki_modular.core.autocompletado import construir_autocompletado
+from wiki_modular.core.correccion import construir_corrector
+from wiki_modular.core.facetas import construir_facetas
+from wiki_modular.core.jsonstream import Volcado, escribir_json
+from wiki_modular.core.postings import escribir_postings
+from wiki_modular.core.shards import actualizar_shards, escribir_shards
+
+MANIFEST_SUFFIX = ".manifest.json"
+# 2: encabezados con offsets ``pos`` y ``end``
+MANIFEST_VERSION = 2
+POSTINGS_SUFFIX = ".bm25"
+SUGGEST_SUFFIX = ".suggest.json"
+FACETS_SUFFIX = ".facets.json"
+SPELL_SUFFIX = ".spell.json"
+# Claves del manifest de las salidas que se construyen a partir del índice
+SALIDAS_DERIVADAS = ("lunr", "shards", "postings", "suggest", "facets", "spell")
+# Máximo de archivos por lote enviado a cada proceso con ``--jobs``
+CHUNK_MAX = 64
 
+# Campos indexados; deben coincidir con los de ``docs/buscar-avanzado.html``
+LUNR_FIELDS = ("content", "source_file", "conversion_date")
+LUNR_HEADER_FIELDS = ("header",)
 
-def extraer_frontmatter(path: Path) -> Tuple[Dict[str, str], str, List[Dict[str, object]]]:
+_HEADER_RE = re.compile(r"^(#{2,6})\s+(.*)$")
+
+
+def extraer_frontmatter(
+    path: Path, texto: Optional[str] = None
+) -> Tuple[Dict[str, str], str, List[Dict[str, object]]]:
     """Devuelve ``(metadata, cuerpo, encabezados)`` del Markdown."""
-    texto = path.read_text(encoding="utf-8")
+    if texto is None:
+        texto = path.read_text(encoding="utf-8")
     if texto.startswith("---"):
         partes = texto.split("---", 2)
         if len(partes) >= 3:
@@ -35,47 +120,604 @@ def extraer_frontmatter(path: Path) -> Tuple[Dict[str, str], str, List[Dict[str,
         meta = {}
         cuerpo = texto
 
+    # ``pos`` es el offset del encabezado y ``end`` el del final de su
+    # sección (siguiente encabezado de nivel igual o superior), ambos en
+    # unidades UTF-16 como los índices de cadena del navegador.
     encabezados: List[Dict[str, object]] = []
-    pat = re.compile(r"^(#{2,6})\s+(.*)$")
-    for line in cuerpo.splitlines():
-        m = pat.match(line.strip())
+    abiertos: List[Dict[str, object]] = []
+    offset = 0
+    for line in cuerpo.splitlines(keepends=True):
+        m = _HEADER_RE.match(line.strip())
         if m:
             level = len(m.group(1))
             text = m.group(2).strip()
-            encabezados.append({
+            pos = offset + _unidades_utf16(line[: len(line) - len(line.lstrip())])
+            while abiertos and abiertos[-1]["level"] >= level:
+                abiertos.pop()["end"] = pos
+            encabezado = {
                 "level": level,
                 "text": text,
                 "slug": limpiar_slug(text),
-            })
+                "pos": pos,
+                "end": None,
+            }
+            encabezados.append(encabezado)
+            abiertos.append(encabezado)
+        offset += _unidades_utf16(line)
+    for encabezado in abiertos:
+        encabezado["end"] = offset
 
     return meta, cuerpo, encabezados
 
 
-def generar_indice(wiki_dir: Path) -> Dict[str, Dict[str, object]]:
+def _unidades_utf16(texto: str) -> int:
+    """Longitud de ``texto`` en unidades UTF-16 (``String.length`` en JS)."""
+    if texto.isascii():
+        return len(texto)
+    return len(texto.encode("utf-16-le")) // 2
+
+
+def entrada_indice(md: Path, texto: Optional[str] = None) -> Dict[str, object]:
+    """Entrada de ``search_index.json`` para el Markdown ``md``."""
+    meta, cuerpo, encabezados = extraer_frontmatter(md, texto)
+    return {
+        "metadata": meta,
+        "content": cuerpo,
+        "headers": encabezados,
+    }
+
+
+def _markdowns(wiki_dir: Path) -> List[Tuple[str, Path]]:
+    """``(clave, ruta)`` de los Markdown de ``wiki_dir`` ordenados por clave."""
+    return sorted((str(md.relative_to(wiki_dir)), md) for md in wiki_dir.rglob("*.md"))
+
+
+def _analizar(
+    md: Path, sha_previo: Optional[str] = None
+) -> Tuple[str, Optional[Dict[str, object]]]:
+    """Hash de ``md`` y su entrada (``None`` si el hash es ``sha_previo``).
+
+    Es la unidad de trabajo que se reparte entre procesos con ``--jobs``.
+    """
+    data = md.read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    if sha == sha_previo:
+        return sha, None
+    return sha, entrada_indice(md, data.decode("utf-8"))
+
+
+def _mapear(
+    fn: Callable[..., Any], tareas: List[Tuple[Any, ...]], jobs: int
+) -> Iterator[Any]:
+    """``fn(*tarea)`` para cada tarea, en orden, con hasta ``jobs`` procesos.
+
+    Las tareas se envían a los procesos en lotes para amortizar el coste de
+    serializarlas; con ``jobs <= 1`` se ejecutan en este proceso.
+    """
+    if jobs <= 1 or len(tareas) < 2:
+        yield from itertools.starmap(fn, tareas)
+        return
+    lote = max(1, min(CHUNK_MAX, len(tareas) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(fn, *zip(*tareas), chunksize=lote)
+
+
+def iter_indice(
+    wiki_dir: Path, jobs: int = 1
+) -> Iterator[Tuple[str, Dict[str, object]]]:
+    """Genera ``(ruta, entrada)`` ordenado por ruta a medida que se parsea.
+
+    Con ``jobs > 1`` el parseo se reparte entre procesos; el resultado es el
+    mismo que en serie.
+    """
+    markdowns = _markdowns(wiki_dir)
+    analisis = _mapear(_analizar, [(md,) for _, md in markdowns], jobs)
+    for (clave, _), (_, entrada) in zip(markdowns, analisis):
+        yield clave, entrada
+
+
+def generar_indice(wiki_dir: Path, jobs: int = 1) -> Dict[str, Dict[str, object]]:
     """Genera el diccionario para ``search_index.json`` desde ``wiki_dir``."""
-    indice: Dict[str, Dict[str, object]] = {}
-    for md in wiki_dir.rglob("*.md"):
-        meta, cuerpo, encabezados = extraer_frontmatter(md)
-        indice[str(md.relative_to(wiki_dir))] = {
-            "metadata": meta,
-            "content": cuerpo,
-            "headers": encabezados,
-        }
-    return indice
+    return dict(iter_indice(wiki_dir, jobs))
+
+
+def documentos_lunr(
+    indice: Dict[str, Dict[str, object]]
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    """Documentos y encabezados tal como los indexa ``buscar-avanzado.html``."""
+    docs: List[Dict[str, object]] = []
+    headers: List[Dict[str, object]] = []
+    for doc_id, info in indice.items():
+        meta = info.get("metadata") or {}
+        contenido = str(info.get("content") or "")
+        docs.append(
+            {
+                "id": doc_id,
+                "content": contenido,
+                "source_file": str(meta.get("source_file") or ""),
+                "conversion_date": str(meta.get("conversion_date") or ""),
+            }
+        )
+        for h in info.get("headers") or []:
+            headers.append(
+                {
+                    "ref": f"{doc_id}#{h['slug']}",
+                    "header": h["text"],
+                    "level": h["level"],
+                    "slug": h["slug"],
+                    "doc": doc_id,
+                    "pos": h["pos"],
+                    "end": h["end"],
+                }
+            )
+    return docs, headers
+
+
+def construir_lunr(indice: Dict[str, Dict[str, object]]) -> Dict[str, object]:
+    """Índices lunr serializados y documentos para ``search_index.lunr.json``."""
+    docs, headers = documentos_lunr(indice)
+    idx = lunr(ref="id", fields=LUNR_FIELDS, documents=docs, builder=builder_lunr())
+    header_idx = lunr(
+        ref="ref", fields=LUNR_HEADER_FIELDS, documents=headers, builder=builder_lunr()
+    )
+    return {
+        "index": idx.serialize(),
+        "headerIndex": header_idx.serialize(),
+        "docs": docs,
+        "headers": headers,
+    }
+
+
+def ruta_manifest(output: Path) -> Path:
+    """Manifest auxiliar de ``output`` (``search_index.manifest.json``)."""
+    return output.with_suffix(MANIFEST_SUFFIX)
+
+
+def _leer_manifest(output: Path) -> Dict[str, Any]:
+    """Manifest auxiliar de ``output`` (vacío si no existe o no es válido)."""
+    try:
+        manifest = json.loads(ruta_manifest(output).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _cargar_estado(output: Path) -> Tuple[Volcado, Dict[str, Any]]:
+    """Índice y manifest de la compilación anterior (vacíos si no existen).
+
+    El índice se lee por bloques a un :class:`Volcado` junto a ``output``,
+    de modo que no se carga entero en memoria; hay que cerrarlo al terminar.
+    """
+    manifest = _leer_manifest(output)
+    if manifest.get("version") == MANIFEST_VERSION:
+        try:
+            return Volcado.desde_json(output, dir=output.parent), manifest
+        except (OSError, ValueError):
+            pass
+    return Volcado(dir=output.parent), {}
+
+
+def _sha_previo(
+    clave: str, indice: Mapping[str, Any], archivos: Dict[str, Dict[str, Any]]
+) -> Optional[str]:
+    """Hash registrado de ``clave`` si su entrada puede reutilizarse."""
+    previo = archivos.get(clave)
+    return previo["sha256"] if previo is not None and clave in indice else None
+
+
+def _vigente(
+    clave: str,
+    st: os.stat_result,
+    indice: Mapping[str, Any],
+    archivos: Dict[str, Dict[str, Any]],
+) -> bool:
+    """Indica si ``mtime`` y tamaño coinciden y no hace falta leer el archivo."""
+    previo = archivos.get(clave)
+    return (
+        previo is not None
+        and clave in indice
+        and previo["mtime_ns"] == st.st_mtime_ns
+        and previo["size"] == st.st_size
+    )
+
+
+def _firma(st: os.stat_result, sha: str) -> Dict[str, Any]:
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": sha}
+
+
+def _sincronizar(
+    md: Path,
+    clave: str,
+    indice: MutableMapping[str, Any],
+    archivos: Dict[str, Dict[str, Any]],
+) -> bool:
+    """Actualiza la entrada de ``md`` si cambió; devuelve si hubo cambios.
+
+    Si ``mtime`` y tamaño coinciden no se lee el archivo; si solo cambia el
+    ``mtime`` se compara el hash antes de volver a parsear.
+    """
+    st = md.stat()
+    if _vigente(clave, st, indice, archivos):
+        return False
+    sha, entrada = _analizar(md, _sha_previo(clave, indice, archivos))
+    archivos[clave] = _firma(st, sha)
+    if entrada is None:
+        return False
+    indice[clave] = entrada
+    return True
+
+
+def iter_indice_incremental(
+    wiki_dir: Path,
+    previo: Mapping[str, Any],
+    archivos: Dict[str, Dict[str, Any]],
+    cambiadas: List[str],
+    jobs: int = 1,
+) -> Iterator[Tuple[str, Dict[str, object]]]:
+    """Como :func:`iter_indice` reutilizando las entradas de ``previo``.
+
+    Solo se parsean los archivos nuevos o modificados según ``archivos``
+    (que se actualiza), repartidos entre ``jobs`` procesos. Al agotarse,
+    ``cambiadas`` contiene las rutas nuevas, modificadas y eliminadas.
+    """
+    markdowns = [(clave, md, md.stat()) for clave, md in _markdowns(wiki_dir)]
+    pendientes = [
+        (md, _sha_previo(clave, previo, archivos))
+        for clave, md, st in markdowns
+        if not _vigente(clave, st, previo, archivos)
+    ]
+    analisis = _mapear(_analizar, pendientes, jobs)
+    vistas = set()
+    for clave, md, st in markdowns:
+        vistas.add(clave)
+        if not _vigente(clave, st, previo, archivos):
+            sha, entrada = next(analisis)
+            archivos[clave] = _firma(st, sha)
+            if entrada is not None:
+                cambiadas.append(clave)
+                yield clave, entrada
+                continue
+        yield clave, previo[clave]
+    cambiadas.extend(sorted(set(previo) - vistas))
+    for clave in set(archivos) - vistas:
+        archivos.pop(clave)
+
+
+def generar_indice_incremental(
+    wiki_dir: Path, output: Path, jobs: int = 1
+) -> Tuple[Dict[str, Dict[str, object]], Dict[str, Any], List[str]]:
+    """Como :func:`generar_indice` pero reutilizando la compilación anterior.
+
+    Devuelve ``(indice, manifest, cambiadas)``; solo se parsean los archivos
+    nuevos o modificados y se eliminan los que ya no existen.
+    """
+    previo, manifest = _cargar_estado(output)
+    archivos: Dict[str, Dict[str, Any]] = manifest.get("archivos", {})
+    cambiadas: List[str] = []
+    with previo:
+        indice = dict(
+            iter_indice_incremental(wiki_dir, previo, archivos, cambiadas, jobs)
+        )
+    manifest = {**manifest, "version": MANIFEST_VERSION, "archivos": archivos}
+    return indice, manifest, cambiadas
+
+
+def salidas_pendientes(output: Path) -> Set[str]:
+    """Salidas derivadas de ``output`` desfasadas por :func:`update_index`.
+
+    Son las claves de :data:`SALIDAS_DERIVADAS` cuyo archivo no refleja aún
+    los últimos cambios de ``output``; quien las lea debe recurrir al JSON.
+    """
+    pendientes = _leer_manifest(output).get("pendientes")
+    return set(pendientes) if isinstance(pendientes, list) else set()
+
+
+def _retirar_salidas(anterior: Mapping[str, Any], manifest: Mapping[str, Any]) -> None:
+    """Borra las salidas derivadas de ``anterior`` que ``manifest`` ya no genera.
+
+    Así el navegador no sigue sirviendo, por ejemplo, un
+    ``search_index.lunr.json`` desfasado cuando se deja de generar.
+    """
+    for clave in SALIDAS_DERIVADAS:
+        previo = anterior.get(clave)
+        if clave == "shards" or not previo or previo == manifest.get(clave):
+            continue
+        for sufijo in ("", ".gz", ".br"):
+            Path(str(previo) + sufijo).unlink(missing_ok=True)
+
+
+def escribir_salidas(
+    data: Union[Mapping[str, Dict[str, object]], Iterable[Tuple[str, Any]]],
+    output: Path,
+    manifest: Dict[str, Any],
+    *,
+    derivadas: bool = True,
+    al_dia: Iterable[str] = (),
+) -> None:
+    """Escribe ``output``, las salidas derivadas y el manifest auxiliar.
+
+    ``data`` puede ser un diccionario (se escribe ordenado por clave) o un
+    iterable de ``(ruta, entrada)``. Las entradas se escriben en streaming
+    sin acumularlas y, si hay salidas derivadas, se vuelcan a la vez a un
+    :class:`~wiki_modular.core.jsonstream.Volcado` junto a ``output`` que los
+    constructores recorren desde disco. ``manifest`` indica dónde escribir el
+    índice lunr serializado (``lunr``), el fragmentado (``shards``) y el
+    binario para :class:`~wiki_modular.core.postings.MmapBM25Index`
+    (``postings``), el autocompletado (``suggest``), las facetas
+    (``facets``), el corrector (``spell``) y el formato de salida
+    (``compact``, ``gzip``, ``brotli``).
+
+    Con ``derivadas=False`` solo se escribe ``output`` y las salidas
+    derivadas configuradas se anotan en ``manifest["pendientes"]`` (véase
+    :func:`salidas_pendientes`) hasta la siguiente compilación completa,
+    salvo las de ``al_dia``, que el llamador ya ha actualizado.
+    """
+    formato = {k: bool(manifest.get(k)) for k in ("compact", "gzip", "brotli")}
+    items: Iterable[Tuple[str, Any]] = data
+    if isinstance(data, Mapping):
+        # Mismo orden que una compilación completa aunque se hayan añadido claves
+        items = ((clave, data[clave]) for clave in sorted(data))
+    if not derivadas:
+        pendientes = {k for k in SALIDAS_DERIVADAS if manifest.get(k)}
+        pendientes |= set(manifest.get("pendientes") or [])
+        pendientes -= set(al_dia)
+        manifest["pendientes"] = sorted(pendientes)
+        escribir_json(items, output, **formato)
+    elif any(manifest.get(k) for k in SALIDAS_DERIVADAS):
+        manifest.pop("pendientes", None)
+        with Volcado(dir=output.parent) as volcado:
+            escribir_json(volcado.volcar(items), output, **formato)
+            _escribir_derivadas(volcado, manifest, formato)
+    else:
+        manifest.pop("pendientes", None)
+        escribir_json(items, output, **formato)
+    ruta_manifest(output).write_text(
+        json.dumps(manifest, ensure_ascii=False, sort_keys=True), encoding="utf-8"
+    )
+
+
+def _escribir_derivadas(
+    data: Mapping[str, Any], manifest: Dict[str, Any], formato: Dict[str, bool]
+) -> None:
+    """Construye y escribe las salidas derivadas de ``data`` que pide ``manifest``."""
+    if manifest.get("lunr"):
+        escribir_json(
+            construir_lunr(data).items(),
+            Path(manifest["lunr"]),
+            **{**formato, "compact": True},
+        )
+    if manifest.get("shards"):
+        escribir_shards(data, Path(manifest["shards"]))
+    if manifest.get("postings"):
+        escribir_postings(data, Path(manifest["postings"]))
+    if manifest.get("suggest"):
+        escribir_json(
+            construir_autocompletado(data).items(),
+            Path(manifest["suggest"]),
+            **{**formato, "compact": True},
+        )
+    if manifest.get("facets"):
+        escribir_json(
+            construir_facetas(data).items(),
+            Path(manifest["facets"]),
+            **{**formato, "compact": True},
+        )
+    if manifest.get("spell"):
+        escribir_json(
+            construir_corrector(data).items(),
+            Path(manifest["spell"]),
+            **{**formato, "compact": True},
+        )
+
+
+def update_index(
+    paths: Iterable[Path],
+    *,
+    wiki_dir: Optional[Path] = None,
+    output: Optional[Path] = None,
+) -> List[str]:
+    """Actualiza el índice solo para ``paths`` (archivos añadidos, editados o borrados).
+
+    Reutiliza la compilación anterior y su manifest auxiliar; si no existen
+    se genera el índice completo. Las rutas fuera de ``wiki_dir`` se ignoran.
+    Por defecto se usan ``config.WIKI_DIR`` y ``config.SEARCH_INDEX``.
+    Devuelve las claves cuya entrada cambió.
+
+    Solo se analizan las páginas de ``paths``, pero ``output`` es un único
+    objeto JSON y se reescribe entero en streaming, con memoria acotada (unos
+    1,3 s con 5.000 páginas y 79 MB). El índice fragmentado (``shards``) se
+    actualiza en su sitio: solo se reescriben los fragmentos de las
+    secciones afectadas y sus entradas del manifest (ver
+    :func:`~wiki_modular.core.shards.actualizar_shards`). Reconstruir las
+    demás salidas derivadas (BM25 binario, lunr, facetas...) cuesta lo
+    mismo que una compilación completa, así que quedan como pendientes
+    (:func:`salidas_pendientes`) hasta la próxima ejecución del script.
+    """
+    wiki_dir = wiki_dir or config.WIKI_DIR
+    output = output or config.SEARCH_INDEX
+    claves = []
+    raiz = wiki_dir.resolve()
+    for path in paths:
+        try:
+            claves.append((path, str(path.resolve().relative_to(raiz))))
+        except ValueError:
+            logging.warning("%s no pertenece a %s; se omite", path, wiki_dir)
+    if not claves:
+        return []
+
+    indice, manifest = _cargar_estado(output)
+    cambiadas: List[str] = []
+    with indice:
+        if not manifest:
+            archivos: Dict[str, Dict[str, Any]] = {}
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "archivos": archivos,
+                "postings": str(output.with_suffix(POSTINGS_SUFFIX)),
+                "suggest": str(output.with_suffix(SUGGEST_SUFFIX)),
+                "facets": str(output.with_suffix(FACETS_SUFFIX)),
+            }
+            entradas = iter_indice_incremental(wiki_dir, indice, archivos, cambiadas)
+            escribir_salidas(entradas, output, manifest, derivadas=False)
+
+        else:
+            archivos = manifest.setdefault("archivos", {})
+            for path, clave in claves:
+                if path.exists():
+                    if _sincronizar(path, clave, indice, archivos):
+                        cambiadas.append(clave)
+                elif clave in indice:
+                    del indice[clave]
+                    archivos.pop(clave, None)
+                    cambiadas.append(clave)
+            if not cambiadas:
+                return cambiadas
+            al_dia = []
+            shards = manifest.get("shards")
+            if shards and "shards" not in (manifest.get("pendientes") or []):
+                if actualizar_shards(indice, Path(shards), cambiadas) is not None:
+                    al_dia.append("shards")
+            escribir_salidas(indice, output, manifest, derivadas=False, al_dia=al_dia)
+    if manifest["pendientes"]:
+        logging.info(
+            "%s actualizado; %s se regenerarán con generar_indice_busqueda.py",
+            output,
+            ", ".join(manifest["pendientes"]),
+        )
+    return cambiadas
 
 
 def main() -> None:
     """CLI para crear ``search_index.json`` desde los Markdown de la wiki."""
     parser = argparse.ArgumentParser(description="Genera search_index.json")
-    parser.add_argument("--wiki", default="wiki", help="Directorio raíz de la wiki")
-    parser.add_argument("--output", default="search_index.json", help="Archivo JSON de salida")
+    parser.add_argument(
+        "--wiki", default=str(config.WIKI_DIR), help="Directorio raíz de la wiki"
+    )
+    parser.add_argument(
+        "--output",
+        default=str(config.SEARCH_INDEX),
+        help="Archivo JSON de salida (por defecto dentro de la wiki)",
+    )
+    parser.add_argument(
+        "--lunr-output",
+        help="Índice lunr serializado (por defecto <output>.lunr.json)",
+    )
+    parser.add_argument(
+        "--lunr",
+        action="store_true",
+        help="Generar también el índice lunr serializado (lento y grande; ver README)",
+    )
+    parser.add_argument(
+        "--postings-output",
+        help="Índice BM25 binario para mmap (por defecto <output>.bm25)",
+    )
+    parser.add_argument(
+        "--no-postings", action="store_true", help="No generar el índice BM25 binario"
+    )
+    parser.add_argument(
+        "--suggest-output",
+        help="Autocompletado de títulos y encabezados (por defecto <output>.suggest.json)",
+    )
+    parser.add_argument(
+        "--no-suggest", action="store_true", help="No generar el autocompletado"
+    )
+    parser.add_argument(
+        "--facets-output",
+        help="Mapas de bits de los metadatos (por defecto <output>.facets.json)",
+    )
+    parser.add_argument(
+        "--no-facets", action="store_true", help="No generar las facetas"
+    )
+    parser.add_argument(
+        "--spell-output",
+        help="Diccionario del corrector ortográfico (por defecto <output>.spell.json)",
+    )
+    parser.add_argument(
+        "--spell",
+        action="store_true",
+        help="Generar también el corrector ortográfico (lento en wikis grandes)",
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="JSON sin sangrías ni espacios"
+    )
+    parser.add_argument(
+        "--gzip", action="store_true", help="Escribir también variantes .gz"
+    )
+    parser.add_argument(
+        "--brotli",
+        action="store_true",
+        help="Escribir también variantes .br (requiere el paquete brotli)",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignorar el manifest auxiliar y volver a parsear todos los archivos",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Procesos para parsear los Markdown (por defecto 1, en serie)",
+    )
+    parser.add_argument(
+        "--shards",
+        metavar="DIR",
+        help="Escribir el índice fragmentado por sección y su manifest en DIR",
+    )
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
     wiki_dir = Path(args.wiki)
-    data = generar_indice(wiki_dir)
-    Path(args.output).write_text(
-        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    output = Path(args.output)
+    anterior = _leer_manifest(output)
+    if args.full:
+        previo, manifest = Volcado(dir=output.parent), {}
+    else:
+        previo, manifest = _cargar_estado(output)
+    archivos: Dict[str, Dict[str, Any]] = manifest.get("archivos", {})
+    cambiadas: List[str] = []
+    manifest = {
+        **manifest,
+        "version": MANIFEST_VERSION,
+        "archivos": archivos,
+        "lunr": (
+            str(args.lunr_output or output.with_suffix(".lunr.json"))
+            if args.lunr
+            else None
+        ),
+        "shards": args.shards,
+        "postings": (
+            None
+            if args.no_postings
+            else str(args.postings_output or output.with_suffix(POSTINGS_SUFFIX))
+        ),
+        "suggest": (
+            None
+            if args.no_suggest
+            else str(args.suggest_output or output.with_suffix(SUGGEST_SUFFIX))
+        ),
+        "facets": (
+            None
+            if args.no_facets
+            else str(args.facets_output or output.with_suffix(FACETS_SUFFIX))
+        ),
+        "spell": (
+            str(args.spell_output or output.with_suffix(SPELL_SUFFIX))
+            if args.spell
+            else None
+        ),
+        "compact": args.compact,
+        "gzip": args.gzip,
+        "brotli": args.brotli,
+    }
+    with previo:
+        entradas = iter_indice_incremental(
+            wiki_dir, previo, archivos, cambiadas, args.jobs
+        )
+        escribir_salidas(entradas, output, manifest)
+    _retirar_salidas(anterior, manifest)
+    logging.info("%s: %s entradas, %s cambiadas", output, len(archivos), len(cambiadas))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Genera ``related.json`` con las páginas relacionadas de cada página.
+
+Lee ``search_index.json`` (generado por ``generar_indice_busqueda.py``),
+vectoriza título y contenido con TF-IDF y guarda para cada página las
+``-k`` más parecidas por similitud coseno, que ``docs/related.js`` muestra
+al pie de cada página de Docsify.
+
+Junto a la salida se guarda ``related.state.npz`` con el ``idf``, el hash y
+el vector TF-IDF de cada página; en la siguiente ejecución solo se analizan y
+recalculan las filas de las páginas nuevas o modificadas (``--full`` fuerza
+el cálculo completo).
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import wiki_modular.config as config
+from wiki_modular.core.jsonstream import escribir_json
+from wiki_modular.core.relacionadas import (
+    MIN_SIMILITUD,
+    TOP_K,
+    calcular_relacionadas,
+    cargar_estado,
+    guardar_estado,
+)
+
+STATE_SUFFIX = ".state.npz"
+
+
+def ruta_estado(output: Path) -> Path:
+    """Ruta del estado incremental asociado a ``output``."""
+    return output.with_suffix(STATE_SUFFIX)
+
+
+def _cargar_estado(
+    output: Path,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """``related.json`` y estado de la ejecución anterior (``None`` si faltan)."""
+    try:
+        previo = json.loads(output.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, None
+    return previo, cargar_estado(ruta_estado(output))
+
+
+def generar_relacionadas(
+    index_path: Path,
+    output: Path,
+    *,
+    k: int = TOP_K,
+    min_similitud: float = MIN_SIMILITUD,
+    full: bool = False,
+) -> int:
+    """Escribe ``output`` y su estado; devuelve cuántas filas se recalcularon."""
+    paginas = json.loads(index_path.read_text(encoding="utf-8"))
+    previo, estado = (None, None) if full else _cargar_estado(output)
+    relacionadas, estado, recalculadas = calcular_relacionadas(
+        paginas,
+        k=k,
+        min_similitud=min_similitud,
+        previo=previo,
+        estado=estado,
+    )
+    escribir_json(relacionadas.items(), output, compact=True)
+    guardar_estado(estado, ruta_estado(output))
+    return len(recalculadas)
+
+
+def main() -> None:
+    """CLI para crear ``related.json`` desde ``search_index.json``."""
+    parser = argparse.ArgumentParser(description="Genera related.json")
+    parser.add_argument(
+        "--index",
+        default=str(config.SEARCH_INDEX),
+        help="Índice generado por generar_indice_busqueda.py",
+    )
+    parser.add_argument(
+        "--output",
+        help="Archivo JSON de salida (por defecto related.json junto al índice)",
+    )
+    parser.add_argument(
+        "-k",
+        type=int,
+        default=TOP_K,
+        help=f"Páginas relacionadas por página (por defecto {TOP_K})",
+    )
+    parser.add_argument(
+        "--min-similitud",
+        type=float,
+        default=MIN_SIMILITUD,
+        help=f"Similitud coseno mínima (por defecto {MIN_SIMILITUD})",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignorar el estado anterior y recalcular todo",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+
+    index_path = Path(args.index)
+    if not index_path.exists():
+        logging.error("No existe el índice %s", index_path)
+        sys.exit(1)
+    output = Path(args.output) if args.output else index_path.with_name("related.json")
+    recalculadas = generar_relacionadas(
+        index_path, output, k=args.k, min_similitud=args.min_similitud, full=args.full
+    )
+    logging.info("%s: %s páginas recalculadas", output, recalculadas)
+
+
+if __name__ == "__main__":
+    main()
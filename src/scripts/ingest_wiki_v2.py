@@ -10,11 +10,40 @@ realiza *fuzzy matching* controlado con ``--cutoff``.
 El parámetro ``--cutoff`` (por defecto ``0.5``) indica la similitud mínima (0-1)
 necesaria para considerar que un encabezado coincide con una entrada del índice.
 Si no se alcanza, el bloque se envía a ``wiki/99_Nuevas_Secciones``.
+
+Con ``--cutoff-sweep 0.3:0.9:0.05`` no se escribe nada: cada bloque se puntúa
+una sola vez contra el índice y se informa, para cada cutoff del rango, de
+cuántos bloques van a cada carpeta, cuáles cambian de destino y cuántos
+acaban en ``99_Nuevas_Secciones``.
+
+El Markdown completo se mapea en memoria y solo se guarda un índice de
+offsets de línea; cada bloque se decodifica y escribe de uno en uno, de modo
+que la memoria no crece con el tamaño del documento.
+
+La ingesta se divide en dos fases. Primero se planifica: cada bloque se
+compara por hash con el archivo existente y se clasifica como nuevo,
+actualizado o sin cambios. Después solo se escriben los archivos que cambian,
+en paralelo (``--jobs``). ``--plan`` o ``--plan-json`` muestran el plan sin
+tocar el disco. Los archivos que una fuente generó en una ingesta anterior y
+ya no produce aparecen como borrados y solo se eliminan con ``--prune``. El
+manifest (``--manifest``) guarda esas rutas relativas a la raíz de la wiki,
+así que una ingesta con ``wiki_cli.py full --staging`` poda igual que una
+directa, y nunca se borra nada fuera de esa raíz.
+
+Los títulos sin coincidencia se acumulan en memoria y se añaden una sola vez
+al final a ``--suggestions``, junto con los tres destinos más parecidos del
+índice y su similitud.
+
+Los destinos resueltos se guardan en ``_fuentes/routing_cache.json`` (ver
+``--cache``). La caché se invalida al cambiar el índice, el archivo de alias o
+el cutoff, de modo que al reingerir un manual solo se resuelven los títulos
+nuevos o modificados.
 """
 
 import sys
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
 
 from wiki_modular.config import WIKI_DIR
 import yaml
@@ -26,15 +55,65 @@ import argparse
 import logging
 
 from wiki_modular import limpiar_slug, load_yaml
+from wiki_modular.core.alias import AliasMatcher, cargar_alias
 from wiki_modular.core.ingest import (
-    append_suggestion,
-    buscar_destino,
+    DestinationResolver,
+    RoutingCache,
+    SuggestionQueue,
+    huella_routing,
     limpiar_nombre_archivo,
 )
+from wiki_modular.core.plan import (
+    CREATE,
+    DELETE,
+    UNCHANGED,
+    UPDATE,
+    IngestPlan,
+    aplicar,
+    cargar_manifest,
+    guardar_manifest,
+    relativas_manifest,
+    rutas_manifest,
+)
+from wiki_modular.core.splitter import MappedMarkdown, iter_bloques
+from wiki_modular.core.sweep import barrido_cutoff, formatear_barrido, parse_sweep
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
 
+def metadatos_base(docx: str) -> dict:
+    """Campos de frontmatter comunes a todos los bloques de ``docx``."""
+    source_name = Path(docx).name if docx else ""
+    source_date = ""
+    if docx and Path(docx).exists():
+        ts = Path(docx).stat().st_mtime
+        source_date = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+    return {
+        "source_file": source_name,
+        "source_file_date": source_date,
+        "conversion_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+def render_bloque(
+    fuente: MappedMarkdown, origen: tuple, frontmatter_base: Optional[dict] = None
+) -> str:
+    """Construye el Markdown final de un bloque a partir de su rango."""
+    titulo, nivel, rango = origen
+    header_line = f"{'#' * nivel} {titulo}".strip()
+    contenido = fuente.read(rango)
+    if contenido.split("\n", 1)[0].strip() == header_line:
+        md_texto = contenido
+    else:
+        md_texto = header_line + "\n\n" + contenido
+
+    if frontmatter_base is None:
+        return md_texto
+    frontmatter = {**frontmatter_base, "titulo": titulo, "nivel": nivel}
+    fm_text = "---\n" + yaml.safe_dump(frontmatter, allow_unicode=True) + "---\n\n"
+    return fm_text + md_texto
+
+
 def main():
     """CLI que fragmenta ``tmp_full.md`` aplicando el mapa e índice."""
     parser = argparse.ArgumentParser(
@@ -62,11 +141,48 @@ def main():
     parser.add_argument(
         "--cutoff", type=float, default=0.5, help="Umbral fuzzy matching"
     )
+    parser.add_argument(
+        "--cache",
+        default="_fuentes/routing_cache.json",
+        help="Caché JSON de rutas resueltas entre ingestas",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="No leer ni escribir la caché de rutas"
+    )
+    parser.add_argument(
+        "--cutoff-sweep",
+        metavar="INICIO:FIN:PASO",
+        help="Analiza el enrutado para cada cutoff del rango sin escribir archivos",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Mostrar los cambios previstos sin tocar el disco",
+    )
+    parser.add_argument(
+        "--plan-json",
+        metavar="ARCHIVO",
+        help="Volcar el plan en JSON ('-' para stdout) sin aplicar cambios",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=4, help="Hilos para escribir los archivos"
+    )
+    parser.add_argument(
+        "--manifest",
+        default="_fuentes/ingest_manifest.json",
+        help="Registro de archivos generados por cada fuente",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Eliminar los archivos que la fuente generó antes y ya no produce",
+    )
     parser.add_argument("--docx", default="", help="Ruta al archivo .docx original")
     parser.add_argument(
         "--metadata", action="store_true", help="Incluir frontmatter con metadatos"
     )
     args = parser.parse_args()
+    solo_plan = args.plan or bool(args.plan_json)
 
     wiki_path = WIKI_DIR
     mapa_file = Path(args.mapa)
@@ -75,95 +191,110 @@ def main():
     override_file = Path(args.alias)
     suggest_file = Path(args.suggestions)
 
-    # 1) Cargar alias_override (si existe)
-    alias_map = {}
-    if override_file.exists():
-        try:
-            raw_override = override_file.read_text(encoding="utf-8")
-            safe_override = raw_override.replace(r"\>", r"\\>")
-            alias_map = yaml.safe_load(safe_override) or {}
-        except yaml.YAMLError as e:
-            logging.error(f"Error parseando alias_override.yaml: {e}")
+    # 1) Cargar alias_override (si existe) y compilar sus patrones
+    alias_map = AliasMatcher(cargar_alias(override_file))
 
-    # 2) Cargar mapa, índice y líneas de markdown
+    # 2) Cargar mapa e índice y mapear el markdown en memoria
     try:
         mapa = load_yaml(mapa_file)
         index_data = load_yaml(index_file)
-        tmp_lines = tmp_file.read_text(encoding="utf-8").splitlines()
+        fuente = MappedMarkdown(tmp_file)
     except Exception as e:
         logging.critical(f"Error al cargar archivos: {e}")
         sys.exit(1)
 
     assert isinstance(mapa, list), "mapa_encabezados.yaml debe ser una lista"
-    bloques = []
-
-    # 3) Fragmentar en bloques según start_line/end_line
-    for i, sec in enumerate(mapa):
-        start = sec.get("start_line", 0) - 1
-        end = (
-            (mapa[i + 1].get("start_line", len(tmp_lines) + 1) - 1)
-            if (i + 1) < len(mapa)
-            else len(tmp_lines)
-        )
-        titulo = sec.get("titulo") or sec.get("title")
-        nivel = sec.get("h_level", 1)
-
-        if not titulo:
-            logging.warning(f"Bloque sin 'titulo': {sec}")
-            continue
-        if start < 0 or end > len(tmp_lines):
-            logging.warning(f"Rango inválido ({start}, {end}) en '{titulo}'")
-            continue
-
-        bloques.append((titulo, nivel, tmp_lines[start:end]))
-
-    # 4) Escribir cada bloque en su ruta destino (o 99_Nuevas_Secciones si no hay match)
+
+    # 3) Fragmentar en bloques según start_line/end_line (rangos de bytes)
+    bloques = iter_bloques(mapa, fuente)
+
+    if args.cutoff_sweep:
+        # Modo análisis: una sola pasada de puntuación y ninguna escritura
+        try:
+            cutoffs = parse_sweep(args.cutoff_sweep)
+        except ValueError as e:
+            parser.error(str(e))
+        resolver = DestinationResolver(index_data, alias_map, fuzzy_cutoff=args.cutoff)
+        reporte = barrido_cutoff([b[0] for b in bloques], resolver, cutoffs)
+        fuente.close()
+        print("\n".join(formatear_barrido(reporte)))
+        return
+
+    # 4) Planificar: resolver destino de cada bloque y compararlo con el disco
+    cache = None
+    if not args.no_cache:
+        huella = huella_routing(index_file, override_file, cutoff=args.cutoff)
+        cache = RoutingCache(Path(args.cache), huella)
+    resolver = DestinationResolver(
+        index_data, alias_map, fuzzy_cutoff=args.cutoff, cache=cache, wiki_dir=wiki_path
+    )
+
+    frontmatter_base = metadatos_base(args.docx) if args.metadata else None
+
+    def render(origen) -> str:
+        return render_bloque(fuente, origen, frontmatter_base)
+
+    plan = IngestPlan()
+    cola = SuggestionQueue(suggest_file, wiki_dir=wiki_path)
     no_match_count = 0
-    for titulo, nivel, contenido in bloques:
-        destino = buscar_destino(
-            titulo, index_data, alias_map, fuzzy_cutoff=args.cutoff
-        )
+    total_bloques = 0
+    for titulo, nivel, rango in bloques:
+        total_bloques += 1
+        destino, candidatos = resolver.resolve_con_candidatos(titulo, n=3)
         if not destino:
             # Asignar a carpeta wildcard
             nombre_def = limpiar_nombre_archivo(titulo)
             destino = wiki_path / "99_Nuevas_Secciones" / f"{nombre_def}.md"
             no_match_count += 1
-            append_suggestion(suggest_file, titulo, limpiar_slug(titulo))
+            cola.add(
+                titulo,
+                limpiar_slug(titulo),
+                destino=destino,
+                candidatos=candidatos,
+            )
 
-        destino.parent.mkdir(parents=True, exist_ok=True)
+        origen = (titulo, nivel, rango)
+        plan.add(destino, render(origen), titulo=titulo, origen=origen)
 
-        header_line = f"{'#' * nivel} {titulo}".strip()
-        if contenido and contenido[0].strip() == header_line:
-            md_texto = "\n".join(contenido)
-        else:
-            md_texto = header_line + "\n\n" + "\n".join(contenido)
-
-        if args.metadata:
-            source_name = Path(args.docx).name if args.docx else ""
-            source_date = ""
-            if args.docx and Path(args.docx).exists():
-                ts = Path(args.docx).stat().st_mtime
-                source_date = datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
-            conversion_date = datetime.now().strftime("%Y-%m-%d")
-
-            frontmatter = {
-                "source_file": source_name,
-                "source_file_date": source_date,
-                "conversion_date": conversion_date,
-                "titulo": titulo,
-                "nivel": nivel,
-            }
-            fm_text = (
-                "---\n" + yaml.safe_dump(frontmatter, allow_unicode=True) + "---\n\n"
-            )
-            destino.write_text(fm_text + md_texto, encoding="utf-8")
+    manifest_file = Path(args.manifest)
+    manifest = cargar_manifest(manifest_file)
+    clave_fuente = Path(args.docx).name if args.docx else tmp_file.as_posix()
+    previas = rutas_manifest(manifest.get(clave_fuente, []), wiki_path)
+    plan.add_deletes(previas, wiki_path)
+
+    if solo_plan:
+        fuente.close()
+        if args.plan_json:
+            plan.dump_json(args.plan_json)
         else:
-            destino.write_text(md_texto, encoding="utf-8")
-        logging.info(f"[✓] {titulo} → {destino}")
+            print("\n".join(plan.lines()))
+        return
 
-    logging.info(
-        f"Resumen: {len(bloques)} bloques procesados | {no_match_count} sin coincidencia"
-    )
+    # 5) Aplicar: escribir solo lo nuevo o modificado
+    escritos = aplicar(plan, render, jobs=args.jobs, prune=args.prune)
+    fuente.close()
+    for accion in plan.acciones.values():
+        if accion.accion in (CREATE, UPDATE):
+            logging.info(f"[✓] {accion.titulo} → {accion.ruta}")
+    conservadas = [
+        p for p, a in plan.acciones.items() if a.accion != DELETE or not args.prune
+    ]
+    manifest[clave_fuente] = relativas_manifest(conservadas, wiki_path)
+    guardar_manifest(manifest_file, manifest)
+    sugeridos = cola.flush()
+
+    cambios = plan.resumen()
+    resumen = f"Resumen: {total_bloques} bloques procesados"
+    resumen += f" | {no_match_count} sin coincidencia ({sugeridos} nuevos en revisión)"
+    resumen += f" | alias: {resolver.estadisticas['alias']}"
+    resumen += f" | exactos: {resolver.estadisticas['exacto']}"
+    resumen += f" | fuzzy: {resolver.estadisticas['fuzzy']}"
+    resumen += f" | {cambios[CREATE]} nuevos, {cambios[UPDATE]} actualizados,"
+    resumen += f" {cambios[UNCHANGED]} sin cambios | {escritos} bytes escritos"
+    if cache is not None:
+        cache.save()
+        resumen += f" | caché: {cache.hits} aciertos, {cache.misses} fallos"
+    logging.info(resumen)
 
 
 if __name__ == "__main__":
@@ -7,7 +7,8 @@ from pathlib import Path
 from utils.entorno import ROOT_DIR, WIKI_DIR, add_src_to_path
 
 add_src_to_path()
-from wiki_modular import limpiar_slug, load_yaml
+from wiki_modular import load_yaml
+from wiki_modular.core.routing import RouteTable
 
 INDEX_FILE = ROOT_DIR / "index_PlataformaBBDD.yaml"
 SIDEBAR_FILE = WIKI_DIR / "_sidebar.md"
@@ -24,19 +25,13 @@ def is_under(path: Path, parent: Path) -> bool:
         return False
 
 
-def paths_from_index(index_data):
-    """Obtiene las rutas esperadas a partir del índice YAML."""
-    paths = set()
-    for section in index_data.get("secciones", []):
-        slug = section.get("slug", limpiar_slug(section.get("titulo", "")))
-        sec_id = section.get("id")
-        prefix = f"{sec_id}_" if sec_id is not None else ""
-        paths.add(f"{prefix}{slug}.md")
-        for sub in section.get("subtemas", []):
-            sub_slug = limpiar_slug(sub)
-            folder = "02_Instancias_SQL" if "sql" in sub_slug else slug
-            paths.add(f"{folder}/{sub_slug}.md")
-    return {p.lower() for p in paths}
+def paths_from_index(index_data, routes=None):
+    """Obtiene las rutas esperadas a partir del índice YAML.
+
+    ``routes`` permite reutilizar una :class:`RouteTable` ya compilada.
+    """
+    tabla = routes if routes is not None else RouteTable(index_data)
+    return {route.ruta.lower() for route in tabla.routes}
 
 
 def paths_from_sidebar(text: str):
@@ -20,8 +20,10 @@ from typing import Dict
 
 from pdfminer.high_level import extract_text
 
+import wiki_modular.config as config
 from utils.entorno import script_path
-from wiki_modular.config import ASSETS_DIR, ORIGINALES_DIR, WIKI_DIR
+from wiki_modular import staging as stg
+from wiki_modular.config import ORIGINALES_DIR
 
 ORIG_DIR = ORIGINALES_DIR
 LOG_FILE = Path('procesados.log')
@@ -35,7 +37,7 @@ PIPELINE = [
         "--from=docx",
         "--to=gfm",
         "--output=_fuentes/tmp_full.md",
-        f"--extract-media={ASSETS_DIR}",
+        f"--extract-media={config.ASSETS_DIR}",
         "--markdown-headings=atx",
         "--standalone",
         "--wrap=none",
@@ -151,7 +153,7 @@ def run_pipeline(doc: Path, *, skip_pandoc: bool = False) -> None:
         # auditoría no tiene sentido. Se omite el paso restante para evitar
         # detener el flujo por un error innecesario.
         if "generar_sidebar.py" in cmd[-1]:
-            sidebar = WIKI_DIR / "_sidebar.md"
+            sidebar = config.WIKI_DIR / "_sidebar.md"
             if sidebar.exists():
                 text = sidebar.read_text(encoding="utf-8")
                 if "](" not in text:
@@ -159,32 +161,13 @@ def run_pipeline(doc: Path, *, skip_pandoc: bool = False) -> None:
                     break
 
 
-def main() -> None:
-    """Procesa PDFs y DOCX nuevos aplicando toda la tubería."""
-    parser = argparse.ArgumentParser(
-        description="Procesa automáticamente nuevos .docx o .pdf"
-    )
-    parser.add_argument(
-        "--clean",
-        action="store_true",
-        help="Ejecutar resetear_entorno.py antes de procesar",
-    )
-    parser.add_argument(
-        "--ocr",
-        action="store_true",
-        help="Intentar OCR en PDFs sin texto",
-    )
-    args = parser.parse_args()
-
-    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
-
-    if args.clean:
-        logging.info("Limpiando entorno previo")
-        rc = subprocess.run([sys.executable, str(script_path("resetear_entorno.py"))]).returncode
-        if rc != 0:
-            raise RuntimeError("resetear_entorno.py fallo")
+def procesar_pendientes(*, ocr: bool = False) -> int:
+    """Aplica la tubería a los documentos aún no procesados.
 
+    Devuelve el número de documentos procesados.
+    """
     processed = load_log()
+    hechos = 0
 
     new_files: list[Path] = []
 
@@ -193,7 +176,7 @@ def main() -> None:
             logging.info("Ya procesado %s en %s", pdf.name, processed[pdf.name])
             continue
         logging.info("Procesando PDF %s", pdf.name)
-        md_path = convertir_pdf(pdf, ocr=args.ocr)
+        md_path = convertir_pdf(pdf, ocr=ocr)
         if not md_path:
             logging.info("Ignorando %s por errores", pdf.name)
             continue
@@ -204,6 +187,7 @@ def main() -> None:
             raise
         else:
             append_log(pdf.name)
+            hechos += 1
             logging.info("Procesado correctamente: %s", pdf.name)
 
     for doc in sorted(ORIG_DIR.glob("*.docx")):
@@ -214,7 +198,7 @@ def main() -> None:
 
     if not new_files:
         logging.info("No hay archivos DOCX nuevos en %s", ORIG_DIR)
-        return
+        return hechos
 
     for doc in new_files:
         logging.info("Procesando %s", doc.name)
@@ -225,7 +209,71 @@ def main() -> None:
             raise
         else:
             append_log(doc.name)
+            hechos += 1
             logging.info("Procesado correctamente: %s", doc.name)
+    return hechos
+
+
+def main() -> None:
+    """Procesa PDFs y DOCX nuevos aplicando toda la tubería."""
+    parser = argparse.ArgumentParser(
+        description="Procesa automáticamente nuevos .docx o .pdf"
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Ejecutar resetear_entorno.py antes de procesar",
+    )
+    parser.add_argument(
+        "--ocr",
+        action="store_true",
+        help="Intentar OCR en PDFs sin texto",
+    )
+    parser.add_argument(
+        "--staging",
+        action="store_true",
+        help="Construir en un directorio aparte y publicar al terminar",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
+
+    if args.clean:
+        logging.info("Limpiando entorno previo")
+        cmd = [sys.executable, str(script_path("resetear_entorno.py"))]
+        if args.staging:
+            cmd.append("--keep-wiki")
+        rc = subprocess.run(cmd).returncode
+        if rc != 0:
+            raise RuntimeError("resetear_entorno.py fallo")
+
+    if not args.staging:
+        procesar_pendientes(ocr=args.ocr)
+        return
+
+    # Con staging la wiki servida solo cambia, de golpe, si todo termina bien
+    publicada = config.WIKI_DIR
+    staging = stg.preparar_staging(publicada, limpio=args.clean)
+    stg.usar_staging(staging)
+    if not procesar_pendientes(ocr=args.ocr):
+        return
+    stg.reubicar_enlaces(staging, publicada)
+    indice = config.SEARCH_INDEX
+    pasos = [
+        [
+            sys.executable,
+            str(script_path("generar_indice_busqueda.py")),
+            "--wiki",
+            str(staging),
+            "--output",
+            str(indice),
+        ],
+        [sys.executable, str(script_path("generar_relacionadas.py")), "--index", str(indice)],
+    ]
+    for cmd in pasos:
+        if subprocess.run(cmd).returncode != 0:
+            raise RuntimeError(f"Paso fallido: {' '.join(cmd)}")
+    stg.publicar(staging, publicada)
 
 
 if __name__ == "__main__":
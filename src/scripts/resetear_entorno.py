@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """Limpia archivos generados para reiniciar la wiki desde cero."""
 
+import argparse
 import shutil
 from datetime import datetime
 from pathlib import Path
@@ -22,7 +23,11 @@ RUTAS = [
 
 def eliminar(path: Path) -> None:
     """Elimina un archivo o directorio si existe."""
-    if path.is_dir():
+    if path.is_symlink():
+        # ``wiki`` publicada con staging: se quita el enlace, no la versión
+        path.unlink()
+        print(f"[✓] Enlace eliminado: {path}")
+    elif path.is_dir():
         shutil.rmtree(path, ignore_errors=True)
         print(f"[✓] Carpeta eliminada: {path}")
     elif path.exists():
@@ -40,9 +45,13 @@ def eliminar(path: Path) -> None:
         print(f"[ ] No existe: {path}")
 
 
-def main() -> None:
+def main(keep_wiki: bool = False) -> None:
 
-    """Elimina artefactos generados para recomenzar desde cero."""
+    """Elimina artefactos generados para recomenzar desde cero.
+
+    Con ``keep_wiki`` no se toca la wiki publicada; se usa cuando la nueva
+    versión se construye en un directorio de staging.
+    """
     wiki_dir = Path("wiki")
 
     readme_backup = None
@@ -51,9 +60,11 @@ def main() -> None:
         readme_backup = readme_path.read_text(encoding="utf-8")
 
     for ruta in RUTAS:
+        if keep_wiki and ruta == WIKI_DIR:
+            continue
         eliminar(ruta)
 
-    if readme_backup is not None:
+    if readme_backup is not None and not keep_wiki:
         wiki_dir.mkdir(exist_ok=True)
         readme_path.write_text(readme_backup, encoding="utf-8")
         print(f"[✓] README restaurado: {readme_path}")
@@ -62,4 +73,10 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Limpia artefactos generados")
+    parser.add_argument(
+        "--keep-wiki",
+        action="store_true",
+        help="Conservar la wiki publicada (la construcción se hará en staging)",
+    )
+    main(keep_wiki=parser.parse_args().keep_wiki)
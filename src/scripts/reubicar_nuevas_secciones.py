@@ -1,19 +1,28 @@
 #!/usr/bin/env python
-"""Ubica archivos de ``99_Nuevas_Secciones`` en su destino definitivo."""
+"""Ubica archivos de ``99_Nuevas_Secciones`` en su destino definitivo.
+
+Las sugerencias para los archivos que no se pueden clasificar se toman de la
+cola de revisión que genera ``ingest_wiki_v2.py`` (``--suggestions``); solo
+se calculan con ``SequenceMatcher`` para los archivos que no figuran en ella.
+"""
+import argparse
 import shutil
 from difflib import SequenceMatcher
 from pathlib import Path
 
+from utils.entorno import add_src_to_path
+
+add_src_to_path()
+
+from wiki_modular.core.ingest import leer_sugerencias  # noqa: E402
+
 # Configuración
 root = Path(".")
 nuevas_dir = root / "wiki" / "99_Nuevas_Secciones"
 destino_base = root / "wiki"
 index_file = root / "index_PlataformaBBDD.yaml"
 
-# Cargar índice
-import yaml
-
-index_data = yaml.safe_load(index_file.read_text(encoding="utf-8"))
+import yaml  # noqa: E402
 
 
 # Normalizador básico
@@ -25,8 +34,29 @@ def normalizar(texto):
     return texto.encode("ascii", "ignore").decode("ascii").lower().strip()
 
 
+def sugerencias_por_archivo(path: Path) -> dict[str, list[dict]]:
+    """Candidatos de la cola de revisión indexados por ruta provisional."""
+    return {
+        entrada["destino"]: entrada["candidatos"]
+        for entrada in leer_sugerencias(path).values()
+        if entrada.get("destino") and entrada.get("candidatos")
+    }
+
+
 def main() -> None:
     """Reubica las nuevas secciones según el índice."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--suggestions",
+        type=Path,
+        default=Path("_fuentes/alias_suggestions.csv"),
+        help="Cola de revisión generada por ingest_wiki_v2.py",
+    )
+    args = parser.parse_args()
+
+    index_data = yaml.safe_load(index_file.read_text(encoding="utf-8"))
+    cola = sugerencias_por_archivo(args.suggestions)
+
     # Reubicar
     for md in nuevas_dir.glob("*.md"):
         nombre = md.stem.replace("_", " ")
@@ -61,6 +91,13 @@ def main() -> None:
             if encontrado:
                 break
         if not encontrado:
+            clave = md.relative_to(destino_base).as_posix()
+            if clave in cola:
+                sugerencias = [f"{c['ruta']} ({c['score']:.2f})" for c in cola[clave]]
+                print(
+                    f"[!] No se pudo clasificar: {md.name}. Sugerencias: {sugerencias}"
+                )
+                continue
             # calcular sugerencias fuzzy
             candidates = []
             for sec in index_data["secciones"]:
@@ -1,16 +1,42 @@
 #!/usr/bin/env python
 """CLI unificada para las utilidades de wiki_modular."""
 import argparse
+import json
 import logging
 import os
+import re
 import sys
 from pathlib import Path
+from typing import Any, Mapping, Optional
 
 import wiki_modular.config as config
-from utils.entorno import run as exec_cmd, script_path, add_src_to_path
+from utils.entorno import add_src_to_path
+from utils.entorno import run as exec_cmd
+from utils.entorno import script_path
+from wiki_modular import load_yaml
+from wiki_modular import staging as stg
+from wiki_modular.core.alias import AliasMatcher, cargar_alias
+from wiki_modular.core.correccion import Corrector
+from wiki_modular.core.duplicados import (
+    UMBRAL,
+    FirmasCache,
+    Grupo,
+    buscar_duplicados,
+    huella_firmas,
+)
+from wiki_modular.core.facetas import Facetas, Rango, construir_facetas
+from wiki_modular.core.ingest import DestinationResolver, RoutingCache, huella_routing
+from wiki_modular.core.plan import CREATE, UNCHANGED, UPDATE, IngestPlan, aplicar
+from wiki_modular.core.postings import MmapBM25Index
+from wiki_modular.core.routing import RouteTable
+from wiki_modular.core.search import BM25Index, Hit, generar_indice
+from wiki_modular.core.sidebar import build_sidebar_lines, reemplazar_seccion
+from wiki_modular.core.splitter import MappedMarkdown, iter_bloques
 
 add_src_to_path()
 
+from scripts import generar_indice_busqueda as gib  # noqa: E402
+from scripts import ingest_wiki_v2 as ingest  # noqa: E402
 from scripts import procesar_nuevos as pn  # noqa: E402
 
 
@@ -81,6 +107,28 @@ def step_sidebar() -> None:
     run([sys.executable, str(script_path("auditar_sidebar_vs_fs.py"))])
 
 
+def step_search_index() -> None:
+    """Genera ``search_index.json`` y ``related.json`` dentro de la wiki en construcción."""
+    run(
+        [
+            sys.executable,
+            str(script_path("generar_indice_busqueda.py")),
+            "--wiki",
+            str(config.WIKI_DIR),
+            "--output",
+            str(config.SEARCH_INDEX),
+        ]
+    )
+    run(
+        [
+            sys.executable,
+            str(script_path("generar_relacionadas.py")),
+            "--index",
+            str(config.SEARCH_INDEX),
+        ]
+    )
+
+
 def process_doc(path: Path, cutoff: float) -> None:
     """Procesa ``path`` aplicando todos los pasos de la CLI."""
     if path.suffix.lower() == ".pdf":
@@ -98,6 +146,220 @@ def process_doc(path: Path, cutoff: float) -> None:
     step_sidebar()
 
 
+def rebuild_section(
+    ref: str,
+    *,
+    cutoff: float = 0.5,
+    mapa: Path = Path("_fuentes/mapa_encabezados.yaml"),
+    index: Path = Path("index_PlataformaBBDD.yaml"),
+    fuente: Path = Path("_fuentes/tmp_full.md"),
+    alias: Path = Path("_fuentes/alias_override.yaml"),
+    cache: Path = Path("_fuentes/routing_cache.json"),
+    search_index: Optional[Path] = None,
+    docx: str = "",
+    metadata: bool = False,
+) -> IngestPlan:
+    """Reingiere solo los bloques que se enrutan a la sección ``ref``.
+
+    Usa el mapa de encabezados y la misma caché de rutas que la ingesta
+    completa, escribe únicamente las páginas de la sección que cambian y
+    parchea sus líneas del sidebar y sus entradas del índice de búsqueda
+    (por defecto ``config.SEARCH_INDEX``).
+    """
+    wiki_dir = config.WIKI_DIR
+    search_index = search_index or config.SEARCH_INDEX
+    index_data = load_yaml(index)
+    routes = RouteTable(index_data)
+    pos = routes.buscar_seccion(ref)
+    seccion, subtemas = routes.secciones[pos]
+    objetivo = {wiki_dir / r.ruta for r in (seccion, *subtemas)}
+    carpeta = wiki_dir / seccion.seccion
+
+    huella = huella_routing(index, alias, cutoff=cutoff)
+    routing_cache = RoutingCache(cache, huella)
+    resolver = DestinationResolver(
+        index_data,
+        AliasMatcher(cargar_alias(alias)),
+        fuzzy_cutoff=cutoff,
+        routes=routes,
+        cache=routing_cache,
+        wiki_dir=wiki_dir,
+    )
+    base = ingest.metadatos_base(docx) if metadata else None
+
+    plan = IngestPlan()
+    with MappedMarkdown(fuente) as md:
+        for titulo, nivel, rango in iter_bloques(load_yaml(mapa), md):
+            destino = resolver.resolve(titulo)
+            if destino is None or (
+                destino not in objetivo and carpeta not in destino.parents
+            ):
+                continue
+            origen = (titulo, nivel, rango)
+            plan.add(
+                destino,
+                ingest.render_bloque(md, origen, base),
+                titulo=titulo,
+                origen=origen,
+            )
+        aplicar(plan, lambda origen: ingest.render_bloque(md, origen, base))
+    routing_cache.save()
+
+    sidebar = config.SIDEBAR_FILE
+    nuevas = build_sidebar_lines(
+        {"secciones": [index_data["secciones"][pos]]}, tolerant=True
+    )[1:-1]
+    if sidebar.exists() and nuevas:
+        lines = sidebar.read_text(encoding="utf-8").split("\n")
+        sidebar.write_text(
+            "\n".join(reemplazar_seccion(lines, nuevas)), encoding="utf-8"
+        )
+
+    cambiadas = [a.ruta for a in plan.por_tipo(CREATE) + plan.por_tipo(UPDATE)]
+    if search_index.exists() and cambiadas:
+        gib.update_index(cambiadas, wiki_dir=wiki_dir, output=search_index)
+
+    resumen = plan.resumen()
+    logging.info(
+        "Sección '%s': %s nuevos, %s actualizados, %s sin cambios",
+        seccion.titulo,
+        resumen[CREATE],
+        resumen[UPDATE],
+        resumen[UNCHANGED],
+    )
+    return plan
+
+
+_FILTRO_RE = re.compile(r"^(\w+)(>=|<=|=)(.*)$")
+
+
+def parse_filtros(filtros: list[str]) -> dict[str, Any]:
+    """Convierte ``campo=valor``, ``campo>=valor`` y ``campo<=valor`` en filtros.
+
+    Varios ``=`` sobre el mismo campo aceptan cualquiera de los valores;
+    ``>=`` y ``<=`` se combinan en un :class:`Rango`.
+    """
+    iguales: dict[str, list[str]] = {}
+    rangos: dict[str, Rango] = {}
+    for texto in filtros:
+        m = _FILTRO_RE.match(texto)
+        if not m:
+            raise ValueError(
+                f"Filtro no válido: {texto} (use campo=valor o campo>=valor)"
+            )
+        campo, op, valor = m.groups()
+        if op == "=":
+            iguales.setdefault(campo, []).append(valor)
+        else:
+            rango = rangos.get(campo, Rango())
+            if op == ">=":
+                rangos[campo] = Rango(valor, rango.hasta)
+            else:
+                rangos[campo] = Rango(rango.desde, valor)
+    mezclados = set(iguales) & set(rangos)
+    if mezclados:
+        raise ValueError(
+            f"Filtros de valor y de rango sobre {', '.join(sorted(mezclados))}"
+        )
+    return {**iguales, **rangos}
+
+
+def search_wiki(
+    consulta: str,
+    *,
+    search_index: Optional[Path] = None,
+    k: int = 10,
+    filtros: Optional[Mapping[str, Any]] = None,
+) -> list[Hit]:
+    """Busca ``consulta`` con BM25 en ``search_index`` o, si no existe, en la wiki.
+
+    Si existe el índice binario (``search_index.bm25``) se abre con ``mmap``
+    en lugar de cargar el JSON. ``filtros`` (véase
+    :meth:`~wiki_modular.core.facetas.Facetas.mascara`) se resuelven con los
+    mapas de bits de ``search_index.facets.json``, o calculándolos si faltan.
+    Los archivos que :func:`~scripts.generar_indice_busqueda.update_index`
+    dejó pendientes se ignoran como si faltaran.
+    Sin ``search_index`` se usa ``config.SEARCH_INDEX``.
+    """
+    search_index = search_index or config.SEARCH_INDEX
+    pendientes = gib.salidas_pendientes(search_index)
+    binario = search_index.with_suffix(gib.POSTINGS_SUFFIX)
+    facetas = search_index.with_suffix(gib.FACETS_SUFFIX)
+    con_binario = binario.exists() and "postings" not in pendientes
+    con_facetas = facetas.exists() and "facets" not in pendientes
+    if con_binario and (not filtros or con_facetas):
+        with MmapBM25Index(binario) as indice:
+            filtro = None
+            if filtros:
+                mapas = Facetas.from_json(facetas)
+                mapas.comprobar_rutas(indice.rutas)
+                filtro = mapas.mascara(filtros)
+            return indice.search(consulta, k, filtro=filtro)
+    if search_index.exists():
+        paginas = json.loads(search_index.read_text(encoding="utf-8"))
+    else:
+        paginas = dict(sorted(generar_indice(config.WIKI_DIR).items()))
+    indice = BM25Index(paginas)
+    filtro = None
+    if filtros:
+        if con_facetas:
+            mapas = Facetas.from_json(facetas)
+        else:
+            mapas = Facetas(construir_facetas(paginas))
+        mapas.comprobar_rutas(indice.rutas)
+        filtro = mapas.mascara(filtros)
+    return indice.search(consulta, k, filtro=filtro)
+
+
+def corregir_consulta(
+    consulta: str, *, search_index: Optional[Path] = None
+) -> Optional[str]:
+    """Consulta corregida con ``search_index.spell.json`` o ``None`` si no cambia."""
+    search_index = search_index or config.SEARCH_INDEX
+    diccionario = search_index.with_suffix(gib.SPELL_SUFFIX)
+    if not diccionario.exists():
+        return None
+    corregida = Corrector.from_json(diccionario).corregir(consulta)
+    return corregida if corregida != consulta else None
+
+
+def dedupe_wiki(
+    *,
+    search_index: Optional[Path] = None,
+    cache: Path = Path("_fuentes/dedupe_cache.npz"),
+    umbral: float = UMBRAL,
+) -> list[Grupo]:
+    """Grupos de páginas casi duplicadas de la wiki.
+
+    Las páginas se toman de ``search_index`` puesto al día con
+    :func:`~scripts.generar_indice_busqueda.generar_indice_incremental`:
+    solo se vuelven a leer las que cambiaron desde su manifest (o todas si
+    no existe), sin reescribir el índice. Las firmas MinHash se reutilizan
+    desde ``cache`` por hash del contenido, así que solo se calculan las de
+    las páginas nuevas o modificadas.
+    """
+    search_index = search_index or config.SEARCH_INDEX
+    paginas, _, cambiadas = gib.generar_indice_incremental(
+        config.WIKI_DIR, search_index
+    )
+    if cambiadas and search_index.exists():
+        logging.info(
+            "%s desactualizado en %s páginas; se usan las de la wiki",
+            search_index,
+            len(cambiadas),
+        )
+    firmas = FirmasCache(cache, huella_firmas())
+    grupos, calculadas = buscar_duplicados(paginas, umbral=umbral, cache=firmas)
+    firmas.save()
+    logging.info(
+        "%s páginas, %s firmas calculadas, %s grupos de duplicados",
+        len(paginas),
+        calculadas,
+        len(grupos),
+    )
+    return grupos
+
+
 def main() -> None:
     """Punto de entrada principal de la CLI unificada."""
     parser = argparse.ArgumentParser(
@@ -121,8 +383,89 @@ def main() -> None:
         default=0.5,
         help="Umbral fuzzy matching",
     )
+    full.add_argument(
+        "--staging",
+        action="store_true",
+        help="Construir en un directorio aparte y publicar al terminar",
+    )
+
+    rebuild = sub.add_parser(
+        "rebuild",
+        help="Reingerir una sola sección a partir del mapa de encabezados",
+    )
+    rebuild.add_argument(
+        "--section", required=True, help="id, slug o título de la sección"
+    )
+    rebuild.add_argument(
+        "--cutoff",
+        type=float,
+        default=0.5,
+        help="Umbral fuzzy matching",
+    )
+    rebuild.add_argument(
+        "--search-index",
+        type=Path,
+        default=None,
+        help="Índice de búsqueda a parchear, si existe (por defecto el de la wiki)",
+    )
+    rebuild.add_argument("--docx", default="", help="Ruta al archivo .docx original")
+    rebuild.add_argument(
+        "--metadata", action="store_true", help="Incluir frontmatter con metadatos"
+    )
+
+    search = sub.add_parser("search", help="Buscar en la wiki (BM25)")
+    search.add_argument("query", help="Términos a buscar")
+    search.add_argument("-k", type=int, default=10, help="Número de resultados")
+    search.add_argument(
+        "--search-index",
+        type=Path,
+        default=None,
+        help=(
+            "Índice de búsqueda (por defecto el de la wiki; si no existe se leen "
+            "los Markdown)"
+        ),
+    )
+    search.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        metavar="CAMPO=VALOR",
+        help=(
+            "Filtrar por metadatos (source_file, source_file_date, "
+            "conversion_date, nivel); admite también CAMPO>=VALOR y CAMPO<=VALOR"
+        ),
+    )
+
+    dedupe = sub.add_parser(
+        "dedupe", help="Detectar páginas casi duplicadas (MinHash/LSH)"
+    )
+    dedupe.add_argument(
+        "--search-index",
+        type=Path,
+        default=None,
+        help=(
+            "Índice de búsqueda (por defecto el de la wiki); se releen los "
+            "Markdown que cambiaron desde que se generó"
+        ),
+    )
+    dedupe.add_argument(
+        "--umbral",
+        type=float,
+        default=UMBRAL,
+        help=f"Similitud de Jaccard mínima (por defecto {UMBRAL})",
+    )
+    dedupe.add_argument(
+        "--cache",
+        type=Path,
+        default=Path("_fuentes/dedupe_cache.npz"),
+        help="Caché de firmas MinHash por hash del contenido",
+    )
+    dedupe.add_argument(
+        "--json", type=Path, help="Escribir también los grupos en este archivo JSON"
+    )
 
     sub.add_parser("reset", help="Limpiar entorno de trabajo")
+    sub.add_parser("rollback", help="Volver a la versión publicada anterior")
 
     args = parser.parse_args()
 
@@ -139,8 +482,22 @@ def main() -> None:
         if not 0 <= args.cutoff <= 1:
             parser.error("--cutoff debe estar entre 0 y 1")
 
+        publicada = config.WIKI_DIR
+        staging = None
         try:
-            run([sys.executable, str(script_path("resetear_entorno.py"))])
+            if args.staging:
+                # La wiki servida no se toca hasta que todo el flujo termina bien
+                run(
+                    [
+                        sys.executable,
+                        str(script_path("resetear_entorno.py")),
+                        "--keep-wiki",
+                    ]
+                )
+                staging = stg.preparar_staging(publicada, limpio=True)
+                stg.usar_staging(staging)
+            else:
+                run([sys.executable, str(script_path("resetear_entorno.py"))])
 
             if args.doc.is_dir():
                 files = sorted(args.doc.glob("*.docx")) + sorted(args.doc.glob("*.pdf"))
@@ -154,11 +511,73 @@ def main() -> None:
                 if args.doc.suffix.lower() != ".docx":
                     parser.error("El documento debe tener extensi\u00f3n .docx")
                 process_doc(args.doc, args.cutoff)
+
+            if staging is not None:
+                stg.reubicar_enlaces(staging, publicada)
+                step_search_index()
+                stg.publicar(staging, publicada)
         except Exception as exc:
             logging.error("Ejecución interrumpida: %s", exc)
+            if staging is not None:
+                logging.error("Wiki publicada intacta; construcción en %s", staging)
+            raise SystemExit(1)
+    elif args.command == "rebuild":
+        try:
+            rebuild_section(
+                args.section,
+                cutoff=args.cutoff,
+                search_index=args.search_index,
+                docx=args.docx,
+                metadata=args.metadata,
+            )
+        except (KeyError, OSError) as exc:
+            logging.error("%s", exc)
             raise SystemExit(1)
+    elif args.command == "search":
+        try:
+            filtros = parse_filtros(args.filter)
+            hits = search_wiki(
+                args.query, search_index=args.search_index, k=args.k, filtros=filtros
+            )
+        except ValueError as exc:
+            logging.error("%s", exc)
+            raise SystemExit(1)
+        for hit in hits:
+            print(f"{hit.puntuacion:7.3f}  {hit.ruta}  {hit.titulo}")
+            print(f"         {hit.fragmento}")
+        if not hits:
+            print("Sin resultados")
+            corregida = corregir_consulta(args.query, search_index=args.search_index)
+            if corregida:
+                print(f"¿Quiso decir: {corregida}?")
+    elif args.command == "dedupe":
+        if not 0 < args.umbral <= 1:
+            parser.error("--umbral debe estar entre 0 y 1")
+        grupos = dedupe_wiki(
+            search_index=args.search_index, cache=args.cache, umbral=args.umbral
+        )
+        for n, grupo in enumerate(grupos, 1):
+            print(f"Grupo {n}: canónica {grupo.canonica}")
+            for ruta, similitud in grupo.duplicadas:
+                print(f"  {similitud:5.2f}  {ruta}")
+        if not grupos:
+            print("Sin duplicados")
+        if args.json:
+            data = [
+                {"canonical": g.canonica, "duplicates": [list(d) for d in g.duplicadas]}
+                for g in grupos
+            ]
+            args.json.write_text(
+                json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
     elif args.command == "reset":
         run([sys.executable, str(script_path("resetear_entorno.py"))])
+    elif args.command == "rollback":
+        try:
+            stg.rollback(config.WIKI_DIR)
+        except (OSError, RuntimeError) as exc:
+            logging.error("%s", exc)
+            raise SystemExit(1)
     else:
         parser.print_help()
 
@@ -27,6 +27,8 @@ def _load(path: Path) -> dict[str, Path]:
     else:
         data = {}
     merged = {**_DEFAULTS, **data}
+    # El índice de búsqueda se publica con la wiki, salvo que se configure otro
+    merged.setdefault("search_index", Path(merged["wiki_dir"]) / "search_index.json")
     return {k: Path(v) for k, v in merged.items()}
 
 
@@ -35,17 +37,20 @@ ORIGINALES_DIR: Path = CONFIG["originales_dir"]
 WIKI_DIR: Path = CONFIG["wiki_dir"]
 ASSETS_DIR: Path = CONFIG["assets_dir"]
 SIDEBAR_FILE: Path = CONFIG["sidebar_file"]
+SEARCH_INDEX: Path = CONFIG["search_index"]
 
 
 def load_config(path: str | Path) -> None:
     """Cargar configuración desde ``path`` y actualizar constantes."""
     global CONFIG_FILE, CONFIG, ORIGINALES_DIR, WIKI_DIR, ASSETS_DIR, SIDEBAR_FILE
+    global SEARCH_INDEX
     CONFIG_FILE = Path(path)
     CONFIG = _load(CONFIG_FILE)
     ORIGINALES_DIR = CONFIG["originales_dir"]
     WIKI_DIR = CONFIG["wiki_dir"]
     ASSETS_DIR = CONFIG["assets_dir"]
     SIDEBAR_FILE = CONFIG["sidebar_file"]
+    SEARCH_INDEX = CONFIG["search_index"]
 
 
 __all__ = [
@@ -53,5 +58,6 @@ __all__ = [
     "WIKI_DIR",
     "ASSETS_DIR",
     "SIDEBAR_FILE",
+    "SEARCH_INDEX",
     "load_config",
 ]
@@ -1,16 +1,41 @@
 """Submódulos centrales con funciones reutilizables."""
 
 from .sidebar import load_index, validate_index_schema, build_sidebar_lines
-from .ingest import buscar_destino, limpiar_nombre_archivo, append_suggestion
-from .search import extraer_frontmatter, generar_indice
+from .ingest import (
+    DestinationResolver,
+    RoutingCache,
+    buscar_destino,
+    limpiar_nombre_archivo,
+    append_suggestion,
+    SuggestionQueue,
+)
+from .alias import AliasMatcher, cargar_alias
+from .autocompletado import Autocompletado
+from .correccion import Corrector
+from .facetas import Facetas
+from .fuzzy import TrigramIndex
+from .routing import Route, RouteTable
+from .search import BM25Index, extraer_frontmatter, generar_indice
 
 __all__ = [
     "load_index",
     "validate_index_schema",
     "build_sidebar_lines",
+    "AliasMatcher",
+    "cargar_alias",
+    "TrigramIndex",
+    "Route",
+    "RouteTable",
+    "DestinationResolver",
+    "RoutingCache",
     "buscar_destino",
     "limpiar_nombre_archivo",
     "append_suggestion",
+    "SuggestionQueue",
+    "Autocompletado",
+    "BM25Index",
+    "Corrector",
+    "Facetas",
     "extraer_frontmatter",
     "generar_indice",
 ]
@@ -0,0 +1,138 @@
+"""Resolución de ``alias_override.yaml`` a nivel de slug y por patrones."""
+
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import yaml
+
+from wiki_modular import limpiar_slug
+
+REGEX_PREFIX = "re:"
+_GLOB_RE = re.compile(r"[*?]")
+
+
+def cargar_alias(path: Path) -> dict:
+    """Carga el YAML de alias tolerando ``\\>`` sin escapar."""
+    if not path.exists():
+        return {}
+    try:
+        raw_override = path.read_text(encoding="utf-8")
+        safe_override = raw_override.replace(r"\>", r"\\>")
+        return yaml.safe_load(safe_override) or {}
+    except yaml.YAMLError as e:
+        logging.error(f"Error parseando {path.name}: {e}")
+        return {}
+
+
+def patron_alias(clave: str) -> Optional[str]:
+    """Traduce una clave con comodines o ``re:`` a una expresión sobre slugs.
+
+    ``*`` y ``?`` funcionan como en ``fnmatch`` y el resto del texto se
+    normaliza con :func:`limpiar_slug`, de modo que ``"Instancia SQL *"``
+    equivale a ``instancia_sql_.*``. Devuelve ``None`` si la clave es literal.
+    """
+    if clave.startswith(REGEX_PREFIX):
+        return clave.removeprefix(REGEX_PREFIX).strip()
+    if not _GLOB_RE.search(clave):
+        return None
+    partes: List[str] = []
+    for trozo in _GLOB_RE.split(clave):
+        slug = limpiar_slug(trozo)
+        if slug and trozo[:1].isspace():
+            slug = "_" + slug
+        if slug and trozo[-1:].isspace():
+            slug += "_"
+        partes.append(re.escape(slug))
+    comodines = [".*" if c == "*" else "." for c in _GLOB_RE.findall(clave)]
+    patron = partes[0]
+    for comodin, parte in zip(comodines, partes[1:]):
+        patron += comodin + parte
+    return patron
+
+
+class AliasMatcher:
+    """Compila todas las claves de alias una sola vez.
+
+    Las claves literales se comparan por slug en un diccionario y las claves
+    con patrón se combinan en una única expresión regular con un grupo con
+    nombre por alias: cada título se recorre una vez, sin importar cuántos
+    patrones haya. Las expresiones ``re:`` con grupos propios (con nombre,
+    numerados o referencias ``\\1``) o con opciones globales como ``(?i)``
+    no pueden unirse sin cambiar su significado y se compilan aparte,
+    conservando su posición. Las claves literales tienen prioridad y, si
+    varios patrones encajan, gana el primero del archivo.
+    """
+
+    def __init__(self, alias_map: Optional[dict] = None):
+        self.alias_map: dict = dict(alias_map or {})
+        self._slugs: Dict[str, str] = {}
+        # Expresiones en orden de prioridad; las unidas llevan la lista de
+        # destinos de sus grupos ``a0``, ``a1``...; las sueltas, un destino
+        self._patrones: List[Tuple[re.Pattern[str], Union[str, List[str]]]] = []
+        grupos: List[str] = []
+        destinos: List[str] = []
+        for clave, destino in self.alias_map.items():
+            clave = str(clave)
+            patron = patron_alias(clave)
+            if patron is None:
+                self._slugs.setdefault(limpiar_slug(clave), destino)
+                continue
+            try:
+                compilado = re.compile(patron)
+            except re.error as e:
+                logging.error("Alias '%s' con patrón inválido: %s", clave, e)
+                continue
+            if compilado.groups or not _se_puede_unir(patron):
+                self._agregar_union(grupos, destinos)
+                grupos, destinos = [], []
+                self._patrones.append((compilado, destino))
+                continue
+            grupos.append(f"(?P<a{len(destinos)}>{patron})")
+            destinos.append(destino)
+        self._agregar_union(grupos, destinos)
+
+    def _agregar_union(self, grupos: List[str], destinos: List[str]) -> None:
+        if grupos:
+            self._patrones.append((re.compile("|".join(grupos)), destinos))
+
+    def __contains__(self, titulo: str) -> bool:
+        return self.match(titulo) is not None
+
+    def __len__(self) -> int:
+        return len(self.alias_map)
+
+    def match(self, titulo: str) -> Optional[Path]:
+        """Devuelve la ruta del alias que corresponde a ``titulo`` o ``None``."""
+        if titulo in self.alias_map:
+            return Path(self.alias_map[titulo])
+        return self.match_slug(limpiar_slug(titulo))
+
+    def match_slug(self, slug: str) -> Optional[Path]:
+        """Como :meth:`match` para un título ya normalizado."""
+        destino = self._slugs.get(slug)
+        if destino is not None:
+            return Path(destino)
+        for patron, destinos in self._patrones:
+            m = patron.fullmatch(slug)
+            if m is None:
+                continue
+            if isinstance(destinos, list):
+                return Path(destinos[int(m.lastgroup[1:])])
+            return Path(destinos)
+        return None
+
+
+def _se_puede_unir(patron: str) -> bool:
+    """Indica si ``patron`` admite ir dentro de un grupo de la expresión unida."""
+    try:
+        re.compile(f"(?P<a0>{patron})|x")
+    except re.error:
+        return False
+    return True
+
+
+__all__ = ["REGEX_PREFIX", "AliasMatcher", "cargar_alias", "patron_alias"]
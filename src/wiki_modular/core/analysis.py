@@ -0,0 +1,134 @@
+"""Análisis de texto en español para los índices de búsqueda.
+
+Cada término pasa por tres pasos: se pliegan los acentos con la misma
+normalización NFKD que :func:`~wiki_modular.utils.limpiar_slug` (así
+``configuración`` y ``configuracion`` coinciden), se descartan las palabras
+vacías del español y se aplica un *stemmer* ligero que solo quita las
+terminaciones de género y número (``configuraciones`` → ``configuracion``,
+``luces`` → ``luc``).
+
+El análisis se hace al construir los índices: los términos ya normalizados
+quedan en las listas de BM25, en el índice lunr serializado y en los filtros
+Bloom de los fragmentos. Al consultar solo se analizan los términos de la
+consulta. ``docs/buscar-worker.js`` replica :func:`analizar_termino` y lo
+registra en lunr con la etiqueta :data:`LUNR_LABEL`.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Iterator, List, Optional
+
+from lunr.builder import Builder
+from lunr.pipeline import Pipeline
+
+from wiki_modular.utils import plegar_acentos
+
+# Versión del análisis; cambiarla obliga a reconstruir los índices binarios
+ANALYZER_VERSION = 2
+LUNR_LABEL = "analizarEs"
+
+# Palabras vacías ya plegadas (sin acentos); ``buscar-worker.js`` usa la
+# misma lista.
+STOPWORDS_ES = frozenset(
+    """
+    a al algo algun alguna algunas alguno algunos ante antes aquel aquella
+    aquellas aquellos aqui asi aun cada como con contra cual cuales cuando de
+    del desde donde durante e el ella ellas ello ellos en entre era eran eres
+    es esa esas ese eso esos esta estaba estaban estado estan estar estas este
+    esto estos fue fueron ha habia han hasta hay la las le les lo los mas me
+    mi mis mucho muchos muy nada ni no nos nosotros o os otra otras otro otros
+    para pero poco por porque que quien quienes se sea ser si sido sin sobre
+    son su sus tambien tan tanto te tiene tienen todo todos tu tus u un una
+    uno unos usted ustedes y ya yo
+    """.split()
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+_TRIM_RE = re.compile(r"^\W*?([^\W]+)\W*?$")
+_CACHE = 1 << 16
+_VOCALES = "aeiou"
+# Longitud mínima de la raíz que deja :func:`stem_es`
+MIN_RAIZ = 3
+
+
+def stem_es(palabra: str) -> str:
+    """*Stemmer* ligero: quita el género y el plural de ``palabra`` (ya plegada).
+
+    Primero se quita el plural (``-es`` tras consonante, ``-s`` tras vocal),
+    después la vocal final de género y por último ``-z`` pasa a ``-c``, de
+    modo que singular y plural comparten raíz: ``datos``/``dato`` → ``dat``,
+    ``indices``/``indice`` → ``indic``, ``luces``/``luz`` → ``luc``. Ningún
+    paso deja una raíz de menos de :data:`MIN_RAIZ` letras.
+    """
+    raiz = palabra
+    if raiz.endswith("s") and len(raiz) > MIN_RAIZ:
+        if (
+            raiz.endswith("es")
+            and raiz[-3] not in _VOCALES
+            and len(raiz) > MIN_RAIZ + 1
+        ):
+            raiz = raiz[:-2]
+        else:
+            raiz = raiz[:-1]
+    if raiz[-1:] in ("o", "a", "e") and len(raiz) > MIN_RAIZ:
+        raiz = raiz[:-1]
+    if raiz.endswith("z"):
+        raiz = raiz[:-1] + "c"
+    return raiz
+
+
+@lru_cache(maxsize=_CACHE)
+def analizar_termino(termino: str) -> Optional[str]:
+    """Término normalizado de ``termino`` o ``None`` si es una palabra vacía."""
+    plegado = plegar_acentos(termino.lower())
+    if plegado in STOPWORDS_ES:
+        return None
+    return stem_es(plegado)
+
+
+def iter_terminos(texto: str) -> Iterator[str]:
+    """Genera los términos normalizados de ``texto`` en orden."""
+    for token in _TOKEN_RE.findall(texto):
+        termino = analizar_termino(token)
+        if termino:
+            yield termino
+
+
+def analizar(texto: str) -> List[str]:
+    """Términos normalizados de ``texto``, en orden y con repeticiones."""
+    return list(iter_terminos(texto))
+
+
+def lunr_analizar(token, i=None, tokens=None):
+    """Función de tubería lunr: recorta, pliega, filtra y reduce ``token``."""
+    m = _TRIM_RE.match(plegar_acentos(str(token)))
+    termino = analizar_termino(m.group(1) if m else str(token))
+    if not termino:
+        return None
+    return token.update(lambda s, metadata=None: termino)
+
+
+Pipeline.register_function(lunr_analizar, LUNR_LABEL)
+
+
+def builder_lunr() -> Builder:
+    """``Builder`` de lunr que indexa y consulta con :func:`analizar_termino`."""
+    builder = Builder()
+    builder.pipeline.add(lunr_analizar)
+    builder.search_pipeline.add(lunr_analizar)
+    return builder
+
+
+__all__ = [
+    "ANALYZER_VERSION",
+    "LUNR_LABEL",
+    "STOPWORDS_ES",
+    "analizar",
+    "analizar_termino",
+    "builder_lunr",
+    "iter_terminos",
+    "lunr_analizar",
+    "stem_es",
+]
@@ -0,0 +1,194 @@
+"""Autocompletado de títulos y encabezados con un array de prefijos ordenado.
+
+Al generar el índice de búsqueda se exporta una estructura compacta con los
+títulos de página y los encabezados de ``search_index.json``:
+
+``items``
+    ``[texto, ruta, slug, peso]`` ordenados de mejor a peor: el peso depende
+    del nivel (título de página 6, ``H2`` 4, ``H3`` 3...), a igual peso va
+    primero el texto más corto. Así la posición de un item es su rango.
+``keys``
+    Enteros ``item * 256 + offset`` ordenados por el texto normalizado del
+    item a partir de ``offset``, que es el inicio del texto o de cada palabra
+    que no sea vacía. Un prefijo se resuelve con dos búsquedas binarias y
+    coincide tanto al principio del título como al principio de una palabra.
+``top``
+    Los mejores items precalculados para los prefijos de hasta
+    :data:`PREFIJO_CORTO` caracteres, cuyos rangos serían demasiado grandes.
+
+El texto se normaliza en minúsculas y con los acentos plegados; se eliminan
+los caracteres fuera del BMP para que el orden de Python coincida con el de
+las cadenas UTF-16 de JavaScript. ``docs/buscar-worker.js`` implementa la
+misma consulta que :meth:`Autocompletado.suggest`.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from wiki_modular.core.analysis import STOPWORDS_ES
+from wiki_modular.core.search import titulo_pagina
+from wiki_modular.utils import plegar_acentos
+
+VERSION = 1
+TOP_K = 10
+PREFIJO_CORTO = 2
+PESO_TITULO = 6
+MAX_OFFSET = 255
+
+_PALABRA_RE = re.compile(r"\w+")
+_NO_BMP_RE = re.compile("[\U00010000-\U0010ffff]")
+_FIN = "\uffff"
+
+
+def normalizar(texto: str) -> str:
+    """Texto en minúsculas, sin acentos y sin caracteres fuera del BMP."""
+    return _NO_BMP_RE.sub("", plegar_acentos(texto.lower()))
+
+
+def peso_encabezado(nivel: int) -> int:
+    """Peso de un encabezado según su nivel (``H2`` 4 ... ``H6`` 0)."""
+    return max(0, PESO_TITULO - nivel)
+
+
+def _inicios(plegado: str) -> List[int]:
+    """Offsets del texto y de cada palabra no vacía dentro de ``plegado``."""
+    inicios = [0]
+    for m in _PALABRA_RE.finditer(plegado):
+        if 0 < m.start() <= MAX_OFFSET and m.group() not in STOPWORDS_ES:
+            inicios.append(m.start())
+    return inicios
+
+
+def construir_autocompletado(
+    indice: Mapping[str, Mapping[str, Any]], top_k: int = TOP_K
+) -> Dict[str, Any]:
+    """Estructura de autocompletado serializable para ``indice``."""
+    candidatos = []
+    for ruta, info in indice.items():
+        candidatos.append((titulo_pagina(ruta, info), ruta, "", PESO_TITULO))
+        for h in info.get("headers") or []:
+            nivel = int(h["level"])
+            candidatos.append(
+                (str(h["text"]), ruta, str(h["slug"]), peso_encabezado(nivel))
+            )
+    candidatos = [c for c in candidatos if normalizar(c[0]).strip()]
+    candidatos.sort(key=lambda c: (-c[3], len(c[0]), c[0], c[1], c[2]))
+
+    plegados = [normalizar(c[0]) for c in candidatos]
+    claves = [
+        (plegado[offset:], item * 256 + offset)
+        for item, plegado in enumerate(plegados)
+        for offset in _inicios(plegado)
+    ]
+    claves.sort()
+
+    top: Dict[str, List[int]] = {}
+    for clave, codigo in claves:
+        for n in range(1, PREFIJO_CORTO + 1):
+            if len(clave) >= n:
+                top.setdefault(clave[:n], []).append(codigo >> 8)
+    top = {p: sorted(set(items))[:top_k] for p, items in sorted(top.items())}
+
+    return {
+        "version": VERSION,
+        "topK": top_k,
+        "items": [list(c) for c in candidatos],
+        "keys": [codigo for _, codigo in claves],
+        "top": top,
+    }
+
+
+@dataclass(frozen=True)
+class Sugerencia:
+    """Título o encabezado propuesto para un prefijo."""
+
+    texto: str
+    ruta: str
+    slug: str
+    peso: int
+
+
+class _Claves(Sequence[str]):
+    """Vista de ``keys`` como textos para usar :mod:`bisect`."""
+
+    def __init__(self, keys: Sequence[int], plegados: Sequence[str]):
+        self._keys = keys
+        self._plegados = plegados
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, i):  # type: ignore[override]
+        codigo = self._keys[i]
+        offset = codigo & 0xFF
+        return self._plegados[codigo >> 8][offset:]
+
+
+def _menores(valores: np.ndarray, k: int) -> List[int]:
+    """Los ``k`` valores distintos más pequeños de ``valores``, en orden.
+
+    Un item puede aparecer varias veces en un rango (una vez por palabra que
+    empiece por el prefijo), así que se amplía la partición hasta reunir
+    ``k`` valores distintos sin ordenar el rango completo.
+    """
+    m = k
+    while m < len(valores):
+        distintos = np.unique(np.partition(valores, m)[: m + 1])
+        if len(distintos) >= k:
+            return distintos[:k].tolist()
+        m *= 2
+    return np.unique(valores)[:k].tolist()
+
+
+class Autocompletado:
+    """Consulta por prefijo sobre la estructura de :func:`construir_autocompletado`."""
+
+    def __init__(self, data: Mapping[str, Any]):
+        if data.get("version") != VERSION:
+            raise ValueError(
+                f"Versión de autocompletado no soportada: {data.get('version')}"
+            )
+        self.items: List[List[Any]] = data["items"]
+        self.top_k: int = data.get("topK", TOP_K)
+        self._top: Dict[str, List[int]] = data["top"]
+        self._keys: List[int] = data["keys"]
+        self._claves = _Claves(self._keys, [normalizar(it[0]) for it in self.items])
+        self._item_de_clave = np.asarray(self._keys, dtype=np.int64) >> 8
+
+    @classmethod
+    def from_json(cls, path: Path) -> "Autocompletado":
+        """Carga la estructura desde ``search_index.suggest.json``."""
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def suggest(self, prefix: str, k: int = 10) -> List[Sugerencia]:
+        """Las ``k`` mejores entradas cuyo texto o alguna palabra empieza por ``prefix``."""
+        p = normalizar(prefix).lstrip()
+        if not p or k <= 0:
+            return []
+        if len(p) <= PREFIJO_CORTO and k <= self.top_k:
+            elegidos = self._top.get(p, [])[:k]
+        else:
+            lo = bisect.bisect_left(self._claves, p)
+            hi = bisect.bisect_left(self._claves, p + _FIN, lo)
+            elegidos = _menores(self._item_de_clave[lo:hi], k)
+        return [Sugerencia(*self.items[i]) for i in elegidos]
+
+
+__all__ = [
+    "Autocompletado",
+    "Sugerencia",
+    "construir_autocompletado",
+    "normalizar",
+    "peso_encabezado",
+]
@@ -0,0 +1,259 @@
+"""Corrección ortográfica de consultas con borrados simétricos (SymSpell).
+
+Al generar el índice se cuentan las palabras de la wiki (en minúsculas, con
+los acentos plegados y sin palabras vacías) y, para cada una, se generan las
+cadenas que resultan de borrar hasta :data:`MAX_DISTANCIA` caracteres de sus
+primeros :data:`PREFIJO` caracteres. La tabla ``borrado → palabras`` se
+exporta junto a los índices:
+
+``terms``
+    ``[palabra, frecuencia]`` ordenadas de más a menos frecuente; la
+    posición de una palabra es su identificador.
+``deletes``
+    ``{borrado: [identificadores]}``.
+
+Para corregir una palabra se generan sus propios borrados, se buscan en la
+tabla y solo los candidatos encontrados se comparan con la distancia de
+Damerau-Levenshtein; nunca se recorre el vocabulario completo. Gana la menor
+distancia y, a igual distancia, la palabra más frecuente.
+``docs/buscar-worker.js`` implementa la misma consulta para el "¿Quiso
+decir...?" del buscador.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from wiki_modular.core.analysis import STOPWORDS_ES
+from wiki_modular.core.search import titulo_pagina
+from wiki_modular.utils import plegar_acentos
+
+VERSION = 1
+MAX_DISTANCIA = 2
+# Solo se generan borrados del prefijo: acota la tabla en palabras largas
+PREFIJO = 7
+MIN_LONGITUD = 3
+MAX_LONGITUD = 40
+
+_PALABRA_RE = re.compile(r"\w+")
+
+
+def normalizar(palabra: str) -> str:
+    """``palabra`` en minúsculas y sin acentos."""
+    return plegar_acentos(palabra.lower())
+
+
+def corregible(palabra: str) -> bool:
+    """Indica si ``palabra`` (normalizada) entra en el diccionario."""
+    return (
+        MIN_LONGITUD <= len(palabra) <= MAX_LONGITUD
+        and not palabra.isdigit()
+        and palabra not in STOPWORDS_ES
+    )
+
+
+def borrados(palabra: str, max_distancia: int = MAX_DISTANCIA) -> Set[str]:
+    """``palabra`` y las cadenas que resultan de borrarle hasta ``max_distancia`` caracteres."""
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(max_distancia):
+        siguiente = set()
+        for p in frontera:
+            for i in range(len(p)):
+                resto = i + 1
+                siguiente.add(p[:i] + p[resto:])
+        resultado |= siguiente
+        frontera = siguiente
+    return resultado
+
+
+def distancia(a: str, b: str, maximo: int) -> int:
+    """Distancia de Damerau-Levenshtein (transposiciones adyacentes) acotada.
+
+    Devuelve ``maximo + 1`` en cuanto se sabe que la distancia lo supera.
+    El prefijo y el sufijo comunes no cambian la distancia y se descartan
+    antes de rellenar la matriz.
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    inicio = 0
+    while inicio < len(a) and inicio < len(b) and a[inicio] == b[inicio]:
+        inicio += 1
+    fin_a, fin_b = len(a), len(b)
+    while fin_a > inicio and fin_b > inicio and a[fin_a - 1] == b[fin_b - 1]:
+        fin_a -= 1
+        fin_b -= 1
+    a, b = a[inicio:fin_a], b[inicio:fin_b]
+    if not a or not b:
+        return min(len(a) + len(b), maximo + 1)
+    # Solo se rellena la banda |i - j| <= maximo; fuera de ella y por encima
+    # de ``maximo`` basta con saber que se supera el límite.
+    tope = maximo + 1
+    n, m = len(a), len(b)
+    previa: List[int] = []
+    fila = [min(j, tope) for j in range(m + 1)]
+    for i in range(1, n + 1):
+        anterior, previa = previa, fila
+        fila = [tope] * (m + 1)
+        fila[0] = min(i, tope)
+        minimo = fila[0]
+        ca = a[i - 1]
+        for j in range(max(1, i - maximo), min(m, i + maximo) + 1):
+            cb = b[j - 1]
+            valor = previa[j - 1] + (ca != cb)
+            if previa[j] + 1 < valor:
+                valor = previa[j] + 1
+            if fila[j - 1] + 1 < valor:
+                valor = fila[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                if anterior[j - 2] + 1 < valor:
+                    valor = anterior[j - 2] + 1
+            fila[j] = min(valor, tope)
+            if valor < minimo:
+                minimo = valor
+        if minimo > maximo:
+            return tope
+    return fila[m]
+
+
+def contar_palabras(indice: Mapping[str, Mapping[str, Any]]) -> Counter:
+    """Frecuencia de cada palabra corregible en títulos y contenidos."""
+    frecuencias: Counter = Counter()
+    for ruta, info in indice.items():
+        meta = info.get("metadata") or {}
+        textos = [str(info.get("content") or "")]
+        if meta.get("titulo"):
+            textos.append(titulo_pagina(ruta, info))
+        for texto in textos:
+            for token in _PALABRA_RE.findall(texto):
+                palabra = normalizar(token)
+                if corregible(palabra):
+                    frecuencias[palabra] += 1
+    return frecuencias
+
+
+def construir_corrector(
+    indice: Mapping[str, Mapping[str, Any]],
+    *,
+    max_distancia: int = MAX_DISTANCIA,
+    prefijo: int = PREFIJO,
+    min_frecuencia: int = 1,
+) -> Dict[str, Any]:
+    """Diccionario y tabla de borrados serializables para ``indice``."""
+    frecuencias = contar_palabras(indice)
+    terminos = sorted(
+        ((p, f) for p, f in frecuencias.items() if f >= min_frecuencia),
+        key=lambda t: (-t[1], t[0]),
+    )
+    tabla: Dict[str, List[int]] = {}
+    for ident, (palabra, _) in enumerate(terminos):
+        for borrado in borrados(palabra[:prefijo], max_distancia):
+            tabla.setdefault(borrado, []).append(ident)
+    return {
+        "version": VERSION,
+        "maxDistance": max_distancia,
+        "prefixLength": prefijo,
+        "terms": [list(t) for t in terminos],
+        "deletes": dict(sorted(tabla.items())),
+    }
+
+
+@dataclass(frozen=True)
+class Correccion:
+    """Palabra del diccionario propuesta para una palabra de la consulta."""
+
+    termino: str
+    distancia: int
+    frecuencia: int
+
+
+class Corrector:
+    """Consulta la tabla de :func:`construir_corrector`."""
+
+    def __init__(self, data: Mapping[str, Any]):
+        if data.get("version") != VERSION:
+            raise ValueError(
+                f"Versión de corrector no soportada: {data.get('version')}"
+            )
+        self.max_distancia: int = data["maxDistance"]
+        self.prefijo: int = data["prefixLength"]
+        self.terminos: List[List[Any]] = data["terms"]
+        self._borrados: Dict[str, List[int]] = data["deletes"]
+        self._ids = {t[0]: i for i, t in enumerate(self.terminos)}
+
+    @classmethod
+    def from_json(cls, path: Path) -> "Corrector":
+        """Carga la tabla desde ``search_index.spell.json``."""
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def __len__(self) -> int:
+        return len(self.terminos)
+
+    def __contains__(self, palabra: str) -> bool:
+        return normalizar(palabra) in self._ids
+
+    def sugerencias(self, palabra: str, k: int = 5) -> List[Correccion]:
+        """Las ``k`` palabras del diccionario más cercanas a ``palabra``.
+
+        Los candidatos se recorren de más a menos frecuentes; con ``k``
+        encontrados, el siguiente solo entra si está a menor distancia que el
+        peor, así que el límite de la distancia se va reduciendo.
+        """
+        buscada = normalizar(palabra)
+        if buscada in self._ids:
+            return [Correccion(buscada, 0, self.terminos[self._ids[buscada]][1])]
+        candidatos: Set[int] = set()
+        for borrado in borrados(buscada[: self.prefijo], self.max_distancia):
+            candidatos.update(self._borrados.get(borrado, ()))
+        mejores: List[Tuple[int, int]] = []
+        limite = self.max_distancia
+        for ident in sorted(candidatos):
+            termino = self.terminos[ident][0]
+            if abs(len(termino) - len(buscada)) > limite:
+                continue
+            d = distancia(buscada, termino, limite)
+            if d > limite:
+                continue
+            bisect.insort(mejores, (d, ident))
+            del mejores[k:]
+            if len(mejores) == k:
+                # La palabra es desconocida: ninguna estará a distancia 0
+                limite = mejores[-1][0] - 1
+                if limite < 1:
+                    break
+        return [
+            Correccion(self.terminos[i][0], d, self.terminos[i][1]) for d, i in mejores
+        ]
+
+    def suggest_correction(self, palabra: str) -> Optional[str]:
+        """Mejor corrección de ``palabra`` (ella misma si ya es correcta) o ``None``."""
+        mejores = self.sugerencias(palabra, k=1)
+        return mejores[0].termino if mejores else None
+
+    def corregir(self, consulta: str) -> str:
+        """``consulta`` con cada palabra desconocida sustituida por su corrección."""
+
+        def sustituir(m: re.Match) -> str:
+            palabra = normalizar(m.group())
+            if not corregible(palabra) or palabra in self._ids:
+                return m.group()
+            return self.suggest_correction(palabra) or m.group()
+
+        return _PALABRA_RE.sub(sustituir, consulta)
+
+
+__all__ = [
+    "Correccion",
+    "Corrector",
+    "borrados",
+    "construir_corrector",
+    "contar_palabras",
+    "distancia",
+    "normalizar",
+]
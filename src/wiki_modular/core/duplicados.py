@@ -0,0 +1,361 @@
+"""Detección de páginas casi duplicadas con MinHash y LSH.
+
+Cada página se reduce al conjunto de sus *shingles*: secuencias de
+:data:`SHINGLE` palabras consecutivas en minúsculas y sin acentos, cada una
+resumida con un hash de 64 bits. La firma MinHash de la página es, para cada
+una de las :data:`NUM_PERM` funciones de hash, el mínimo sobre sus shingles;
+la fracción de posiciones en que coinciden dos firmas estima la similitud de
+Jaccard de los dos conjuntos. Todas las firmas de un lote se calculan con
+una sola operación de NumPy por bloque de shingles.
+
+Para no comparar todas las parejas, las firmas se cortan en
+:data:`BANDAS` bandas: dos páginas son candidatas si coinciden en alguna
+banda completa, lo que apenas deja escapar parejas por encima de
+:data:`UMBRAL`. Solo las candidatas se comparan. Las que superan el umbral
+forman componentes conexas, y cada componente se reparte en grupos alrededor
+de una página canónica: todas las páginas de un grupo superan el umbral
+respecto a su canónica.
+
+Las firmas se guardan en una caché indexada por el hash del contenido, así
+que en cada ejecución solo se calculan las de las páginas nuevas o
+modificadas (y una página movida de sección conserva la suya).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from wiki_modular.core.sweep import WILDCARD
+from wiki_modular.utils import plegar_acentos
+
+VERSION = 1
+SHINGLE = 5
+NUM_PERM = 128
+BANDAS = 32
+UMBRAL = 0.8
+SEMILLA = 1
+# Celdas ``permutaciones × shingles`` por bloque al calcular firmas
+MAX_CELDAS = 1 << 22
+# Carpetas cuyas páginas no se proponen como canónicas
+PROVISIONALES = (WILDCARD, "_deprecated")
+
+_PALABRA_RE = re.compile(r"\w+")
+# Base del hash polinómico de los shingles
+_BASE = np.uint64(1_000_003)
+_CACHE = 1 << 16
+
+
+@lru_cache(maxsize=_CACHE)
+def hash_palabra(palabra: str) -> int:
+    """CRC32 de ``palabra`` en minúsculas y sin acentos."""
+    return zlib.crc32(plegar_acentos(palabra.lower()).encode("utf-8"))
+
+
+def shingles(texto: str, k: int = SHINGLE) -> np.ndarray:
+    """Hashes (sin repetir) de las secuencias de ``k`` palabras de ``texto``.
+
+    Cada palabra se resume con :func:`hash_palabra` y cada secuencia combina
+    los hashes de sus palabras como un polinomio módulo ``2**64``. Un texto
+    con menos de ``k`` palabras forma un único shingle.
+    """
+    palabras = np.fromiter(
+        (hash_palabra(p) for p in _PALABRA_RE.findall(texto)), dtype=np.uint64
+    )
+    if not len(palabras):
+        return palabras
+    total = max(1, len(palabras) - k + 1)
+    hashes = np.zeros(total, dtype=np.uint64)
+    for desplazamiento in range(min(k, len(palabras))):
+        fin = desplazamiento + total
+        hashes = hashes * _BASE + palabras[desplazamiento:fin]
+    return np.unique(hashes)
+
+
+def hash_contenido(texto: str) -> str:
+    """Hash SHA-256 de ``texto``; es la clave de la caché de firmas."""
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+class MinHash:
+    """Familia de :data:`NUM_PERM` funciones *multiply-shift* ``(a·x + b) >> 32``.
+
+    Las operaciones son módulo ``2**64`` (el desbordamiento de ``uint64``), así
+    que no hace falta ninguna división; cada valor ocupa 32 bits.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, semilla: int = SEMILLA):
+        rng = np.random.default_rng(semilla)
+        self.num_perm = num_perm
+        maximo = np.iinfo(np.uint64).max
+        a = rng.integers(0, maximo, size=num_perm, dtype=np.uint64, endpoint=True)
+        b = rng.integers(0, maximo, size=num_perm, dtype=np.uint64, endpoint=True)
+        self._a = (a | np.uint64(1))[:, None]
+        self._b = b[:, None]
+
+    def firmas(self, conjuntos: Sequence[np.ndarray]) -> np.ndarray:
+        """Matriz ``len(conjuntos) × num_perm`` de firmas (``uint32``).
+
+        Los conjuntos no pueden estar vacíos. Se concatenan y se procesan por
+        bloques de páginas contiguas con hasta :data:`MAX_CELDAS` celdas; el
+        mínimo de cada página sale de ``np.minimum.reduceat``.
+        """
+        firmas = np.empty((len(conjuntos), self.num_perm), dtype=np.uint32)
+        limite = max(1, MAX_CELDAS // self.num_perm)
+        inicio = 0
+        while inicio < len(conjuntos):
+            fin = inicio + 1
+            total = len(conjuntos[inicio])
+            while fin < len(conjuntos) and total + len(conjuntos[fin]) <= limite:
+                total += len(conjuntos[fin])
+                fin += 1
+            bloque = conjuntos[inicio:fin]
+            valores = (self._a * np.concatenate(bloque) + self._b) >> np.uint64(32)
+            cortes = np.cumsum([0] + [len(c) for c in bloque[:-1]])
+            minimos = np.minimum.reduceat(valores.astype(np.uint32), cortes, axis=1)
+            firmas[inicio:fin] = minimos.T
+            inicio = fin
+        return firmas
+
+
+def pares_candidatos(firmas: np.ndarray, bandas: int = BANDAS) -> np.ndarray:
+    """Parejas ``(i, j)`` con ``i < j`` que coinciden en alguna banda completa."""
+    n, num_perm = firmas.shape
+    filas = num_perm // bandas
+    codigos: List[np.ndarray] = []
+    for banda in range(bandas):
+        desde = banda * filas
+        hasta = desde + filas
+        _, grupo, tamanos = np.unique(
+            firmas[:, desde:hasta], axis=0, return_inverse=True, return_counts=True
+        )
+        grupo = grupo.ravel()
+        # Solo interesan los cubos con más de una página
+        orden = np.flatnonzero(tamanos[grupo] > 1)
+        orden = orden[np.argsort(grupo[orden], kind="stable")]
+        limites = np.flatnonzero(np.diff(grupo[orden])) + 1
+        for cubo in np.split(orden, limites) if len(orden) else []:
+            i, j = np.triu_indices(len(cubo), 1)
+            codigos.append(cubo[i].astype(np.int64) * n + cubo[j])
+    if not codigos:
+        return np.zeros((0, 2), dtype=np.int64)
+    unicos = np.unique(np.concatenate(codigos))
+    return np.stack([unicos // n, unicos % n], axis=1)
+
+
+def similitud_estimada(firmas: np.ndarray, pares: np.ndarray) -> np.ndarray:
+    """Jaccard estimado de cada pareja: fracción de posiciones iguales en sus firmas."""
+    if not len(pares):
+        return np.zeros(0)
+    return (firmas[pares[:, 0]] == firmas[pares[:, 1]]).mean(axis=1)
+
+
+class FirmasCache:
+    """Caché persistente ``hash del contenido → firma`` en un ``.npz``.
+
+    Igual que :class:`~wiki_modular.core.ingest.RoutingCache`, guarda una
+    huella de los parámetros; si no coincide con la actual se descarta. Al
+    guardar solo se conservan las firmas usadas en la ejecución, de modo que
+    las de contenidos que ya no existen no se acumulan.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self._firmas: Dict[str, np.ndarray] = {}
+        self._usadas: Dict[str, np.ndarray] = {}
+        if path.exists():
+            try:
+                with np.load(path, allow_pickle=False) as data:
+                    if str(data["fingerprint"]) == fingerprint:
+                        claves = data["hashes"].tolist()
+                        self._firmas = dict(zip(claves, data["firmas"]))
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning("Caché de firmas ilegible %s: %s", path, e)
+
+    def get(self, clave: str) -> Optional[np.ndarray]:
+        """Firma guardada para ``clave`` o ``None``."""
+        firma = self._firmas.get(clave)
+        if firma is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._usadas[clave] = firma
+        return firma
+
+    def set(self, clave: str, firma: np.ndarray) -> None:
+        """Registra la firma calculada para ``clave``."""
+        self._firmas[clave] = self._usadas[clave] = firma
+
+    def save(self) -> None:
+        """Escribe en disco las firmas usadas en esta ejecución."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        claves = sorted(self._usadas)
+        firmas = (
+            np.stack([self._usadas[c] for c in claves])
+            if claves
+            else np.zeros((0, 0), dtype=np.uint32)
+        )
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                fingerprint=np.array(self.fingerprint),
+                hashes=np.array(claves, dtype=str),
+                firmas=firmas,
+            )
+        os.replace(tmp, self.path)
+
+
+def huella_firmas(
+    num_perm: int = NUM_PERM, shingle: int = SHINGLE, semilla: int = SEMILLA
+) -> str:
+    """Huella de los parámetros de los que dependen las firmas."""
+    return f"{VERSION}:{num_perm}:{shingle}:{semilla}"
+
+
+@dataclass(frozen=True)
+class Grupo:
+    """Páginas casi duplicadas y la página propuesta como canónica."""
+
+    canonica: str
+    # ``(ruta, Jaccard estimado con la canónica)`` de mayor a menor
+    duplicadas: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def paginas(self) -> List[str]:
+        return [self.canonica] + [r for r, _ in self.duplicadas]
+
+
+def _componentes(n: int, pares: np.ndarray) -> List[List[int]]:
+    """Componentes conexas (con más de un elemento) del grafo de ``pares``."""
+    padre = list(range(n))
+
+    def raiz(i: int) -> int:
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    for i, j in pares.tolist():
+        ri, rj = raiz(i), raiz(j)
+        if ri != rj:
+            padre[max(ri, rj)] = min(ri, rj)
+    grupos: Dict[int, List[int]] = {}
+    for i in range(n):
+        grupos.setdefault(raiz(i), []).append(i)
+    return [g for g in grupos.values() if len(g) > 1]
+
+
+def prioridad_canonica(ruta: str, tamano: int) -> Tuple[bool, int, int, str]:
+    """Clave de orden: la menor es la página que conviene conservar.
+
+    Se prefieren las páginas fuera de :data:`PROVISIONALES`, después las de
+    más contenido (``tamano`` en caracteres) y las menos anidadas.
+    """
+    partes = Path(ruta).parts
+    provisional = any(p in PROVISIONALES for p in partes)
+    return provisional, -tamano, len(partes), ruta
+
+
+def buscar_duplicados(
+    paginas: Mapping[str, Mapping[str, Any]],
+    *,
+    umbral: float = UMBRAL,
+    num_perm: int = NUM_PERM,
+    bandas: int = BANDAS,
+    shingle: int = SHINGLE,
+    cache: Optional[FirmasCache] = None,
+) -> Tuple[List[Grupo], int]:
+    """Grupos de páginas con Jaccard estimado de al menos ``umbral`` con su canónica.
+
+    Devuelve ``(grupos, calculadas)``, con ``calculadas`` el número de firmas
+    que no estaban en ``cache``. Los grupos se ordenan de mayor a menor.
+    """
+    if num_perm % bandas:
+        raise ValueError(
+            f"num_perm ({num_perm}) debe ser múltiplo de bandas ({bandas})"
+        )
+    minhash = MinHash(num_perm)
+    rutas: List[str] = []
+    claves: List[str] = []
+    tamanos: List[int] = []
+    firmas: List[Optional[np.ndarray]] = []
+    pendientes: List[int] = []
+    conjuntos: List[np.ndarray] = []
+    for ruta, info in paginas.items():
+        texto = str(info.get("content") or "")
+        clave = hash_contenido(texto)
+        firma = cache.get(clave) if cache is not None else None
+        if firma is None:
+            conjunto = shingles(texto, shingle)
+            if not len(conjunto):
+                continue
+            pendientes.append(len(rutas))
+            conjuntos.append(conjunto)
+        rutas.append(ruta)
+        claves.append(clave)
+        tamanos.append(len(texto))
+        firmas.append(firma)
+    if conjuntos:
+        for i, firma in zip(pendientes, minhash.firmas(conjuntos)):
+            firmas[i] = firma
+            if cache is not None:
+                cache.set(claves[i], firma)
+    if not rutas:
+        return [], 0
+
+    matriz = np.stack(firmas)
+    pares = pares_candidatos(matriz, bandas)
+    pares = pares[similitud_estimada(matriz, pares) >= umbral]
+
+    grupos = []
+    for miembros in _componentes(len(rutas), pares):
+        # Una cadena A~B~C no implica A~C: cada grupo se forma alrededor de
+        # su canónica solo con las páginas que superan el umbral respecto a
+        # ella; el resto de la componente vuelve a agruparse aparte.
+        restantes = sorted(
+            miembros, key=lambda i: prioridad_canonica(rutas[i], tamanos[i])
+        )
+        while len(restantes) > 1:
+            canonica, otros = restantes[0], np.array(restantes[1:])
+            sims = (matriz[otros] == matriz[canonica]).mean(axis=1)
+            cerca = sims >= umbral
+            if cerca.any():
+                duplicadas = sorted(
+                    (
+                        (rutas[i], round(float(s), 3))
+                        for i, s in zip(otros[cerca].tolist(), sims[cerca])
+                    ),
+                    key=lambda d: (-d[1], d[0]),
+                )
+                grupos.append(Grupo(rutas[canonica], duplicadas))
+            restantes = otros[~cerca].tolist()
+    grupos.sort(key=lambda g: (-len(g.duplicadas), g.canonica))
+    return grupos, len(conjuntos)
+
+
+__all__ = [
+    "FirmasCache",
+    "Grupo",
+    "MinHash",
+    "buscar_duplicados",
+    "hash_contenido",
+    "hash_palabra",
+    "huella_firmas",
+    "pares_candidatos",
+    "prioridad_canonica",
+    "shingles",
+    "similitud_estimada",
+]
@@ -0,0 +1,183 @@
+"""Facetas de los metadatos del frontmatter como mapas de bits.
+
+Al generar el índice se guarda, para cada campo de :data:`CAMPOS` y cada uno
+de sus valores, el conjunto de páginas con ese valor como un mapa de bits en
+base64: el bit ``i % 8`` del byte ``i // 8`` corresponde a la página ``i`` en
+el orden de ``search_index.json``, que es también el de los índices BM25 y
+lunr. Un filtro es el AND de los campos pedidos, cada uno el OR de los
+valores aceptados, y se aplica a los resultados de texto completo sin leer
+los metadatos de cada página. El archivo guarda la lista de páginas
+(``docs``) para comprobar que corresponde al índice con el que se usa.
+``docs/buscar-worker.js`` usa el mismo archivo y localiza cada página por su
+ruta.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+# Metadatos que escribe ``ingest_wiki_v2.py --metadata``
+CAMPOS = ("source_file", "source_file_date", "conversion_date", "nivel")
+VERSION = 1
+
+
+def valor_faceta(meta: Mapping[str, Any], campo: str) -> Optional[str]:
+    """Valor de ``campo`` en ``meta`` como texto (``None`` si falta o está vacío)."""
+    valor = meta.get(campo)
+    if valor is None or valor == "":
+        return None
+    return str(valor)
+
+
+def codificar_bits(docs: Iterable[int], total: int) -> str:
+    """Mapa de bits en base64 con los documentos ``docs`` de ``total``."""
+    bits = np.zeros(total, dtype=bool)
+    bits[list(docs)] = True
+    data = np.packbits(bits, bitorder="little").tobytes()
+    return base64.b64encode(data).decode("ascii")
+
+
+def construir_facetas(
+    indice: Mapping[str, Mapping[str, Any]], campos: Iterable[str] = CAMPOS
+) -> Dict[str, Any]:
+    """Mapas de bits ``{campo: {valor: bits}}`` serializables para ``indice``."""
+    rutas = list(indice)
+    por_campo: Dict[str, Dict[str, List[int]]] = {campo: {} for campo in campos}
+    for doc, info in enumerate(indice.values()):
+        meta = info.get("metadata") or {}
+        for campo, valores in por_campo.items():
+            valor = valor_faceta(meta, campo)
+            if valor is not None:
+                valores.setdefault(valor, []).append(doc)
+    return {
+        "version": VERSION,
+        "docs": rutas,
+        "facets": {
+            campo: {
+                valor: codificar_bits(docs, len(rutas))
+                for valor, docs in sorted(valores.items())
+            }
+            for campo, valores in por_campo.items()
+        },
+    }
+
+
+@dataclass(frozen=True)
+class Rango:
+    """Valores entre ``desde`` y ``hasta``, ambos incluidos (``None`` sin límite).
+
+    Las fechas ISO (``2024-01-31``) se comparan correctamente como texto.
+    """
+
+    desde: Optional[str] = None
+    hasta: Optional[str] = None
+
+    def contiene(self, valor: str) -> bool:
+        return (self.desde is None or valor >= self.desde) and (
+            self.hasta is None or valor <= self.hasta
+        )
+
+
+Condicion = Union[str, Rango, Collection[str]]
+
+
+class Facetas:
+    """Filtros sobre los mapas de bits de :func:`construir_facetas`."""
+
+    def __init__(self, data: Mapping[str, Any]):
+        if data.get("version") != VERSION:
+            raise ValueError(f"Versión de facetas no soportada: {data.get('version')}")
+        self.rutas: List[str] = data["docs"]
+        self._facetas: Dict[str, Dict[str, str]] = data["facets"]
+        self._bytes = (len(self.rutas) + 7) // 8
+        self._cache: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @classmethod
+    def from_json(cls, path: Path) -> "Facetas":
+        """Carga los mapas de bits desde ``search_index.facets.json``."""
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    def __len__(self) -> int:
+        return len(self.rutas)
+
+    def comprobar_rutas(self, rutas: Sequence[str]) -> None:
+        """Lanza ``ValueError`` si las páginas no son ``rutas`` en el mismo orden.
+
+        Las máscaras se alinean por posición con el índice de búsqueda; unas
+        facetas de otra versión del índice filtrarían páginas equivocadas.
+        """
+        if len(rutas) != len(self.rutas) or any(
+            a != b for a, b in zip(rutas, self.rutas)
+        ):
+            raise ValueError(
+                "Las facetas no corresponden al índice de búsqueda; "
+                "regénerelas con generar_indice_busqueda.py"
+            )
+
+    def valores(self, campo: str) -> List[str]:
+        """Valores presentes de ``campo``, ordenados."""
+        return list(self._campo(campo))
+
+    def _campo(self, campo: str) -> Dict[str, str]:
+        if campo not in self._facetas:
+            raise ValueError(f"Faceta desconocida: {campo}")
+        return self._facetas[campo]
+
+    def bits(self, campo: str, valor: str) -> np.ndarray:
+        """Mapa de bits empaquetado (``uint8``) de las páginas con ``campo == valor``."""
+        clave = (campo, valor)
+        if clave not in self._cache:
+            codificado = self._campo(campo).get(valor)
+            if codificado is None:
+                self._cache[clave] = np.zeros(self._bytes, dtype=np.uint8)
+            else:
+                data = base64.b64decode(codificado)
+                self._cache[clave] = np.frombuffer(data, dtype=np.uint8)
+        return self._cache[clave]
+
+    def mascara(self, filtros: Mapping[str, Condicion]) -> np.ndarray:
+        """Máscara booleana por página de las que cumplen todos los ``filtros``.
+
+        Cada filtro asocia un campo a un valor exacto, a una colección de
+        valores aceptados o a un :class:`Rango`.
+        """
+        bits = np.full(self._bytes, 0xFF, dtype=np.uint8)
+        for campo, condicion in filtros.items():
+            if isinstance(condicion, Rango):
+                valores = [v for v in self._campo(campo) if condicion.contiene(v)]
+            elif isinstance(condicion, str):
+                valores = [condicion]
+            else:
+                valores = list(condicion)
+            union = np.zeros(self._bytes, dtype=np.uint8)
+            for valor in valores:
+                union |= self.bits(campo, valor)
+            bits &= union
+        return np.unpackbits(bits, count=len(self), bitorder="little").astype(bool)
+
+
+__all__ = [
+    "CAMPOS",
+    "Facetas",
+    "Rango",
+    "codificar_bits",
+    "construir_facetas",
+    "valor_faceta",
+]
@@ -0,0 +1,217 @@
+"""Índice invertido de trigramas para el *fuzzy matching* de títulos."""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+
+def trigramas(texto: str, n: int = 3) -> Set[str]:
+    """Devuelve los n-gramas de ``texto`` con un espacio de relleno a cada lado."""
+    return set(_ngramas(texto, n))
+
+
+def _ngramas(texto: str, n: int) -> Counter[str]:
+    """Multiconjunto de n-gramas de ``texto`` con relleno."""
+    padded = f" {texto} "
+    return Counter("".join(gram) for gram in zip(*(padded[k:] for k in range(n))))
+
+
+class TrigramIndex:
+    """Puntúa los candidatos en orden de una cota superior de la similitud.
+
+    Para cada candidato se acota cuántos caracteres pueden emparejarse con
+    la consulta de dos formas: por los caracteres en común (la misma cota
+    que :meth:`difflib.SequenceMatcher.quick_ratio`) y por los n-gramas en
+    común, ya que cada carácter borrado destruye a lo sumo ``n`` n-gramas
+    del candidato y cada insertado ``n - 1``. Los candidatos se revisan de
+    mayor a menor cota: la subsecuencia común más larga, calculada con
+    operaciones de bits, descarta la mayoría sin llegar a
+    :class:`~difflib.SequenceMatcher`, y la búsqueda se detiene cuando la
+    cota cae por debajo de ``cutoff`` o del peor de los ``n`` mejores
+    resultados, así que el resultado coincide siempre con
+    :func:`difflib.get_close_matches`.
+
+    Primero se revisa la lista corta de candidatos que comparten algún
+    n-grama con la consulta, obtenida de los *postings*. Un candidato sin
+    n-gramas en común puede seguir superando ``cutoff`` (con ``n = 3`` su
+    similitud llega hasta 0,8), pero su cota solo depende de su longitud:
+    el resto se revisa después, y solo para las longitudes cuya cota aún
+    alcanza el umbral. Cuando los mejores resultados de la lista corta lo
+    superan (lo habitual con erratas) no se toca ningún otro candidato; con
+    consultas que no se parecen a nada el recorrido sigue siendo lineal,
+    aunque vectorizado, porque es el precio de devolver exactamente lo mismo
+    que :mod:`difflib` (``benchmarks/bench_fuzzy.py`` muestra la fracción de
+    candidatos acotados por tipo de consulta).
+    """
+
+    def __init__(self, candidatos: Iterable[str], *, n: int = 3):
+        self.n = n
+        self.candidatos: List[str] = list(dict.fromkeys(candidatos))
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._alfabeto: Dict[str, int] = {}
+        conteos = []
+        for idx, cand in enumerate(self.candidatos):
+            for gram, veces in _ngramas(cand, n).items():
+                postings[gram].append((idx, veces))
+            conteos.append(
+                Counter(self._alfabeto.setdefault(c, len(self._alfabeto)) for c in cand)
+            )
+        # Por n-grama: candidatos que lo contienen y cuántas veces
+        self._postings: Dict[str, np.ndarray] = {
+            gram: np.array(lista, dtype=np.int64).T for gram, lista in postings.items()
+        }
+        self._longitudes = np.array([len(c) for c in self.candidatos], dtype=np.int64)
+        self._caracteres = np.zeros(
+            (len(self.candidatos), len(self._alfabeto)), dtype=np.int32
+        )
+        for fila, conteo in enumerate(conteos):
+            self._caracteres[fila, list(conteo)] = list(conteo.values())
+        # Candidatos agrupados por longitud, para acotar los que no comparten
+        # ningún n-grama con la consulta
+        orden = np.argsort(self._longitudes, kind="stable")
+        distintas, inicios = np.unique(self._longitudes[orden], return_index=True)
+        self._longitudes_distintas = distintas
+        self._por_longitud = np.split(orden, inicios[1:])
+        #: Candidatos acotados en la última consulta (para los benchmarks)
+        self.acotados = 0
+
+    def __len__(self) -> int:
+        return len(self.candidatos)
+
+    def close_matches(self, word: str, n: int = 3, cutoff: float = 0.6) -> List[str]:
+        """Equivalente a :func:`difflib.get_close_matches` sobre el índice."""
+        return [x for score, x in self.scored_matches(word, n, cutoff)]
+
+    def scored_matches(
+        self, word: str, n: int = 3, cutoff: float = 0.6
+    ) -> List[Tuple[float, str]]:
+        """Como :meth:`close_matches` pero devolviendo ``(similitud, candidato)``."""
+        if not n > 0:
+            raise ValueError("n must be > 0: %r" % (n,))
+        if not 0.0 <= cutoff <= 1.0:
+            raise ValueError("cutoff must be in [0.0, 1.0]: %r" % (cutoff,))
+        self.acotados = 0
+        if not self.candidatos:
+            return []
+
+        propios = self._propios(word)
+        mascaras: Dict[str, int] = defaultdict(int)
+        for pos, c in enumerate(word):
+            mascaras[c] |= 1 << pos
+        mejores: List[Tuple[float, str]] = []
+        umbral = cutoff
+        s = SequenceMatcher()
+        s.set_seq2(word)
+
+        def revisar(idxs: np.ndarray, comunes: np.ndarray) -> None:
+            nonlocal umbral
+            self.acotados += len(idxs)
+            cotas = self._cotas(idxs, comunes, len(word), propios)
+            orden = np.argsort(-cotas, kind="stable")
+            for cota, idx in zip(cotas[orden].tolist(), idxs[orden].tolist()):
+                if cota < umbral:
+                    break
+                x = self.candidatos[idx]
+                total = len(x) + len(word)
+                # Dos cadenas vacías son idénticas (ratio 1.0, como en difflib)
+                if total and 2.0 * _lcs(x, mascaras, len(word)) / total < umbral:
+                    continue
+                s.set_seq1(x)
+                if s.ratio() >= umbral:
+                    if len(mejores) < n:
+                        heapq.heappush(mejores, (s.ratio(), x))
+                    else:
+                        heapq.heappushpop(mejores, (s.ratio(), x))
+                    if len(mejores) == n:
+                        umbral = max(cutoff, mejores[0][0])
+
+        corta, comunes = self._comunes(word)
+        revisar(corta, comunes)
+
+        # Resto: sin n-gramas en común, la cota depende solo de la longitud
+        longitudes = self._longitudes_distintas
+        sin_comunes = np.zeros(len(longitudes), dtype=np.int64)
+        cotas = self._cota(
+            np.minimum(longitudes, len(word)), longitudes, sin_comunes, len(word)
+        )
+        validas = np.flatnonzero(cotas >= umbral)
+        if validas.size:
+            resto = np.concatenate([self._por_longitud[i] for i in validas.tolist()])
+            resto = resto[np.isin(resto, corta, invert=True)]
+            revisar(resto, np.zeros(len(resto), dtype=np.int64))
+        return sorted(mejores, reverse=True)
+
+    def cotas(self, word: str) -> np.ndarray:
+        """Máximo de ``SequenceMatcher(None, candidato, word).ratio()`` por candidato."""
+        todos = np.arange(len(self.candidatos))
+        comunes = np.zeros(len(self.candidatos), dtype=np.int64)
+        corta, en_corta = self._comunes(word)
+        comunes[corta] = en_corta
+        return self._cotas(todos, comunes, len(word), self._propios(word))
+
+    def _comunes(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Candidatos con algún n-grama de ``word`` y cuántos comparten."""
+        partes = [
+            (self._postings[gram], veces)
+            for gram, veces in _ngramas(word, self.n).items()
+            if gram in self._postings
+        ]
+        if not partes:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        idxs = np.concatenate([p[0] for p, _ in partes])
+        veces = np.concatenate([np.minimum(p[1], v) for p, v in partes])
+        corta, inversa = np.unique(idxs, return_inverse=True)
+        return corta, np.bincount(inversa, weights=veces).astype(np.int64)
+
+    def _propios(self, word: str) -> np.ndarray:
+        """Veces que aparece en ``word`` cada carácter del alfabeto del índice."""
+        propios = np.zeros(len(self._alfabeto), dtype=np.int32)
+        for c, veces in Counter(word).items():
+            if c in self._alfabeto:
+                propios[self._alfabeto[c]] = veces
+        return propios
+
+    def _cotas(
+        self, idxs: np.ndarray, comunes: np.ndarray, b: int, propios: np.ndarray
+    ) -> np.ndarray:
+        """Cota de la similitud de los candidatos ``idxs`` con ``comunes`` n-gramas."""
+        por_caracteres = np.minimum(self._caracteres[idxs], propios).sum(axis=1)
+        return self._cota(por_caracteres, self._longitudes[idxs], comunes, b)
+
+    def _cota(
+        self, por_caracteres: np.ndarray, a: np.ndarray, comunes: np.ndarray, b: int
+    ) -> np.ndarray:
+        """Combina la cota por caracteres con la de n-gramas en común."""
+        q = self.n
+        ngramas_a = np.maximum(a + 3 - q, 0)
+        ngramas_b = max(b + 3 - q, 0)
+        por_ngramas = np.minimum(
+            (comunes - ngramas_a + q * a + (q - 1) * b) // (2 * q - 1),
+            (comunes - ngramas_b + q * b + (q - 1) * a) // (2 * q - 1),
+        )
+        emparejables = np.maximum(np.minimum(por_caracteres, por_ngramas), 0)
+        total = a + b
+        return np.where(total > 0, 2.0 * emparejables / np.maximum(total, 1), 1.0)
+
+
+def _lcs(a: str, mascaras: Dict[str, int], longitud: int) -> int:
+    """Longitud de la subsecuencia común más larga (algoritmo de bits paralelos).
+
+    ``mascaras`` indica, para cada carácter, las posiciones en que aparece en
+    el otro texto, de longitud ``longitud``. Es una cota superior de los
+    caracteres que empareja :class:`~difflib.SequenceMatcher`.
+    """
+    todos = (1 << longitud) - 1
+    v = todos
+    for c in a:
+        u = v & mascaras.get(c, 0)
+        v = ((v + u) | (v - u)) & todos
+    return longitud - bin(v).count("1")
+
+
+__all__ = ["TrigramIndex", "trigramas"]
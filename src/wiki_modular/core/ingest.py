@@ -1,49 +1,227 @@
 """Funciones comunes utilizadas durante la ingesta de la wiki."""
 
 import csv
+import hashlib
+import json
 import logging
 import re
 import unicodedata
-from difflib import get_close_matches
+from collections import Counter
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import yaml
 
 from wiki_modular import limpiar_slug
+from wiki_modular.core.alias import AliasMatcher
+from wiki_modular.core.fuzzy import TrigramIndex
+from wiki_modular.core.routing import RouteTable
 
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
 
+WIKI_BASE = Path("wiki")
+ROUTING_CACHE_VERSION = 2
+
+
+def huella_routing(*paths: Path, cutoff: float) -> str:
+    """Hash SHA-256 de ``paths`` (si existen) y ``cutoff``.
+
+    Sirve para invalidar :class:`RoutingCache` cuando cambia el índice, el
+    archivo de alias o el umbral de *fuzzy matching*.
+    """
+    h = hashlib.sha256(f"v{ROUTING_CACHE_VERSION}|{cutoff!r}".encode())
+    for path in paths:
+        h.update(b"\0" + str(path).encode())
+        if path.exists():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+class RoutingCache:
+    """Memo persistente ``título normalizado → destino`` entre ingestas.
+
+    El archivo JSON guarda la huella calculada con :func:`huella_routing`;
+    si no coincide con la actual el contenido previo se descarta.
+    """
+
+    def __init__(self, path: Path, fingerprint: str):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self._rutas: dict[str, Optional[str]] = {}
+        self._dirty = False
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logging.warning("Caché de rutas ilegible %s: %s", path, e)
+                data = {}
+            if data.get("fingerprint") == fingerprint:
+                self._rutas = data.get("rutas", {})
+            else:
+                self._dirty = True
+
+    def get(self, clave: str) -> Tuple[bool, Optional[Path]]:
+        """Devuelve ``(encontrado, ruta)``; ``ruta`` es ``None`` si no hubo match."""
+        if clave not in self._rutas:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        ruta = self._rutas[clave]
+        return True, Path(ruta) if ruta is not None else None
+
+    def set(self, clave: str, ruta: Optional[Path]) -> None:
+        """Registra el destino resuelto para ``clave``."""
+        self._rutas[clave] = ruta.as_posix() if ruta is not None else None
+        self._dirty = True
+
+    def save(self) -> None:
+        """Escribe la caché en disco si ha cambiado."""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"fingerprint": self.fingerprint, "rutas": self._rutas}
+        self.path.write_text(
+            json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8"
+        )
+        self._dirty = False
+
+
+class DestinationResolver:
+    """Resuelve la ruta destino de cada bloque con una tabla precompilada.
+
+    La tabla de rutas se construye una sola vez por ejecución. Los títulos
+    cuyo slug coincide exactamente con una entrada del índice se resuelven
+    en O(1); solo el resto pasa por el *fuzzy matching*, que usa un
+    :class:`~wiki_modular.core.fuzzy.TrigramIndex` en lugar de recorrer
+    todos los candidatos. Con ``cache`` los títulos ya resueltos en una
+    ingesta anterior no se vuelven a puntuar.
+
+    Los alias se comprueban antes que el índice mediante
+    :class:`~wiki_modular.core.alias.AliasMatcher`. ``estadisticas`` cuenta
+    cuántos títulos se resolvieron por alias, por coincidencia exacta, por
+    *fuzzy matching*, desde la caché o quedaron sin destino.
+
+    Las rutas se generan bajo ``wiki_dir``; los alias que apuntan a
+    ``wiki/...`` se reubican allí para poder construir en un directorio de
+    staging. La caché guarda rutas relativas a ``wiki_dir``.
+    """
+
+    def __init__(
+        self,
+        index_data: dict,
+        alias_map: Optional[Union[dict, AliasMatcher]] = None,
+        fuzzy_cutoff: float = 0.5,
+        *,
+        routes: Optional[RouteTable] = None,
+        cache: Optional[RoutingCache] = None,
+        wiki_dir: Path = WIKI_BASE,
+    ):
+        self.wiki_dir = Path(wiki_dir)
+        self.routes = routes if routes is not None else RouteTable(index_data)
+        self.cache = cache
+        self.alias = (
+            alias_map
+            if isinstance(alias_map, AliasMatcher)
+            else AliasMatcher(alias_map)
+        )
+        self.alias_map = self.alias.alias_map
+        self.estadisticas: Counter[str] = Counter()
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.ruta_map: dict[str, Path] = {
+            clave: self.wiki_dir / route.ruta
+            for clave, route in self.routes.claves.items()
+        }
+        self.candidatos: list[str] = self.routes.candidatos
+        self.fuzzy = TrigramIndex(self.candidatos)
+
+    def resolve(self, titulo: str) -> Optional[Path]:
+        """Determina la ruta destino para ``titulo`` o ``None`` si no hay match."""
+        return self.resolve_con_candidatos(titulo, n=1)[0]
+
+    def resolve_con_candidatos(
+        self, titulo: str, n: int = 3
+    ) -> Tuple[Optional[Path], List[Tuple[float, Path]]]:
+        """Como :meth:`resolve`, devolviendo también los ``n`` mejores candidatos.
+
+        Si hay destino, los candidatos ``(similitud, ruta)`` son solo el
+        elegido: la búsqueda se poda con ``fuzzy_cutoff`` y se detiene en el
+        mejor. Solo para los títulos sin destino se buscan además los ``n``
+        mejores aunque no alcancen ``fuzzy_cutoff``, para encolarlos para
+        revisión. Si el destino viene de un alias no se puntúa.
+        """
+        if titulo in self.alias_map:
+            self.estadisticas["alias"] += 1
+            return self._en_wiki(Path(self.alias_map[titulo])), []
+        titulo_norm = limpiar_slug(titulo)
+        destino = self.alias.match_slug(titulo_norm)
+        if destino is not None:
+            self.estadisticas["alias"] += 1
+            return self._en_wiki(destino), []
+
+        encontrado, destino = (
+            self.cache.get(titulo_norm) if self.cache is not None else (False, None)
+        )
+        puntuados: List[Tuple[float, Path]] = []
+        if encontrado:
+            self.estadisticas["cache"] += 1
+            if destino is not None:
+                destino = self.wiki_dir / destino
+            elif n > 1:
+                puntuados = self.puntuar(titulo, n=n)
+        else:
+            puntuados = self.puntuar(titulo, cutoff=self.fuzzy_cutoff)
+            if puntuados:
+                destino = puntuados[0][1]
+                exacto = puntuados[0][0] == 1.0 and titulo_norm in self.ruta_map
+                self.estadisticas["exacto" if exacto else "fuzzy"] += 1
+            elif n > 1:
+                puntuados = self.puntuar(titulo, n=n)
+            if self.cache is not None:
+                self.cache.set(
+                    titulo_norm,
+                    destino.relative_to(self.wiki_dir) if destino is not None else None,
+                )
+        if destino is not None:
+            return destino, puntuados
+
+        self.estadisticas["sin_match"] += 1
+        logging.warning("No match para '%s' → normalizado: '%s'", titulo, titulo_norm)
+        return None, puntuados
+
+    def _en_wiki(self, ruta: Path) -> Path:
+        """Reubica bajo ``wiki_dir`` un alias escrito como ``wiki/...``."""
+        if self.wiki_dir == WIKI_BASE or ruta.parts[:1] != WIKI_BASE.parts:
+            return ruta
+        return self.wiki_dir.joinpath(*ruta.parts[1:])
+
+    def puntuar(
+        self, titulo: str, n: int = 1, cutoff: float = 0.0
+    ) -> List[Tuple[float, Path]]:
+        """Devuelve hasta ``n`` destinos ``(similitud, ruta)`` ignorando alias.
+
+        Una coincidencia exacta del slug se devuelve sola con similitud ``1.0``.
+        """
+        titulo_norm = limpiar_slug(titulo)
+        exacto = self.ruta_map.get(titulo_norm)
+        if exacto is not None:
+            return [(1.0, exacto)]
+        return [
+            (score, self.ruta_map[clave])
+            for score, clave in self.fuzzy.scored_matches(titulo_norm, n, cutoff)
+        ]
+
 
 def buscar_destino(
     titulo: str, index_data: dict, alias_map: dict, fuzzy_cutoff: float
-) -> Path:
-    """Determina la ruta destino para un bloque de contenido."""
-    if titulo in alias_map:
-        return Path(alias_map[titulo])
-
-    ruta_map: dict[str, Path] = {}
-    candidatos: list[str] = []
-    for sec in index_data.get("secciones", []):
-        sec_titulo = sec.get("titulo", "")
-        sec_slug = sec.get("slug", limpiar_slug(sec_titulo))
-        id_prefix = f"{sec.get('id')}_{sec_slug}" if "id" in sec else sec_slug
-        key_sec = limpiar_slug(sec_titulo)
-        ruta_map[key_sec] = Path(f"wiki/{id_prefix}.md")
-        candidatos.append(key_sec)
-        for sub in sec.get("subtemas", []):
-            key_sub = limpiar_slug(sub)
-            carpeta = "02_Instancias_SQL" if "sql" in key_sub else sec_slug
-            ruta_map[key_sub] = Path(f"wiki/{carpeta}/{limpiar_slug(sub)}.md")
-            candidatos.append(key_sub)
-
-    titulo_norm = limpiar_slug(titulo)
-    match = get_close_matches(titulo_norm, candidatos, n=1, cutoff=fuzzy_cutoff)
-    if match:
-        return ruta_map[match[0]]
-
-    logging.warning("No match para '%s' → normalizado: '%s'", titulo, titulo_norm)
-    return None
+) -> Optional[Path]:
+    """Determina la ruta destino para un bloque de contenido.
+
+    Atajo para llamadas sueltas; en bucles conviene reutilizar un
+    :class:`DestinationResolver`.
+    """
+    return DestinationResolver(index_data, alias_map, fuzzy_cutoff).resolve(titulo)
 
 
 def limpiar_nombre_archivo(texto: str) -> str:
@@ -64,7 +242,11 @@ def limpiar_nombre_archivo(texto: str) -> str:
 
 
 def append_suggestion(path: Path, titulo: str, slug: str) -> None:
-    """Guarda ``titulo`` y ``slug`` en ``path`` si es posible."""
+    """Guarda ``titulo`` y ``slug`` en ``path`` si es posible.
+
+    Reescribe el archivo en cada llamada; en bucles conviene usar
+    :class:`SuggestionQueue`.
+    """
     try:
         if path.suffix.lower() in {".yaml", ".yml"}:
             data: dict[str, Any] = {}
@@ -86,4 +268,137 @@ def append_suggestion(path: Path, titulo: str, slug: str) -> None:
         logging.error("No se pudo actualizar %s: %s", path, e)
 
 
-__all__ = ["buscar_destino", "limpiar_nombre_archivo", "append_suggestion"]
+class SuggestionQueue:
+    """Cola de revisión de títulos sin coincidencia.
+
+    Los títulos se acumulan en memoria durante la ingesta y :meth:`flush`
+    lee y escribe el archivo una sola vez, omitiendo los que ya figuran en
+    él. Cada entrada guarda el slug propuesto, el destino provisional y los
+    mejores candidatos del índice con su similitud, con rutas relativas a
+    ``wiki_dir`` para que :mod:`reubicar_nuevas_secciones` no tenga que
+    volver a puntuar.
+    """
+
+    def __init__(self, path: Path, *, wiki_dir: Path = WIKI_BASE):
+        self.path = path
+        self.wiki_dir = Path(wiki_dir)
+        self.pendientes: Dict[str, dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.pendientes)
+
+    def _relativa(self, ruta: Optional[Path]) -> Optional[str]:
+        if ruta is None:
+            return None
+        try:
+            return Path(ruta).relative_to(self.wiki_dir).as_posix()
+        except ValueError:
+            return Path(ruta).as_posix()
+
+    def add(
+        self,
+        titulo: str,
+        slug: str,
+        *,
+        destino: Optional[Path] = None,
+        candidatos: Iterable[Tuple[float, Path]] = (),
+    ) -> None:
+        """Encola ``titulo`` si no estaba ya en esta ejecución."""
+        if titulo in self.pendientes:
+            return
+        self.pendientes[titulo] = {
+            "slug": slug,
+            "destino": self._relativa(destino),
+            "candidatos": [
+                {"ruta": self._relativa(ruta), "score": round(float(score), 4)}
+                for score, ruta in candidatos
+            ],
+        }
+
+    def flush(self) -> int:
+        """Escribe las entradas nuevas y devuelve cuántas se añadieron."""
+        if not self.pendientes:
+            return 0
+        try:
+            existentes = leer_sugerencias(self.path)
+            nuevas = {t: e for t, e in self.pendientes.items() if t not in existentes}
+            if nuevas:
+                _escribir_sugerencias(self.path, {**existentes, **nuevas})
+        except Exception as e:  # pragma: no cover - solo logueo
+            logging.error("No se pudo actualizar %s: %s", self.path, e)
+            return 0
+        self.pendientes.clear()
+        return len(nuevas)
+
+
+def _es_yaml(path: Path) -> bool:
+    return path.suffix.lower() in {".yaml", ".yml"}
+
+
+def leer_sugerencias(path: Path) -> Dict[str, dict[str, Any]]:
+    """Lee la cola de revisión (CSV o YAML) escrita por :class:`SuggestionQueue`.
+
+    Acepta también el formato antiguo con solo ``titulo`` y ``slug``.
+    """
+    if not path.exists():
+        return {}
+    entradas: Dict[str, dict[str, Any]] = {}
+    if _es_yaml(path):
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        for titulo, valor in data.items():
+            entrada = valor if isinstance(valor, dict) else {"slug": valor}
+            entradas[titulo] = {
+                "slug": entrada.get("slug"),
+                "destino": entrada.get("destino"),
+                "candidatos": entrada.get("candidatos") or [],
+            }
+        return entradas
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            candidatos = []
+            i = 1
+            while row.get(f"candidato_{i}"):
+                candidatos.append(
+                    {"ruta": row[f"candidato_{i}"], "score": float(row[f"score_{i}"])}
+                )
+                i += 1
+            entradas[row["titulo"]] = {
+                "slug": row.get("slug"),
+                "destino": row.get("destino") or None,
+                "candidatos": candidatos,
+            }
+    return entradas
+
+
+def _escribir_sugerencias(path: Path, entradas: Dict[str, dict[str, Any]]) -> None:
+    if _es_yaml(path):
+        path.write_text(
+            yaml.safe_dump(entradas, allow_unicode=True, sort_keys=False),
+            encoding="utf-8",
+        )
+        return
+    # Una pareja de columnas candidato_i/score_i por candidato
+    columnas = max((len(e["candidatos"]) for e in entradas.values()), default=0)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        cabecera = ["titulo", "slug", "destino"]
+        for i in range(1, columnas + 1):
+            cabecera += [f"candidato_{i}", f"score_{i}"]
+        writer.writerow(cabecera)
+        for titulo, e in entradas.items():
+            fila = [titulo, e["slug"], e["destino"] or ""]
+            for c in e["candidatos"]:
+                fila += [c["ruta"], c["score"]]
+            writer.writerow(fila)
+
+
+__all__ = [
+    "RoutingCache",
+    "huella_routing",
+    "DestinationResolver",
+    "buscar_destino",
+    "limpiar_nombre_archivo",
+    "append_suggestion",
+    "SuggestionQueue",
+    "leer_sugerencias",
+]
@@ -0,0 +1,303 @@
+"""Escritura en streaming de objetos JSON grandes.
+
+Las entradas se codifican y escriben de una en una en un archivo temporal
+que se renombra al terminar, de modo que nunca se construye el JSON completo
+como cadena y los lectores nunca ven un archivo a medio escribir. En la
+misma pasada pueden generarse variantes precomprimidas ``.gz`` y ``.br``.
+
+:class:`Volcado` guarda en disco las entradas que se escriben (o las de un
+JSON ya escrito, leído por bloques con :func:`iter_json_crudo`) para poder
+recorrerlas de nuevo, por ejemplo al construir los índices derivados, sin
+tenerlas todas en memoria.
+"""
+
+from __future__ import annotations
+
+import gzip as gzip_mod
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+
+class _Salida:
+    """Archivo temporal junto a ``destino`` que se renombra con :meth:`commit`."""
+
+    def __init__(self, destino: Path):
+        self.destino = destino
+        fd, tmp = tempfile.mkstemp(
+            prefix=f".{destino.name}.", suffix=".tmp", dir=destino.parent
+        )
+        self.tmp = Path(tmp)
+        self.fh: BinaryIO = os.fdopen(fd, "wb")
+
+    def commit(self) -> None:
+        self.fh.close()
+        # ``mkstemp`` crea el archivo con permisos 0600; se publican legibles
+        try:
+            modo = self.destino.stat().st_mode & 0o777
+        except FileNotFoundError:
+            modo = 0o644
+        os.chmod(self.tmp, modo)
+        os.replace(self.tmp, self.destino)
+
+    def abort(self) -> None:
+        self.fh.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def _compresor_brotli() -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    try:
+        import brotli  # type: ignore
+    except ImportError as exc:  # pragma: no cover - depende del entorno
+        raise RuntimeError(
+            "La variante .br requiere el paquete 'brotli' (pip install brotli)"
+        ) from exc
+    comp = brotli.Compressor()
+    return comp.process, comp.finish
+
+
+def escribir_bytes(destino: Path, data: bytes) -> None:
+    """Escribe ``data`` en ``destino`` de forma atómica."""
+    salida = _Salida(Path(destino))
+    try:
+        salida.fh.write(data)
+    except BaseException:
+        salida.abort()
+        raise
+    salida.commit()
+
+
+def escribir_json(
+    items: Iterable[Tuple[str, Any]],
+    destino: Path,
+    *,
+    compact: bool = False,
+    gzip: bool = False,
+    brotli: bool = False,
+) -> int:
+    """Escribe el objeto ``{clave: valor}`` de ``items`` en ``destino``.
+
+    Sin ``compact`` el resultado es idéntico a ``json.dumps(..., indent=2)``;
+    con ``compact`` se omiten sangrías y espacios. ``gzip`` y ``brotli``
+    escriben además ``destino.gz`` y ``destino.br``. Devuelve los bytes del
+    JSON sin comprimir.
+    """
+    destino = Path(destino)
+    salidas: List[_Salida] = [_Salida(destino)]
+    escritores: List[Callable[[bytes], Any]] = [salidas[0].fh.write]
+    cierres: List[Callable[[], Any]] = []
+    try:
+        if gzip:
+            salida = _Salida(destino.with_name(destino.name + ".gz"))
+            salidas.append(salida)
+            gz = gzip_mod.GzipFile(filename="", mode="wb", fileobj=salida.fh, mtime=0)
+            escritores.append(gz.write)
+            cierres.append(gz.close)
+        if brotli:
+            salida = _Salida(destino.with_name(destino.name + ".br"))
+            salidas.append(salida)
+            procesar, terminar = _compresor_brotli()
+            fh = salida.fh
+            escritores.append(lambda data: fh.write(procesar(data)))
+            cierres.append(lambda: fh.write(terminar()))
+
+        total = 0
+
+        def emitir(texto: str) -> None:
+            nonlocal total
+            data = texto.encode("utf-8")
+            total += len(data)
+            for escribir in escritores:
+                escribir(data)
+
+        if compact:
+            separadores = (",", ":")
+            apertura, sep_items, cierre = "{", ",", "}"
+        else:
+            separadores = (",", ": ")
+            apertura, sep_items, cierre = "{\n  ", ",\n  ", "\n}"
+
+        vacio = True
+        for clave, valor in items:
+            emitir(apertura if vacio else sep_items)
+            vacio = False
+            valor_json = json.dumps(
+                valor,
+                ensure_ascii=False,
+                indent=None if compact else 2,
+                separators=separadores,
+            )
+            if not compact:
+                # Las cadenas JSON no contienen saltos de línea sin escapar
+                valor_json = valor_json.replace("\n", "\n  ")
+            emitir(json.dumps(clave, ensure_ascii=False) + separadores[1] + valor_json)
+        emitir("{}" if vacio else cierre)
+
+        for cerrar in cierres:
+            cerrar()
+    except BaseException:
+        for salida in salidas:
+            salida.abort()
+        raise
+    for salida in salidas:
+        salida.commit()
+    return total
+
+
+_ESPACIOS = " \t\n\r"
+# Caracteres que se leen de cada vez al recorrer un JSON con iter_json_crudo
+_BLOQUE = 1 << 20
+
+
+def iter_json_crudo(path: Path) -> Iterator[Tuple[str, str]]:
+    """Recorre el objeto JSON de ``path`` devolviendo ``(clave, valor_json)``.
+
+    El archivo se lee por bloques y cada valor se devuelve como el texto JSON
+    que ocupa en el archivo, sin decodificar, de modo que nunca hay en
+    memoria más que una entrada. Solo admite un objeto en el nivel superior,
+    como los que escribe :func:`escribir_json`; lanza ``ValueError`` si el
+    archivo no lo es.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as fh:
+        buf, pos, eof = "", 0, False
+
+        def leer() -> bool:
+            nonlocal buf, pos, eof
+            # Si una entrada no cabe se duplica el bloque para no repetir
+            # su análisis muchas veces
+            data = fh.read(max(_BLOQUE, len(buf) - pos))
+            if not data:
+                eof = True
+                return False
+            buf, pos = buf[pos:] + data, 0
+            return True
+
+        def caracter() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _ESPACIOS:
+                    pos += 1
+                if pos < len(buf):
+                    pos += 1
+                    return buf[pos - 1]
+                if not leer():
+                    raise ValueError(f"{path}: fin inesperado del JSON")
+
+        def valor() -> Tuple[Any, str]:
+            nonlocal pos
+            caracter()
+            pos -= 1
+            while True:
+                try:
+                    decodificado, fin = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if leer():
+                        continue
+                    raise
+                # Un número al final del bloque puede seguir en el siguiente
+                if fin == len(buf) and not eof and leer():
+                    continue
+                texto, pos = buf[pos:fin], fin
+                return decodificado, texto
+
+        if caracter() != "{":
+            raise ValueError(f"{path} no contiene un objeto JSON")
+        siguiente = caracter()
+        if siguiente == "}":
+            return
+        pos -= 1
+        while True:
+            clave, _ = valor()
+            if not isinstance(clave, str) or caracter() != ":":
+                raise ValueError(f"{path}: se esperaba una clave")
+            _, texto = valor()
+            yield clave, texto
+            siguiente = caracter()
+            if siguiente == "}":
+                return
+            if siguiente != ",":
+                raise ValueError(f"{path}: se esperaba ',' o '}}'")
+
+
+class Volcado(MutableMapping[str, Any]):
+    """Diccionario cuyos valores viven en un temporal en disco.
+
+    Cada valor se guarda como JSON y en memoria solo quedan las claves y su
+    posición, así que recorrerlo ocupa lo que ocupe la entrada más grande;
+    asignar una clave existente añade el valor nuevo al final. El temporal
+    se crea en ``dir`` (mejor en el mismo disco que la salida que en un
+    ``/tmp`` en RAM) y se borra con :meth:`close` o al salir del bloque
+    ``with``.
+    """
+
+    def __init__(self, dir: Optional[Path] = None):
+        self._fh = tempfile.TemporaryFile(dir=dir)
+        self._posiciones: Dict[str, Tuple[int, int]] = {}
+        self._fin = 0
+
+    @classmethod
+    def desde_json(cls, path: Path, dir: Optional[Path] = None) -> "Volcado":
+        """Volcado con las entradas del objeto JSON de ``path``."""
+        volcado = cls(dir=dir)
+        try:
+            for clave, texto in iter_json_crudo(path):
+                volcado._guardar(clave, texto.encode("utf-8"))
+        except BaseException:
+            volcado.close()
+            raise
+        return volcado
+
+    def _guardar(self, clave: str, data: bytes) -> None:
+        self._fh.seek(self._fin)
+        self._fh.write(data)
+        self._posiciones[clave] = (self._fin, len(data))
+        self._fin += len(data)
+
+    def __setitem__(self, clave: str, valor: Any) -> None:
+        self._guardar(clave, json.dumps(valor, ensure_ascii=False).encode("utf-8"))
+
+    def __delitem__(self, clave: str) -> None:
+        del self._posiciones[clave]
+
+    def volcar(self, items: Iterable[Tuple[str, Any]]) -> Iterator[Tuple[str, Any]]:
+        """Devuelve ``items`` tal cual mientras los guarda."""
+        for clave, valor in items:
+            self[clave] = valor
+            yield clave, valor
+
+    def __getitem__(self, clave: str) -> Any:
+        offset, tamano = self._posiciones[clave]
+        self._fh.seek(offset)
+        return json.loads(self._fh.read(tamano))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._posiciones)
+
+    def __len__(self) -> int:
+        return len(self._posiciones)
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "Volcado":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+__all__ = ["Volcado", "escribir_bytes", "escribir_json", "iter_json_crudo"]
@@ -0,0 +1,244 @@
+"""Plan de cambios mínimo para la ingesta y su aplicación en paralelo."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+CREATE = "create"
+UPDATE = "update"
+UNCHANGED = "unchanged"
+DELETE = "delete"
+
+# ``conversion_date`` cambia en cada ejecución; no debe provocar reescrituras
+_VOLATIL_RE = re.compile(r"^conversion_date: .*\n", re.MULTILINE)
+
+
+def huella_contenido(texto: str) -> str:
+    """SHA-256 de ``texto`` ignorando la fecha de conversión del frontmatter."""
+    if texto.startswith("---"):
+        fin = texto.find("\n---", 3)
+        if fin != -1:
+            texto = _VOLATIL_RE.sub("", texto[:fin]) + texto[fin:]
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Accion:
+    """Operación prevista sobre un archivo de la wiki."""
+
+    accion: str
+    ruta: Path
+    sha256: Optional[str] = None
+    bytes: int = 0
+    titulo: str = ""
+    origen: Any = field(default=None, repr=False, compare=False)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Representación serializable (sin ``origen``)."""
+        return {
+            "accion": self.accion,
+            "ruta": self.ruta.as_posix(),
+            "sha256": self.sha256,
+            "bytes": self.bytes,
+            "titulo": self.titulo,
+        }
+
+
+class IngestPlan:
+    """Acciones por ruta calculadas comparando hashes con lo que hay en disco.
+
+    Solo se conserva el hash, el tamaño y el ``origen`` de cada bloque (por
+    ejemplo su rango de bytes), no el texto, de modo que el plan de un
+    manual completo ocupa poco en memoria. Si dos bloques van a la misma
+    ruta prevalece el último, igual que al escribir secuencialmente.
+    """
+
+    def __init__(self) -> None:
+        self.acciones: Dict[Path, Accion] = {}
+
+    def add(
+        self, ruta: Path, texto: str, *, titulo: str = "", origen: Any = None
+    ) -> Accion:
+        """Registra que ``ruta`` debe contener ``texto``."""
+        data = texto.encode("utf-8")
+        sha = huella_contenido(texto)
+        accion = CREATE
+        if ruta.exists():
+            accion = UPDATE
+            try:
+                if ruta.stat().st_size == len(data) and (
+                    huella_contenido(ruta.read_text(encoding="utf-8")) == sha
+                ):
+                    accion = UNCHANGED
+            except (OSError, UnicodeDecodeError):
+                pass
+        self.acciones.pop(ruta, None)
+        item = Accion(accion, ruta, sha, len(data), titulo, origen)
+        self.acciones[ruta] = item
+        return item
+
+    def add_deletes(self, previas: Iterable[Path], raiz: Path) -> None:
+        """Marca para borrar las ``previas`` que ya no produce la ingesta.
+
+        Solo se consideran las rutas que quedan dentro de ``raiz``; el resto
+        se ignora con un aviso para que ``--prune`` nunca borre fuera de la
+        wiki que se está construyendo.
+        """
+        base = raiz.resolve()
+        for ruta in previas:
+            if ruta in self.acciones or not ruta.exists():
+                continue
+            if not ruta.resolve().is_relative_to(base):
+                logging.warning("Se ignora %s: está fuera de %s", ruta, raiz)
+                continue
+            self.acciones[ruta] = Accion(DELETE, ruta)
+
+    def por_tipo(self, accion: str) -> List[Accion]:
+        """Acciones de un tipo concreto en orden de registro."""
+        return [a for a in self.acciones.values() if a.accion == accion]
+
+    def resumen(self) -> Dict[str, int]:
+        """Número de acciones por tipo."""
+        tipos = Counter(a.accion for a in self.acciones.values())
+        return {k: tipos.get(k, 0) for k in (CREATE, UPDATE, UNCHANGED, DELETE)}
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plan serializable a JSON."""
+        return {
+            "resumen": self.resumen(),
+            "acciones": [a.as_dict() for a in self.acciones.values()],
+        }
+
+    def lines(self) -> List[str]:
+        """Líneas legibles del plan (se omiten las rutas sin cambios)."""
+        resumen = self.resumen()
+        lines = [
+            "Plan: " + " | ".join(f"{n} {k}" for k, n in resumen.items()),
+        ]
+        for a in self.acciones.values():
+            if a.accion != UNCHANGED:
+                lines.append(f"  {a.accion:<7} {a.ruta.as_posix()} ({a.bytes} bytes)")
+        return lines
+
+    def dump_json(self, destino: str) -> None:
+        """Escribe el plan en ``destino`` o en stdout si es ``-``."""
+        texto = json.dumps(self.as_dict(), ensure_ascii=False, indent=2)
+        if destino == "-":
+            print(texto)
+        else:
+            Path(destino).write_text(texto, encoding="utf-8")
+
+
+def aplicar(
+    plan: IngestPlan,
+    render: Callable[[Any], str],
+    *,
+    jobs: int = 4,
+    prune: bool = False,
+) -> int:
+    """Escribe los archivos nuevos o modificados de ``plan``.
+
+    ``render`` reconstruye el texto a partir del ``origen`` de cada acción.
+    Los directorios se crean una sola vez antes de lanzar las escrituras en
+    un ``ThreadPoolExecutor`` de ``jobs`` hilos. Los borrados solo se
+    aplican con ``prune``. Devuelve los bytes escritos.
+    """
+    pendientes = plan.por_tipo(CREATE) + plan.por_tipo(UPDATE)
+    creados: set[Path] = set()
+    for accion in pendientes:
+        carpeta = accion.ruta.parent
+        if carpeta not in creados:
+            carpeta.mkdir(parents=True, exist_ok=True)
+            creados.add(carpeta)
+
+    def escribir(accion: Accion) -> int:
+        data = render(accion.origen).encode("utf-8")
+        accion.ruta.write_bytes(data)
+        return len(data)
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        escritos = sum(pool.map(escribir, pendientes))
+
+    if prune:
+        for accion in plan.por_tipo(DELETE):
+            try:
+                accion.ruta.unlink()
+                logging.info("Eliminado %s", accion.ruta)
+            except OSError as e:
+                logging.error("No se pudo eliminar %s: %s", accion.ruta, e)
+    return escritos
+
+
+def cargar_manifest(path: Path) -> Dict[str, List[str]]:
+    """Lee el manifest ``fuente → rutas generadas`` de ingestas previas.
+
+    Las rutas se guardan relativas a la raíz de la wiki (ver
+    :func:`rutas_manifest`), de modo que el mismo manifest sirve tanto para
+    la wiki publicada como para un directorio de *staging*.
+    """
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logging.warning("Manifest de ingesta ilegible %s: %s", path, e)
+        return {}
+
+
+def rutas_manifest(rutas: Iterable[str], raiz: Path) -> List[Path]:
+    """Resuelve contra ``raiz`` las rutas relativas guardadas en el manifest.
+
+    Se descartan las absolutas y las que salen de ``raiz`` con ``..``.
+    """
+    resueltas = []
+    for ruta in rutas:
+        relativa = Path(ruta)
+        if relativa.is_absolute() or ".." in relativa.parts:
+            logging.warning("Ruta de manifest fuera de la wiki ignorada: %s", ruta)
+            continue
+        resueltas.append(raiz / relativa)
+    return resueltas
+
+
+def relativas_manifest(rutas: Iterable[Path], raiz: Path) -> List[str]:
+    """Rutas relativas a ``raiz`` en formato POSIX, ordenadas, para el manifest.
+
+    Las que quedan fuera de ``raiz`` (un alias a otra carpeta) no se
+    registran: nunca se podarán.
+    """
+    return sorted(
+        ruta.relative_to(raiz).as_posix() for ruta in rutas if ruta.is_relative_to(raiz)
+    )
+
+
+def guardar_manifest(path: Path, manifest: Dict[str, List[str]]) -> None:
+    """Escribe el manifest de rutas generadas por cada fuente."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True),
+        encoding="utf-8",
+    )
+
+
+__all__ = [
+    "CREATE",
+    "UPDATE",
+    "UNCHANGED",
+    "DELETE",
+    "Accion",
+    "IngestPlan",
+    "aplicar",
+    "huella_contenido",
+    "cargar_manifest",
+    "guardar_manifest",
+    "relativas_manifest",
+    "rutas_manifest",
+]
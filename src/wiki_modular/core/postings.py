@@ -0,0 +1,461 @@
+"""Formato binario del índice BM25 para abrirlo con ``mmap``.
+
+Cargar ``search_index.json`` obliga a parsear todo el texto de la wiki antes
+de poder responder una consulta. Este formato se abre con :mod:`mmap` y solo
+lee las partes que necesita cada consulta: el diccionario de términos (con
+búsqueda binaria), las listas de los términos buscados y el contenido de las
+páginas devueltas.
+
+Estructura del archivo (*little endian*); cada sección se localiza por la
+tabla de la cabecera, no por su posición::
+
+    cabecera   MAGIC, versión, nº documentos, nº términos, k1, b, boosts y
+               longitudes medias por campo; (offset, tamaño) de cada sección
+    longitudes uint32  campos × documentos
+    rutas      offsets uint64 (documentos + 1) y UTF-8 concatenado
+    titulos    ídem
+    contenidos ídem
+    terminos   offsets uint64 (términos + 1) y UTF-8 concatenado, ordenados
+    df         uint32 por término
+    postings   offsets uint64 (términos + 1) y varints concatenados
+
+Cada lista de un término es una secuencia de varints (7 bits por byte) con
+``delta_documento, tf_titulo, tf_encabezados, tf_cuerpo`` por documento,
+donde ``delta_documento`` es la diferencia con el documento anterior. Los
+impactos BM25F se calculan al consultar con las mismas funciones que
+:class:`~wiki_modular.core.search.BM25Index`, así que ambos índices
+devuelven las mismas puntuaciones.
+"""
+
+from __future__ import annotations
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from wiki_modular.core.search import (
+    BOOSTS,
+    CAMPOS,
+    K1,
+    B,
+    _BuscadorBM25,
+    analizar_pagina,
+    impactos,
+    medias_campos,
+    pesos_campos,
+)
+
+MAGIC = b"WMBM25\x00\x00"
+# 2: términos normalizados con ``core.analysis`` (ANALYZER_VERSION 1)
+# 3: singular y plural con la misma raíz (ANALYZER_VERSION 2)
+VERSION = 3
+SECCIONES = (
+    "longitudes",
+    "rutas_off",
+    "rutas",
+    "titulos_off",
+    "titulos",
+    "contenidos_off",
+    "contenidos",
+    "terminos_off",
+    "terminos",
+    "df",
+    "postings_off",
+    "postings",
+)
+_CABECERA = struct.Struct("<8sIIII" + "d" * (2 + 2 * len(CAMPOS)))
+_SECCION = struct.Struct("<QQ")
+_ALINEACION = 8
+# Filas de postings que se codifican de una vez al escribir el archivo
+_FILAS_POR_BLOQUE = 1 << 18
+
+
+def codificar_varints(valores: np.ndarray) -> np.ndarray:
+    """Codifica ``valores`` (enteros no negativos) como varints consecutivos."""
+    valores = np.asarray(valores, dtype=np.uint64)
+    longitud = np.ones(len(valores), dtype=np.int64)
+    resto = valores >> np.uint64(7)
+    while resto.any():
+        longitud += resto > 0
+        resto >>= np.uint64(7)
+    inicio = np.cumsum(longitud) - longitud
+    salida = np.zeros(int(longitud.sum()), dtype=np.uint8)
+    for j in range(int(longitud.max(initial=0))):
+        sel = longitud > j
+        byte = (valores[sel] >> np.uint64(7 * j)) & np.uint64(0x7F)
+        byte |= np.where(longitud[sel] > j + 1, 0x80, 0).astype(np.uint64)
+        salida[inicio[sel] + j] = byte
+    return salida
+
+
+def decodificar_varints(data: Any) -> np.ndarray:
+    """Decodifica una secuencia de varints (``bytes`` o ``memoryview``)."""
+    b = np.frombuffer(data, dtype=np.uint8)
+    if not len(b):
+        return np.zeros(0, dtype=np.uint64)
+    fin = np.flatnonzero(b < 0x80)
+    inicio = np.empty_like(fin)
+    inicio[0] = 0
+    inicio[1:] = fin[:-1] + 1
+    grupo = np.repeat(np.arange(len(fin)), fin - inicio + 1)
+    desplazamiento = (7 * (np.arange(len(b)) - inicio[grupo])).astype(np.uint64)
+    partes = (b & 0x7F).astype(np.uint64) << desplazamiento
+    return np.add.reduceat(partes, inicio)
+
+
+class _Secciones:
+    """Secciones alineadas que se escriben una tras otra después de la cabecera.
+
+    La cabecera y la tabla de secciones se reservan al principio y se
+    rellenan al final con :meth:`escribir_cabecera`, cuando ya se conocen
+    los tamaños; así cada sección puede escribirse a medida que se genera.
+    """
+
+    def __init__(self, fh: BinaryIO):
+        self._fh = fh
+        self._actual: Optional[str] = None
+        self.indice: Dict[str, Tuple[int, int]] = {}
+        fh.write(b"\0" * (_CABECERA.size + _SECCION.size * len(SECCIONES)))
+
+    def abrir(self, nombre: str) -> None:
+        """Cierra la sección en curso y empieza ``nombre``."""
+        self.cerrar()
+        self._fh.write(b"\0" * (-self._fh.tell() % _ALINEACION))
+        self._actual = nombre
+        self.indice[nombre] = (self._fh.tell(), 0)
+
+    def escribir(self, data: Any) -> None:
+        """Añade ``data`` a la sección abierta."""
+        self._fh.write(data)
+
+    def seccion(self, nombre: str, data: Any) -> None:
+        """Escribe de una vez la sección ``nombre``."""
+        self.abrir(nombre)
+        self.escribir(data)
+
+    def cerrar(self) -> None:
+        """Anota el tamaño de la sección en curso."""
+        if self._actual is not None:
+            offset = self.indice[self._actual][0]
+            self.indice[self._actual] = (offset, self._fh.tell() - offset)
+            self._actual = None
+
+    def escribir_cabecera(self, cabecera: bytes) -> int:
+        """Escribe la cabecera y la tabla de secciones; devuelve el tamaño total."""
+        self.cerrar()
+        total = self._fh.tell()
+        self._fh.seek(0)
+        self._fh.write(cabecera)
+        for nombre in SECCIONES:
+            self._fh.write(_SECCION.pack(*self.indice[nombre]))
+        return total
+
+
+class _TablaTextos:
+    """Offsets de una tabla de textos cuyo UTF-8 se entrega a ``escribir``."""
+
+    def __init__(self, escribir: Callable[[bytes], Any]):
+        self._escribir = escribir
+        self.offsets = array("Q", [0])
+
+    def add(self, texto: str) -> None:
+        data = texto.encode("utf-8")
+        self._escribir(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def offsets_bytes(self) -> bytes:
+        return np.asarray(self.offsets).astype("<u8").tobytes()
+
+
+def _escribir_listas(
+    escribir: Callable[[bytes], Any],
+    orden: np.ndarray,
+    docs: np.ndarray,
+    tfs: np.ndarray,
+    df: np.ndarray,
+) -> np.ndarray:
+    """Codifica y escribe por bloques las listas de todos los términos.
+
+    ``orden`` recorre las filas agrupadas por término (en el orden del
+    diccionario) y, dentro de cada término, por documento creciente. Cada
+    bloque abarca términos completos y unas ``_FILAS_POR_BLOQUE`` filas, así
+    que la memoria de la codificación no depende del tamaño del índice.
+    Devuelve los offsets de cada lista dentro de la sección.
+    """
+    por_fila = 1 + len(CAMPOS)
+    fin_termino = np.cumsum(df)
+    offsets = np.zeros(len(df) + 1, dtype="<u8")
+    escritos = 0
+    t0 = 0
+    while t0 < len(df):
+        inicio = int(fin_termino[t0] - df[t0])
+        t1 = int(np.searchsorted(fin_termino, inicio + _FILAS_POR_BLOQUE, "right"))
+        t1 = max(t1, t0 + 1)
+        fin = int(fin_termino[t1 - 1])
+        sel = orden[inicio:fin]
+        filas = np.empty((len(sel), por_fila), dtype=np.uint64)
+        filas[:, 0] = docs[sel]
+        filas[:, 1:] = tfs[sel]
+        # Deltas dentro de cada término; el primer documento se guarda tal cual
+        tamanos = df[t0:t1]
+        primeros = np.cumsum(tamanos) - tamanos
+        ids = filas[:, 0].copy()
+        filas[1:, 0] = ids[1:] - ids[:-1]
+        filas[primeros, 0] = ids[primeros]
+        varints = codificar_varints(filas.ravel())
+        # Bytes por fila para saber dónde termina cada lista
+        ultimo_campo = por_fila - 1
+        fin_fila = np.flatnonzero(varints < 0x80)[ultimo_campo::por_fila] + 1
+        offsets[np.arange(t0, t1) + 1] = escritos + fin_fila[np.cumsum(tamanos) - 1]
+        escribir(varints.tobytes())
+        escritos += len(varints)
+        t0 = t1
+    return offsets
+
+
+def escribir_postings(
+    paginas: Union[Mapping[str, Mapping[str, Any]], Iterable[Tuple[str, Any]]],
+    destino: Path,
+    *,
+    boosts: Optional[Mapping[str, float]] = None,
+    k1: float = K1,
+    b: float = B,
+) -> int:
+    """Escribe el índice binario de ``paginas`` en ``destino``.
+
+    ``paginas`` puede ser el diccionario de ``search_index.json`` o un
+    iterable de pares ``(ruta, entrada)`` que se recorre una sola vez. El
+    contenido de cada página se escribe en el archivo en cuanto se analiza
+    y de cada aparición de un término solo se guardan cinco enteros en
+    arrays tipados; las listas se ordenan y codifican al final por bloques.
+    El archivo se escribe en un temporal que se renombra al terminar, así
+    que los procesos que tengan abierto el anterior con ``mmap`` no ven una
+    versión a medio escribir. Devuelve el tamaño en bytes.
+    """
+    boosts = {**BOOSTS, **(boosts or {})}
+    items = paginas.items() if isinstance(paginas, Mapping) else paginas
+    n = len(CAMPOS)
+    destino = Path(destino)
+    fd, tmp = tempfile.mkstemp(prefix=f".{destino.name}.", dir=destino.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            salida = _Secciones(fh)
+            salida.abrir("contenidos")
+            contenidos = _TablaTextos(salida.escribir)
+            datos_rutas, datos_titulos = bytearray(), bytearray()
+            rutas = _TablaTextos(datos_rutas.extend)
+            titulos = _TablaTextos(datos_titulos.extend)
+            vocabulario: Dict[str, int] = {}
+            # Una fila por aparición: término, documento y tf de cada campo
+            ids, docs, tfs = array("I"), array("I"), array("I")
+            longitudes = [array("I") for _ in CAMPOS]
+            for doc, (ruta, info) in enumerate(items):
+                titulo, contenido, conteos = analizar_pagina(ruta, info)
+                rutas.add(ruta)
+                titulos.add(titulo)
+                contenidos.add(contenido)
+                por_termino: Dict[str, List[int]] = {}
+                for campo, conteo in enumerate(conteos):
+                    longitudes[campo].append(sum(conteo.values()))
+                    for term, tf in conteo.items():
+                        por_termino.setdefault(term, [0] * n)[campo] = tf
+                for term, tf in por_termino.items():
+                    ids.append(vocabulario.setdefault(term, len(vocabulario)))
+                    tfs.extend(tf)
+                docs.extend(array("I", [doc]) * len(por_termino))
+
+            salida.seccion("contenidos_off", contenidos.offsets_bytes())
+            salida.seccion("rutas", datos_rutas)
+            salida.seccion("rutas_off", rutas.offsets_bytes())
+            salida.seccion("titulos", datos_titulos)
+            salida.seccion("titulos_off", titulos.offsets_bytes())
+            n_docs = len(rutas.offsets) - 1
+            matriz = np.concatenate([np.asarray(fila) for fila in longitudes])
+            matriz = matriz.astype("<u4").reshape(n, n_docs)
+            salida.seccion("longitudes", matriz.tobytes())
+
+            terminos = sorted(vocabulario)
+            salida.abrir("terminos")
+            tabla = _TablaTextos(salida.escribir)
+            rango = np.empty(len(terminos), dtype=np.int64)
+            for i, term in enumerate(terminos):
+                tabla.add(term)
+                rango[vocabulario[term]] = i
+            salida.seccion("terminos_off", tabla.offsets_bytes())
+            del vocabulario
+
+            fila_termino = rango[np.asarray(ids)]
+            df = np.bincount(fila_termino, minlength=len(terminos))
+            orden = np.argsort(fila_termino, kind="stable")
+            del fila_termino
+            salida.seccion("df", df.astype("<u4").tobytes())
+            salida.abrir("postings")
+            offsets = _escribir_listas(
+                salida.escribir,
+                orden,
+                np.asarray(docs),
+                np.asarray(tfs).reshape(-1, n),
+                df,
+            )
+            salida.seccion("postings_off", offsets.tobytes())
+            total = salida.escribir_cabecera(
+                _CABECERA.pack(
+                    MAGIC,
+                    VERSION,
+                    n_docs,
+                    len(terminos),
+                    0,
+                    k1,
+                    b,
+                    *(boosts[c] for c in CAMPOS),
+                    *medias_campos(matriz.astype(np.float64)),
+                )
+            )
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, destino)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return total
+
+
+class _Textos(Sequence[str]):
+    """Vista perezosa de una tabla de textos del archivo."""
+
+    def __init__(self, offsets: np.ndarray, datos: memoryview):
+        self._offsets = offsets
+        self._datos = datos
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):  # type: ignore[override]
+        inicio, fin = int(self._offsets[i]), int(self._offsets[i + 1])
+        return str(self._datos[inicio:fin], "utf-8")
+
+
+class MmapBM25Index(_BuscadorBM25):
+    """Índice BM25F de solo lectura abierto con ``mmap``.
+
+    Abrirlo solo lee la cabecera y calcula las normas de longitud de cada
+    documento; los términos, las listas y el contenido de las páginas se leen
+    del archivo cuando una consulta los necesita.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mm)
+        try:
+            cabecera = _CABECERA.unpack_from(vista)
+        except struct.error:
+            cabecera = (b"",) * 7
+        magic, version, n_docs, n_terms, _, k1, b = cabecera[:7]
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} no es un índice BM25 v{VERSION}")
+        n = len(CAMPOS)
+        fin_boosts = 7 + n
+        self.k1, self.b = k1, b
+        self.boosts = dict(zip(CAMPOS, cabecera[7:fin_boosts]))
+        medias = np.array(cabecera[fin_boosts:])
+        self._sec: Dict[str, memoryview] = {}
+        for i, nombre in enumerate(SECCIONES):
+            offset, tamano = _SECCION.unpack_from(
+                vista, _CABECERA.size + i * _SECCION.size
+            )
+            fin = offset + tamano
+            self._sec[nombre] = vista[offset:fin]
+        self._n_docs = n_docs
+        longitudes = np.frombuffer(self._sec["longitudes"], dtype="<u4").reshape(
+            n, n_docs
+        )
+        self._pesos = pesos_campos(
+            longitudes.astype(np.float64), medias, self.boosts, b
+        )
+        self._df = np.frombuffer(self._sec["df"], dtype="<u4")
+        self._post_off = np.frombuffer(self._sec["postings_off"], dtype="<u8")
+        self.terminos = self._tabla("terminos")
+        self.rutas = self._tabla("rutas")
+        self.titulos = self._tabla("titulos")
+        self.contenidos = self._tabla("contenidos")
+        assert len(self.terminos) == n_terms
+
+    def _tabla(self, nombre: str) -> _Textos:
+        offsets = np.frombuffer(self._sec[f"{nombre}_off"], dtype="<u8")
+        return _Textos(offsets, self._sec[nombre])
+
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def __enter__(self) -> "MmapBM25Index":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Libera las vistas y cierra el ``mmap``."""
+        self.terminos = self.rutas = self.titulos = self.contenidos = None  # type: ignore
+        self._sec.clear()
+        self._df = self._post_off = self._pesos = None  # type: ignore
+        try:
+            self._mm.close()
+        except BufferError:  # pragma: no cover - quedan arrays vivos del llamador
+            pass
+
+    def termino(self, term: str) -> int:
+        """Posición de ``term`` en el diccionario o ``-1`` si no existe."""
+        i = bisect.bisect_left(self.terminos, term)
+        if i < len(self.terminos) and self.terminos[i] == term:
+            return i
+        return -1
+
+    def frecuencias(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """``(documentos, tf por campo)`` de ``term`` decodificados del archivo."""
+        i = self.termino(term)
+        if i < 0:
+            return None
+        inicio, fin = int(self._post_off[i]), int(self._post_off[i + 1])
+        filas = decodificar_varints(self._sec["postings"][inicio:fin])
+        filas = filas.reshape(int(self._df[i]), 1 + len(CAMPOS))
+        ids = np.cumsum(filas[:, 0]).astype(np.int32)
+        return ids, filas[:, 1:].T.astype(np.float64)
+
+    def _posting(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        datos = self.frecuencias(term)
+        if datos is None:
+            return None
+        ids, tf = datos
+        return ids, impactos(ids, tf, self._pesos, self._n_docs, self.k1)
+
+    def documento(self, doc: int) -> Tuple[str, str, str]:
+        return self.rutas[doc], self.titulos[doc], self.contenidos[doc]
+
+
+__all__ = [
+    "MAGIC",
+    "MmapBM25Index",
+    "codificar_varints",
+    "decodificar_varints",
+    "escribir_postings",
+]
@@ -0,0 +1,399 @@
+"""Páginas relacionadas por similitud coseno de vectores TF-IDF.
+
+Cada página se representa con los términos de su título y su contenido
+normalizados por :mod:`wiki_modular.core.analysis`, pesados con
+``(1 + log tf) · idf`` y normalizados a longitud 1. La matriz dispersa se
+guarda en arrays CSR de NumPy junto a su traspuesta (las listas de páginas
+de cada término). Las similitudes de un bloque de páginas con todas las
+demás se acumulan con ``np.bincount`` recorriendo solo las listas de sus
+términos; cada bloque se limita a :data:`MAX_TRABAJO` productos y celdas, de
+modo que la memoria queda acotada sea cual sea el tamaño de la wiki. Los
+términos presentes en más de :data:`MAX_DF` de las páginas apenas
+discriminan y son los que más productos generan, así que se descartan.
+
+El cálculo es incremental: el estado guarda el ``idf``, el hash de cada
+página y la matriz. Si cambia menos de :data:`MAX_CAMBIOS` de la wiki se
+conserva el ``idf``, así que los vectores de las páginas sin cambios no
+varían y se reutilizan sin volver a analizar su texto; solo se calculan las
+filas de las páginas nuevas o modificadas y, como la similitud es
+simétrica, esas mismas filas actualizan las listas de las demás. Solo se
+recalcula por completo una página sin cambios si perdió alguno de sus
+vecinos y su lista estaba llena.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from wiki_modular.core.search import titulo_pagina, tokenizar
+
+VERSION = 1
+TOP_K = 5
+MIN_SIMILITUD = 0.05
+MAX_DF = 0.5
+# Productos (y celdas de la matriz densa de similitudes) por bloque
+MAX_TRABAJO = 1 << 22
+MAX_CAMBIOS = 0.2
+DECIMALES = 4
+
+Vecinos = List[Tuple[int, float]]
+
+
+def texto_pagina(ruta: str, info: Mapping[str, Any]) -> str:
+    """Texto que se vectoriza: título y contenido de la página."""
+    return titulo_pagina(ruta, info) + "\n" + str(info.get("content") or "")
+
+
+def hash_pagina(ruta: str, info: Mapping[str, Any]) -> str:
+    """Hash del texto vectorizado de la página."""
+    return hashlib.sha256(texto_pagina(ruta, info).encode("utf-8")).hexdigest()
+
+
+def calcular_idf(
+    conteos: Sequence[Counter], max_df: float = MAX_DF
+) -> Dict[str, float]:
+    """``idf`` suavizado de los términos que aparecen en hasta ``max_df`` de las páginas.
+
+    Un término compartido por solo dos páginas se conserva siempre.
+    """
+    n = len(conteos)
+    df: Counter = Counter()
+    for conteo in conteos:
+        df.update(conteo.keys())
+    limite = max(2.0, max_df * n)
+    return {
+        termino: math.log((1 + n) / (1 + d)) + 1
+        for termino, d in sorted(df.items())
+        if d <= limite
+    }
+
+
+@dataclass
+class MatrizDispersa:
+    """Matriz CSR: la fila ``i`` son ``indices/datos[indptr[i]:indptr[i + 1]]``."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    datos: np.ndarray
+    columnas: int
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def fila(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """``(columnas, valores)`` de la fila ``i``."""
+        inicio, fin = self.indptr[i], self.indptr[i + 1]
+        return self.indices[inicio:fin], self.datos[inicio:fin]
+
+    def traspuesta(self) -> "MatrizDispersa":
+        """La misma matriz por columnas (CSR de la traspuesta)."""
+        filas = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.indptr))
+        orden = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(self.columnas + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.columnas), out=indptr[1:])
+        return MatrizDispersa(indptr, filas[orden], self.datos[orden], len(self))
+
+
+def vector_tfidf(
+    conteo: Counter, vocabulario: Mapping[str, int], idf: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``(columnas, pesos)`` del vector TF-IDF normalizado de ``conteo``."""
+    pares = sorted((vocabulario[t], tf) for t, tf in conteo.items() if t in vocabulario)
+    ids = np.array([i for i, _ in pares], dtype=np.int32)
+    tf = np.array([tf for _, tf in pares], dtype=np.float64)
+    pesos = (1 + np.log(tf)) * idf[ids]
+    norma = np.linalg.norm(pesos)
+    return ids, (pesos / norma if norma else pesos).astype(np.float32)
+
+
+def apilar(
+    vectores: Sequence[Tuple[np.ndarray, np.ndarray]], columnas: int
+) -> MatrizDispersa:
+    """Matriz con una fila por cada ``(columnas, pesos)`` de ``vectores``."""
+    indptr = np.zeros(len(vectores) + 1, dtype=np.int64)
+    np.cumsum([len(ids) for ids, _ in vectores], out=indptr[1:])
+    if not vectores:
+        vacio = np.zeros(0, dtype=np.int32)
+        return MatrizDispersa(indptr, vacio, vacio.astype(np.float32), columnas)
+    return MatrizDispersa(
+        indptr,
+        np.concatenate([ids for ids, _ in vectores]).astype(np.int32),
+        np.concatenate([pesos for _, pesos in vectores]).astype(np.float32),
+        columnas,
+    )
+
+
+def matriz_tfidf(
+    conteos: Sequence[Counter], idf: Mapping[str, float]
+) -> MatrizDispersa:
+    """Vectores TF-IDF normalizados de ``conteos`` (términos sin ``idf`` se ignoran)."""
+    vocabulario = {termino: i for i, termino in enumerate(idf)}
+    pesos_idf = np.fromiter(idf.values(), dtype=np.float64, count=len(idf))
+    vectores = [vector_tfidf(conteo, vocabulario, pesos_idf) for conteo in conteos]
+    return apilar(vectores, len(idf))
+
+
+def _rangos(inicios: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Concatenación de ``arange(inicio, inicio + longitud)`` para cada par."""
+    total = int(longitudes.sum())
+    desplazamientos = inicios - np.cumsum(longitudes) + longitudes
+    return np.repeat(desplazamientos, longitudes) + np.arange(total)
+
+
+def similitudes(
+    matriz: MatrizDispersa,
+    traspuesta: MatrizDispersa,
+    filas: Sequence[int],
+    max_trabajo: int = MAX_TRABAJO,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Genera ``(bloque, similitudes)`` para las ``filas`` pedidas.
+
+    ``similitudes`` es la matriz densa ``len(bloque) × páginas`` de cosenos.
+    Cada bloque reúne filas mientras sus productos (la suma de las longitudes
+    de las listas de sus términos) y sus celdas no superen ``max_trabajo``.
+    """
+    n = len(matriz)
+    df = np.diff(traspuesta.indptr)
+    entradas = np.repeat(np.arange(n), np.diff(matriz.indptr))
+    trabajo = np.bincount(entradas, weights=df[matriz.indices], minlength=n)
+    filas = np.asarray(filas, dtype=np.int64)
+    inicio = 0
+    while inicio < len(filas):
+        fin = inicio + 1
+        total = trabajo[filas[inicio]]
+        while (
+            fin < len(filas)
+            and total + trabajo[filas[fin]] <= max_trabajo
+            and (fin - inicio + 1) * n <= max_trabajo
+        ):
+            total += trabajo[filas[fin]]
+            fin += 1
+        bloque = filas[inicio:fin]
+        yield bloque, _producto(matriz, traspuesta, bloque)
+        inicio = fin
+
+
+def _producto(
+    matriz: MatrizDispersa, traspuesta: MatrizDispersa, bloque: np.ndarray
+) -> np.ndarray:
+    """Producto de las filas ``bloque`` por la traspuesta, como matriz densa."""
+    n = len(matriz)
+    inicios = matriz.indptr[bloque]
+    longitudes = matriz.indptr[bloque + 1] - inicios
+    posiciones = _rangos(inicios, longitudes)
+    locales = np.repeat(np.arange(len(bloque)), longitudes)
+    terminos = matriz.indices[posiciones]
+    pesos = matriz.datos[posiciones].astype(np.float64)
+
+    t_inicios = traspuesta.indptr[terminos]
+    t_longitudes = traspuesta.indptr[terminos + 1] - t_inicios
+    t_posiciones = _rangos(t_inicios, t_longitudes)
+    celdas = np.repeat(locales, t_longitudes) * n + traspuesta.indices[t_posiciones]
+    valores = np.repeat(pesos, t_longitudes) * traspuesta.datos[t_posiciones]
+    suma = np.bincount(celdas, weights=valores, minlength=len(bloque) * n)
+    return suma.reshape(len(bloque), n)
+
+
+def _mejores(vecinos: Vecinos, k: int) -> Vecinos:
+    """Los ``k`` vecinos de mayor similitud (a igualdad, el de menor índice)."""
+    return sorted(vecinos, key=lambda v: (-v[1], v[0]))[:k]
+
+
+def _fila_top(fila: int, sims: np.ndarray, k: int, min_similitud: float) -> Vecinos:
+    """Vecinos de ``fila`` a partir de su vector de similitudes."""
+    sims = sims.copy()
+    sims[fila] = 0
+    candidatos = np.flatnonzero(sims >= min_similitud)
+    if len(candidatos) > k:
+        umbral = np.partition(sims[candidatos], -k)[-k]
+        candidatos = candidatos[sims[candidatos] >= umbral]
+    vecinos = [(int(j), round(float(sims[j]), DECIMALES)) for j in candidatos]
+    return _mejores(vecinos, k)
+
+
+def _matriz_incremental(
+    paginas: Mapping[str, Mapping[str, Any]],
+    cambiadas: Set[int],
+    idf: Mapping[str, float],
+    estado: Mapping[str, Any],
+) -> MatrizDispersa:
+    """Matriz TF-IDF que reutiliza las filas de ``estado`` de las páginas sin cambios."""
+    vocabulario = {termino: i for i, termino in enumerate(idf)}
+    pesos_idf = np.fromiter(idf.values(), dtype=np.float64, count=len(idf))
+    previa: Optional[MatrizDispersa] = estado.get("matriz")
+    filas_previas = {r: i for i, r in enumerate(estado.get("rutas") or [])}
+    vectores = []
+    for i, (ruta, info) in enumerate(paginas.items()):
+        if previa is not None and i not in cambiadas and ruta in filas_previas:
+            vectores.append(previa.fila(filas_previas[ruta]))
+        else:
+            conteo = Counter(tokenizar(texto_pagina(ruta, info)))
+            vectores.append(vector_tfidf(conteo, vocabulario, pesos_idf))
+    return apilar(vectores, len(idf))
+
+
+def calcular_relacionadas(
+    paginas: Mapping[str, Mapping[str, Any]],
+    *,
+    k: int = TOP_K,
+    min_similitud: float = MIN_SIMILITUD,
+    previo: Optional[Mapping[str, Any]] = None,
+    estado: Optional[Mapping[str, Any]] = None,
+    max_cambios: float = MAX_CAMBIOS,
+    max_trabajo: int = MAX_TRABAJO,
+) -> Tuple[Dict[str, Any], Dict[str, Any], List[str]]:
+    """Páginas relacionadas de ``paginas``.
+
+    Devuelve ``(relacionadas, estado, recalculadas)``: ``relacionadas`` es
+    el contenido de ``related.json`` (``{"pages": {ruta: [[ruta, similitud]]},
+    "titles": {ruta: titulo}}``), ``estado`` lo que necesita la siguiente
+    ejecución incremental junto con ``previo`` y ``recalculadas`` las rutas
+    cuya fila se calculó de nuevo.
+    """
+    rutas = list(paginas)
+    posicion = {ruta: i for i, ruta in enumerate(rutas)}
+    hashes = {ruta: hash_pagina(ruta, info) for ruta, info in paginas.items()}
+
+    cambiadas: List[int] = list(range(len(rutas)))
+    incremental = (
+        previo is not None
+        and estado is not None
+        and estado.get("version") == VERSION
+        and estado.get("k") == k
+        and estado.get("minSimilarity") == min_similitud
+    )
+    if incremental:
+        anteriores: Mapping[str, str] = estado["hashes"]
+        cambiadas = [i for i, r in enumerate(rutas) if anteriores.get(r) != hashes[r]]
+        borradas = set(anteriores) - set(posicion)
+        incremental = len(cambiadas) + len(borradas) <= max_cambios * len(rutas)
+    if incremental:
+        idf = dict(estado["idf"])
+        matriz = _matriz_incremental(paginas, set(cambiadas), idf, estado)
+    else:
+        conteos = [Counter(tokenizar(texto_pagina(r, i))) for r, i in paginas.items()]
+        idf = calcular_idf(conteos)
+        matriz = matriz_tfidf(conteos, idf)
+    traspuesta = matriz.traspuesta()
+
+    listas: Dict[int, Vecinos] = {}
+    pendientes = set(cambiadas)
+    if incremental:
+        fuera = {rutas[i] for i in cambiadas} | borradas
+        for i, ruta in enumerate(rutas):
+            if i in pendientes:
+                continue
+            anterior = previo["pages"].get(ruta, [])
+            conservados = [
+                (posicion[r], s)
+                for r, s in anterior
+                if r in posicion and r not in fuera
+            ]
+            if len(anterior) >= k and len(conservados) < len(anterior):
+                # Falta algún vecino y no se sabe cuál era el siguiente
+                pendientes.add(i)
+            else:
+                listas[i] = conservados
+
+    # Primero las páginas cambiadas, cuyas filas también actualizan las listas
+    # conservadas; después las que perdieron algún vecino.
+    sucias = sorted(pendientes - set(cambiadas))
+    actualizadas: Dict[int, Vecinos] = {}
+    for filas in (cambiadas, sucias):
+        for bloque, sims in similitudes(matriz, traspuesta, filas, max_trabajo):
+            for fila, vector in zip(bloque.tolist(), sims):
+                actualizadas[fila] = _fila_top(fila, vector, k, min_similitud)
+                if filas is sucias:
+                    continue
+                for j in np.flatnonzero(vector >= min_similitud).tolist():
+                    if j in listas:
+                        listas[j].append((fila, round(float(vector[j]), DECIMALES)))
+    for i in list(listas):
+        listas[i] = _mejores(listas[i], k)
+    listas.update(actualizadas)
+
+    relacionadas = {
+        "version": VERSION,
+        "k": k,
+        "titles": {ruta: titulo_pagina(ruta, info) for ruta, info in paginas.items()},
+        "pages": {
+            ruta: [[rutas[j], s] for j, s in listas.get(i, [])]
+            for i, ruta in enumerate(rutas)
+        },
+    }
+    nuevo_estado = {
+        "version": VERSION,
+        "k": k,
+        "minSimilarity": min_similitud,
+        "idf": idf,
+        "hashes": hashes,
+        "rutas": rutas,
+        "matriz": matriz,
+    }
+    return relacionadas, nuevo_estado, [rutas[i] for i in sorted(actualizadas)]
+
+
+def guardar_estado(estado: Mapping[str, Any], path: Path) -> None:
+    """Guarda ``estado`` en ``path`` como arrays de NumPy (``.npz``)."""
+    matriz: MatrizDispersa = estado["matriz"]
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        np.savez(
+            fh,
+            version=np.int64(estado["version"]),
+            k=np.int64(estado["k"]),
+            min_similitud=np.float64(estado["minSimilarity"]),
+            terminos=np.array(list(estado["idf"]), dtype=str),
+            idf=np.array(list(estado["idf"].values()), dtype=np.float64),
+            rutas=np.array(estado["rutas"], dtype=str),
+            hashes=np.array([estado["hashes"][r] for r in estado["rutas"]], dtype=str),
+            indptr=matriz.indptr,
+            indices=matriz.indices,
+            datos=matriz.datos,
+        )
+    os.replace(tmp, path)
+
+
+def cargar_estado(path: Path) -> Optional[Dict[str, Any]]:
+    """Estado guardado por :func:`guardar_estado` (``None`` si falta o no es válido)."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != VERSION:
+                return None
+            rutas = data["rutas"].tolist()
+            terminos = data["terminos"].tolist()
+            return {
+                "version": VERSION,
+                "k": int(data["k"]),
+                "minSimilarity": float(data["min_similitud"]),
+                "idf": dict(zip(terminos, data["idf"].tolist())),
+                "hashes": dict(zip(rutas, data["hashes"].tolist())),
+                "rutas": rutas,
+                "matriz": MatrizDispersa(
+                    data["indptr"], data["indices"], data["datos"], len(terminos)
+                ),
+            }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+__all__ = [
+    "MatrizDispersa",
+    "calcular_idf",
+    "apilar",
+    "calcular_relacionadas",
+    "cargar_estado",
+    "guardar_estado",
+    "hash_pagina",
+    "matriz_tfidf",
+    "similitudes",
+    "vector_tfidf",
+]
@@ -0,0 +1,81 @@
+"""Tabla de rutas compilada a partir del índice maestro."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from wiki_modular import limpiar_slug
+
+SQL_FOLDER = "02_Instancias_SQL"
+
+
+@dataclass(frozen=True)
+class Route:
+    """Entrada del índice con su ruta relativa dentro de la wiki."""
+
+    titulo: str
+    clave: str
+    ruta: str
+    seccion: str
+    id: Any = None
+    subtema: bool = False
+
+
+class RouteTable:
+    """Compila una sola vez las rutas de ``index_data``.
+
+    Cada título se normaliza con :func:`limpiar_slug` una única vez y se
+    aplica la regla de la carpeta ``02_Instancias_SQL`` para los subtemas.
+    ``claves`` conserva el comportamiento histórico de la ingesta: si dos
+    entradas comparten clave prevalece la última.
+    """
+
+    def __init__(self, index_data: Dict[str, Any]):
+        self.secciones: List[Tuple[Route, List[Route]]] = []
+        self.claves: Dict[str, Route] = {}
+        for sec in index_data.get("secciones", []):
+            sec_titulo = sec.get("titulo", "")
+            sec_clave = limpiar_slug(sec_titulo)
+            sec_slug = sec.get("slug", sec_clave)
+            sec_id = sec.get("id")
+            prefix = f"{sec_id}_" if sec_id is not None else ""
+            route = Route(
+                sec_titulo, sec_clave, f"{prefix}{sec_slug}.md", sec_slug, sec_id
+            )
+            self.claves[sec_clave] = route
+            subtemas: List[Route] = []
+            for sub in sec.get("subtemas", []):
+                sub_clave = limpiar_slug(sub)
+                carpeta = SQL_FOLDER if "sql" in sub_clave else sec_slug
+                sub_route = Route(
+                    sub, sub_clave, f"{carpeta}/{sub_clave}.md", sec_slug, subtema=True
+                )
+                self.claves[sub_clave] = sub_route
+                subtemas.append(sub_route)
+            self.secciones.append((route, subtemas))
+
+    @property
+    def routes(self) -> List[Route]:
+        """Devuelve todas las rutas en el orden del índice."""
+        return [r for sec, subs in self.secciones for r in (sec, *subs)]
+
+    @property
+    def candidatos(self) -> List[str]:
+        """Claves únicas utilizables para el *fuzzy matching*."""
+        return list(self.claves)
+
+    def get(self, clave: str) -> Optional[Route]:
+        """Busca en O(1) la ruta asociada a ``clave`` ya normalizada."""
+        return self.claves.get(clave)
+
+    def buscar_seccion(self, ref: str) -> int:
+        """Posición en ``secciones`` de la sección con ``id``, slug o título ``ref``."""
+        clave = limpiar_slug(ref)
+        for pos, (seccion, _subs) in enumerate(self.secciones):
+            if ref in (str(seccion.id), seccion.seccion) or clave == seccion.clave:
+                return pos
+        raise KeyError(f"Sección no encontrada en el índice: '{ref}'")
+
+
+__all__ = ["SQL_FOLDER", "Route", "RouteTable"]
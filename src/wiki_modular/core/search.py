@@ -1,10 +1,41 @@
-"""Herramientas para generar el índice de búsqueda."""
+"""Herramientas para generar el índice de búsqueda y consultarlo con BM25.
 
+:class:`BM25Index` construye listas de *postings* a partir de las mismas
+páginas que lee :func:`generar_indice` (o de ``search_index.json``) y
+puntúa las consultas con BM25F sobre los términos normalizados por
+:mod:`wiki_modular.core.analysis`: la frecuencia de cada término se normaliza
+por la longitud de cada campo (título, encabezados y cuerpo) y se pondera
+con ``boosts`` antes de saturarla. Como las longitudes no cambian entre
+consultas, cada *posting* guarda ya su impacto final y una consulta solo
+suma vectores de NumPy para los términos buscados.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
 import yaml
 
+from wiki_modular.core.analysis import analizar, analizar_termino
+
+CAMPOS = ("title", "headers", "body")
+BOOSTS: Dict[str, float] = {"title": 3.0, "headers": 2.0, "body": 1.0}
+K1 = 1.2
+B = 0.75
+SNIPPET_CHARS = 160
+
+_TOKEN_RE = re.compile(r"\w+")
+_ENCABEZADO_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_ESPACIOS_RE = re.compile(r"\s+")
+
 
 def extraer_frontmatter(path: Path) -> Tuple[Dict[str, str], str]:
     """Devuelve la metadata y el cuerpo de un archivo Markdown."""
@@ -30,4 +61,253 @@ def generar_indice(wiki_dir: Path) -> Dict[str, Dict[str, object]]:
     return indice
 
 
-__all__ = ["extraer_frontmatter", "generar_indice"]
+def tokenizar(texto: str) -> List[str]:
+    """Términos de ``texto`` normalizados con :func:`~wiki_modular.core.analysis.analizar`."""
+    return analizar(texto)
+
+
+def titulo_pagina(doc_id: str, info: Mapping[str, Any]) -> str:
+    """Título de la página: ``titulo`` del frontmatter, primer encabezado o nombre."""
+    meta = info.get("metadata") or {}
+    if meta.get("titulo"):
+        return str(meta["titulo"])
+    for line in str(info.get("content") or "").splitlines():
+        if line.startswith("#"):
+            return line.lstrip("#").strip()
+    return Path(doc_id).stem
+
+
+def _encabezados(info: Mapping[str, Any]) -> List[str]:
+    """Textos de los encabezados (de ``headers`` o, si falta, del contenido)."""
+    if "headers" in info:
+        return [str(h["text"]) for h in info.get("headers") or []]
+    return _ENCABEZADO_RE.findall(str(info.get("content") or ""))
+
+
+@dataclass(frozen=True)
+class Hit:
+    """Resultado de una consulta."""
+
+    ruta: str
+    puntuacion: float
+    titulo: str
+    fragmento: str
+
+
+def analizar_pagina(
+    ruta: str, info: Mapping[str, Any]
+) -> Tuple[str, str, List[Counter[str]]]:
+    """Título, contenido y frecuencia de cada término por campo de una página.
+
+    Es el análisis que comparten :func:`contar_terminos` y el escritor del
+    índice binario, de modo que ambos indexan exactamente los mismos términos.
+    """
+    titulo = titulo_pagina(ruta, info)
+    contenido = str(info.get("content") or "")
+    textos = (titulo, "\n".join(_encabezados(info)), contenido)
+    return titulo, contenido, [Counter(tokenizar(texto)) for texto in textos]
+
+
+def contar_terminos(
+    paginas: Mapping[str, Mapping[str, Any]]
+) -> Tuple[
+    List[str], List[str], List[str], Dict[str, Dict[int, List[int]]], np.ndarray
+]:
+    """Analiza ``paginas`` para construir un índice BM25F.
+
+    Devuelve ``(rutas, titulos, contenidos, frecuencias, longitudes)``:
+    ``frecuencias`` asocia cada término a ``{documento: [tf por campo]}``
+    (documentos en orden creciente) y ``longitudes`` es la matriz
+    ``campos × documentos`` con el número de términos de cada campo.
+    """
+    rutas: List[str] = list(paginas)
+    titulos: List[str] = []
+    contenidos: List[str] = []
+    frecuencias: Dict[str, Dict[int, List[int]]] = {}
+    longitudes = np.zeros((len(CAMPOS), len(rutas)), dtype=np.float64)
+    for doc, (ruta, info) in enumerate(paginas.items()):
+        titulo, contenido, conteos = analizar_pagina(ruta, info)
+        titulos.append(titulo)
+        contenidos.append(contenido)
+        for campo, conteo in enumerate(conteos):
+            longitudes[campo, doc] = sum(conteo.values())
+            for term, tf in conteo.items():
+                por_doc = frecuencias.setdefault(term, {})
+                por_doc.setdefault(doc, [0] * len(CAMPOS))[campo] = tf
+    return rutas, titulos, contenidos, frecuencias, longitudes
+
+
+def medias_campos(longitudes: np.ndarray) -> np.ndarray:
+    """Longitud media de cada campo (al menos 1 para no dividir entre cero)."""
+    if not longitudes.shape[1]:
+        return np.ones(len(CAMPOS))
+    return np.maximum(longitudes.mean(axis=1), 1.0)
+
+
+def pesos_campos(
+    longitudes: np.ndarray, medias: np.ndarray, boosts: Mapping[str, float], b: float
+) -> np.ndarray:
+    """``boost / norma`` de cada campo y documento (matriz ``campos × documentos``)."""
+    normas = 1.0 - b + b * longitudes / medias[:, None]
+    return np.array([boosts[c] for c in CAMPOS])[:, None] / normas
+
+
+def impactos(
+    ids: np.ndarray, tf: np.ndarray, pesos: np.ndarray, total: int, k1: float
+) -> np.ndarray:
+    """Aportación BM25F de un término a cada documento de ``ids``.
+
+    ``tf`` es la matriz ``campos × len(ids)`` de frecuencias del término.
+    """
+    peso = (tf * pesos[:, ids]).sum(axis=0)
+    df = len(ids)
+    idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+    return (idf * peso * (k1 + 1) / (k1 + peso)).astype(np.float32)
+
+
+class _BuscadorBM25(ABC):
+    """Consulta común a los índices BM25F en memoria y en disco."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Número de documentos del índice."""
+
+    @abstractmethod
+    def _posting(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """``(documentos, impactos)`` de ``term`` o ``None`` si no aparece."""
+
+    @abstractmethod
+    def documento(self, doc: int) -> Tuple[str, str, str]:
+        """``(ruta, titulo, contenido)`` del documento ``doc``."""
+
+    def puntuar(self, consulta: str) -> np.ndarray:
+        """Puntuación BM25F de cada documento para ``consulta``."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in dict.fromkeys(tokenizar(consulta)):
+            posting = self._posting(term)
+            if posting is not None:
+                ids, impacto = posting
+                scores[ids] += impacto
+        return scores
+
+    def search(
+        self, consulta: str, k: int = 10, *, filtro: Optional[np.ndarray] = None
+    ) -> List[Hit]:
+        """Los ``k`` documentos con mayor puntuación, con un fragmento de contexto.
+
+        Los empates se resuelven por el orden de las páginas en el índice.
+        ``filtro`` es una máscara booleana por documento (por ejemplo de
+        :meth:`~wiki_modular.core.facetas.Facetas.mascara`) que descarta los
+        documentos marcados como ``False``.
+        """
+        scores = self.puntuar(consulta)
+        if filtro is not None:
+            if len(filtro) != len(scores):
+                raise ValueError(
+                    f"El filtro tiene {len(filtro)} documentos y el índice {len(scores)}"
+                )
+            scores[~filtro] = 0
+        candidatos = np.flatnonzero(scores)
+        if k < len(candidatos):
+            umbral = np.partition(scores[candidatos], -k)[-k]
+            candidatos = candidatos[scores[candidatos] >= umbral]
+        orden = candidatos[np.lexsort((candidatos, -scores[candidatos]))][:k]
+        terminos = consulta.split()
+        hits = []
+        for doc in orden:
+            ruta, titulo, contenido = self.documento(int(doc))
+            hits.append(
+                Hit(ruta, float(scores[doc]), titulo, fragmento(contenido, terminos))
+            )
+        return hits
+
+
+class BM25Index(_BuscadorBM25):
+    """Índice BM25F en memoria sobre las páginas de la wiki.
+
+    ``paginas`` tiene la forma de ``search_index.json``: ``{ruta: {"metadata",
+    "content", "headers"}}``. Cada término guarda los documentos que lo
+    contienen y su impacto precalculado, de modo que el coste de una consulta
+    depende de las listas de sus términos y no del tamaño de la wiki.
+    """
+
+    def __init__(
+        self,
+        paginas: Mapping[str, Mapping[str, Any]],
+        *,
+        boosts: Optional[Mapping[str, float]] = None,
+        k1: float = K1,
+        b: float = B,
+    ):
+        self.boosts = {**BOOSTS, **(boosts or {})}
+        self.k1 = k1
+        self.b = b
+        (
+            self.rutas,
+            self.titulos,
+            self.contenidos,
+            frecuencias,
+            longitudes,
+        ) = contar_terminos(paginas)
+        pesos = pesos_campos(longitudes, medias_campos(longitudes), self.boosts, b)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, docs in frecuencias.items():
+            ids = np.fromiter(docs, dtype=np.int32, count=len(docs))
+            tf = np.array(list(docs.values()), dtype=np.float64).T
+            self._postings[term] = (ids, impactos(ids, tf, pesos, len(self.rutas), k1))
+
+    @classmethod
+    def from_json(cls, path: Path, **kwargs: Any) -> "BM25Index":
+        """Construye el índice desde ``search_index.json``."""
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")), **kwargs)
+
+    @classmethod
+    def from_wiki(cls, wiki_dir: Path, **kwargs: Any) -> "BM25Index":
+        """Construye el índice leyendo los Markdown de ``wiki_dir``."""
+        return cls(dict(sorted(generar_indice(Path(wiki_dir)).items())), **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.rutas)
+
+    def _posting(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        return self._postings.get(term)
+
+    def documento(self, doc: int) -> Tuple[str, str, str]:
+        return self.rutas[doc], self.titulos[doc], self.contenidos[doc]
+
+
+def fragmento(texto: str, terminos: Sequence[str], ancho: int = SNIPPET_CHARS) -> str:
+    """Ventana de ``ancho`` caracteres de ``texto`` alrededor del primer término.
+
+    Las palabras se comparan ya analizadas, de modo que ``configuracion``
+    encuentra ``configuraciones`` o ``configuración``.
+    """
+    pos = -1
+    buscados = set(analizar(" ".join(terminos)))
+    if buscados:
+        for m in _TOKEN_RE.finditer(texto):
+            if analizar_termino(m.group()) in buscados:
+                pos = m.start()
+                break
+    inicio = max(0, pos - ancho // 3) if pos >= 0 else 0
+    fin = min(len(texto), inicio + ancho)
+    trozo = _ESPACIOS_RE.sub(" ", texto[inicio:fin]).strip()
+    return ("..." if inicio > 0 else "") + trozo + ("..." if fin < len(texto) else "")
+
+
+__all__ = [
+    "BOOSTS",
+    "BM25Index",
+    "CAMPOS",
+    "Hit",
+    "analizar_pagina",
+    "contar_terminos",
+    "extraer_frontmatter",
+    "fragmento",
+    "generar_indice",
+    "impactos",
+    "medias_campos",
+    "pesos_campos",
+    "titulo_pagina",
+    "tokenizar",
+]
@@ -0,0 +1,280 @@
+"""Índice de búsqueda fragmentado por sección con manifest y filtros Bloom.
+
+Cada sección de primer nivel de la wiki se escribe en un fragmento JSON
+cuyo nombre incluye el hash de su contenido, de modo que el navegador puede
+cachearlo indefinidamente y los fragmentos sin cambios conservan el nombre
+entre compilaciones. El manifest lista los títulos y encabezados de cada
+página y, por fragmento, un filtro Bloom con los términos que contiene para
+que el cliente descargue solo los fragmentos que pueden coincidir.
+
+Los términos se obtienen con la misma tubería que usa el índice lunr:
+el tokenizador de lunr seguido de :func:`~wiki_modular.core.analysis.lunr_analizar`.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+import re
+from collections.abc import Mapping as MappingABC
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from lunr.pipeline import Pipeline
+from lunr.tokenizer import Tokenizer
+
+from wiki_modular.core.analysis import lunr_analizar
+from wiki_modular.core.jsonstream import escribir_bytes, escribir_json
+from wiki_modular.core.search import titulo_pagina
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+FALSE_POSITIVE_RATE = 0.01
+# Campos de cada documento que se indexan (igual que en buscar-avanzado.html)
+CAMPOS = ("content", "source_file", "conversion_date")
+
+_FNV_OFFSET = 0x811C9DC5
+_FNV_OFFSET_2 = 0x01000193 ^ 0x5BD1E995
+_FNV_PRIME = 0x01000193
+_ID_PREFIX_RE = re.compile(r"^\d+_")
+
+_pipeline = Pipeline()
+_pipeline.add(lunr_analizar)
+
+
+def terminos(texto: str) -> Set[str]:
+    """Términos de ``texto`` tal como los almacena lunr en su índice."""
+    return {str(t) for t in _pipeline.run(Tokenizer(texto)) if str(t)}
+
+
+def _fnv1a(data: bytes, seed: int) -> int:
+    h = seed
+    for byte in data:
+        h = ((h ^ byte) * _FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+def _posiciones(termino: str, m: int, k: int) -> Iterable[int]:
+    data = termino.encode("utf-8")
+    h1 = _fnv1a(data, _FNV_OFFSET)
+    h2 = _fnv1a(data, _FNV_OFFSET_2) | 1
+    return ((h1 + i * h2) % m for i in range(k))
+
+
+def bloom(terms: Set[str], fp: float = FALSE_POSITIVE_RATE) -> Dict[str, Any]:
+    """Filtro Bloom serializable de ``terms`` (``m`` bits y ``k`` hashes).
+
+    Las posiciones se calculan con doble hash FNV-1a de 32 bits sobre el
+    UTF-8 del término; ``buscar-worker.js`` replica el cálculo.
+    """
+    n = max(1, len(terms))
+    m = max(64, math.ceil(-n * math.log(fp) / math.log(2) ** 2))
+    m += -m % 8
+    k = min(16, max(1, round(m / n * math.log(2))))
+    bits = bytearray(m // 8)
+    for term in terms:
+        for pos in _posiciones(term, m, k):
+            bits[pos >> 3] |= 1 << (pos & 7)
+    return {"m": m, "k": k, "bits": base64.b64encode(bytes(bits)).decode("ascii")}
+
+
+def bloom_contiene(filtro: Mapping[str, Any], termino: str) -> bool:
+    """Indica si ``termino`` puede estar en ``filtro`` (sin falsos negativos)."""
+    bits = base64.b64decode(filtro["bits"])
+    return all(
+        bits[pos >> 3] & (1 << (pos & 7))
+        for pos in _posiciones(termino, filtro["m"], filtro["k"])
+    )
+
+
+def clave_seccion(doc_id: str) -> str:
+    """Sección de primer nivel de ``doc_id`` (``1_intro.md`` y ``intro/x.md`` → ``intro``)."""
+    partes = Path(doc_id).parts
+    if len(partes) > 1:
+        return partes[0]
+    return _ID_PREFIX_RE.sub("", Path(doc_id).stem) or Path(doc_id).stem
+
+
+def serializar_shard(entradas: Mapping[str, Any]) -> bytes:
+    """JSON compacto y determinista de un fragmento."""
+    return json.dumps(
+        entradas, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def iter_shards(
+    indice: Mapping[str, Mapping[str, Any]], manifest: Dict[str, Any]
+) -> Iterator[Tuple[str, bytes]]:
+    """Genera ``(archivo, datos)`` de cada sección de ``indice`` y completa ``manifest``.
+
+    Solo se agrupan las rutas; las entradas de una sección se leen de
+    ``indice`` al serializarla y se liberan antes de pasar a la siguiente,
+    de modo que con un ``indice`` en disco (p. ej.
+    :class:`~wiki_modular.core.jsonstream.Volcado`) en memoria solo hay un
+    fragmento a la vez. ``manifest`` recibe ``version``, ``shards`` y ``docs``.
+    """
+    secciones: Dict[str, List[str]] = {}
+    for doc_id in sorted(indice):
+        secciones.setdefault(clave_seccion(doc_id), []).append(doc_id)
+
+    manifest.update({"version": MANIFEST_VERSION, "shards": {}, "docs": {}})
+    for clave, doc_ids in secciones.items():
+        entradas = {doc_id: indice[doc_id] for doc_id in doc_ids}
+        data = serializar_shard(entradas)
+        nombre = f"{clave}.{hashlib.sha256(data).hexdigest()[:12]}.json"
+        terms: Set[str] = set()
+        for doc_id, info in entradas.items():
+            meta = info.get("metadata") or {}
+            terms |= terminos(str(info.get("content") or ""))
+            for campo in CAMPOS[1:]:
+                terms |= terminos(str(meta.get(campo) or ""))
+            manifest["docs"][doc_id] = {
+                "title": titulo_pagina(doc_id, info),
+                "shard": clave,
+                "headers": info.get("headers") or [],
+                "source_file": str(meta.get("source_file") or ""),
+                "conversion_date": str(meta.get("conversion_date") or ""),
+            }
+        manifest["shards"][clave] = {
+            "file": nombre,
+            "docs": doc_ids,
+            "terms": bloom(terms),
+        }
+        del entradas
+        yield nombre, data
+
+
+def construir_shards(
+    indice: Mapping[str, Mapping[str, Any]]
+) -> tuple[Dict[str, Any], Dict[str, bytes]]:
+    """Agrupa ``indice`` por sección y devuelve ``(manifest, {archivo: datos})``.
+
+    Reúne en memoria todos los fragmentos; para escribirlos se usa
+    :func:`iter_shards`.
+    """
+    manifest: Dict[str, Any] = {}
+    archivos = dict(iter_shards(indice, manifest))
+    return manifest, archivos
+
+
+def escribir_shards(
+    indice: Mapping[str, Mapping[str, Any]], destino: Path
+) -> Dict[str, Any]:
+    """Escribe los fragmentos y ``manifest.json`` en ``destino``.
+
+    Cada fragmento se escribe en cuanto se genera (ver :func:`iter_shards`)
+    y los que ya existen no se reescriben. Primero se escriben los
+    nuevos y el manifest, ambos de forma atómica, y solo después se borran
+    los fragmentos del manifest anterior que el nuevo ya no referencia; así
+    un cliente nunca recibe un manifest que apunte a archivos borrados. Los
+    demás archivos de ``destino`` no se tocan.
+    """
+    destino.mkdir(parents=True, exist_ok=True)
+    previos = _archivos_manifest(destino / MANIFEST_NAME)
+    manifest: Dict[str, Any] = {}
+    archivos = set()
+    for nombre, data in iter_shards(indice, manifest):
+        archivos.add(nombre)
+        path = destino / nombre
+        if not path.exists():
+            escribir_bytes(path, data)
+    escribir_json(manifest.items(), destino / MANIFEST_NAME, compact=True)
+    for nombre in previos - archivos:
+        (destino / nombre).unlink(missing_ok=True)
+    return manifest
+
+
+def actualizar_shards(
+    indice: Mapping[str, Mapping[str, Any]], destino: Path, rutas: Iterable[str]
+) -> Optional[Dict[str, Any]]:
+    """Reescribe solo los fragmentos de las secciones de ``rutas``.
+
+    Las demás secciones conservan su fragmento y su entrada del manifest,
+    que queda igual que tras :func:`escribir_shards` con el ``indice``
+    completo. Devuelve el manifest o ``None`` si el de ``destino`` no existe
+    o no es válido (hay que regenerarlo entero).
+    """
+    try:
+        manifest = json.loads((destino / MANIFEST_NAME).read_text(encoding="utf-8"))
+        shards, docs = manifest["shards"], manifest["docs"]
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        previos = {clave: str(info["file"]) for clave, info in shards.items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+    afectadas = {clave_seccion(ruta) for ruta in rutas}
+    orden: Dict[str, None] = {}
+    doc_ids = []
+    for doc_id in sorted(indice):
+        clave = clave_seccion(doc_id)
+        orden.setdefault(clave)
+        if clave in afectadas:
+            doc_ids.append(doc_id)
+    parcial: Dict[str, Any] = {}
+    nuevos = set()
+    for nombre, data in iter_shards(_Restringido(indice, doc_ids), parcial):
+        nuevos.add(nombre)
+        if not (destino / nombre).exists():
+            escribir_bytes(destino / nombre, data)
+
+    for clave in afectadas:
+        for doc_id in (shards.pop(clave, None) or {}).get("docs", []):
+            docs.pop(doc_id, None)
+    shards.update(parcial["shards"])
+    docs.update(parcial["docs"])
+    # Mismo orden que una compilación completa
+    manifest["shards"] = {c: shards[c] for c in orden if c in shards}
+    manifest["docs"] = {
+        d: docs[d] for info in manifest["shards"].values() for d in info["docs"]
+    }
+    escribir_json(manifest.items(), destino / MANIFEST_NAME, compact=True)
+    for clave in afectadas:
+        nombre = previos.get(clave)
+        if nombre and nombre not in nuevos and Path(nombre).name == nombre:
+            (destino / nombre).unlink(missing_ok=True)
+    return manifest
+
+
+class _Restringido(MappingABC):
+    """Vista de ``indice`` limitada a ``doc_ids`` (se lee bajo demanda)."""
+
+    def __init__(self, indice: Mapping[str, Any], doc_ids: List[str]) -> None:
+        self._indice = indice
+        self._doc_ids = doc_ids
+
+    def __getitem__(self, doc_id: str) -> Any:
+        return self._indice[doc_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._doc_ids)
+
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+
+
+def _archivos_manifest(path: Path) -> Set[str]:
+    """Fragmentos que lista el manifest de ``path`` (vacío si no existe)."""
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        shards = manifest["shards"].values()
+        nombres = {str(info["file"]) for info in shards}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return set()
+    # Solo nombres de archivo sueltos: nada fuera del directorio
+    return {n for n in nombres if n and Path(n).name == n and n != MANIFEST_NAME}
+
+
+__all__ = [
+    "MANIFEST_NAME",
+    "actualizar_shards",
+    "terminos",
+    "bloom",
+    "bloom_contiene",
+    "clave_seccion",
+    "construir_shards",
+    "escribir_shards",
+    "iter_shards",
+]
@@ -1,9 +1,10 @@
 """Funciones para generar el sidebar de la wiki."""
 
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from wiki_modular import limpiar_slug, load_yaml
+from wiki_modular.core.routing import RouteTable
 
 
 class IndexFileNotFoundError(FileNotFoundError):
@@ -54,22 +55,28 @@ def slugify(text: str) -> str:
     return limpiar_slug(text)
 
 
-def build_sidebar_lines(data: Dict[str, Any], *, tolerant: bool = False) -> List[str]:
-    """Construye las líneas de ``_sidebar.md`` a partir de ``data``."""
+def build_sidebar_lines(
+    data: Dict[str, Any],
+    *,
+    tolerant: bool = False,
+    routes: Optional[RouteTable] = None,
+) -> List[str]:
+    """Construye las líneas de ``_sidebar.md`` a partir de ``data``.
+
+    Si se indica ``routes`` se reutiliza esa tabla ya compilada en lugar de
+    volver a normalizar el índice.
+    """
     lines: List[str] = ["* [Inicio](README.md)"]
-    secciones = data["secciones"]
+    tabla = routes if routes is not None else RouteTable(data)
     seen_paths = set()
 
-    for seccion in secciones:
-        sec_title = seccion["titulo"]
-        sec_slug = seccion.get("slug", slugify(sec_title))
-        sec_id = seccion.get("id")
-        if sec_id is None and not tolerant:
+    for seccion, subtemas in tabla.secciones:
+        sec_title = seccion.titulo
+        if seccion.id is None and not tolerant:
             raise InvalidIndexSchemaError(
                 f"Sección '{sec_title}' sin 'id'; use --tolerant para permitirlo"
             )
-        prefix = f"{sec_id}_" if sec_id is not None else ""
-        filename = f"{prefix}{sec_slug}.md"
+        filename = seccion.ruta
         key = filename.lower()
         if key in seen_paths:
             msg = f"Ruta duplicada: {filename}"
@@ -80,14 +87,10 @@ def build_sidebar_lines(data: Dict[str, Any], *, tolerant: bool = False) -> List
         seen_paths.add(key)
         lines.append(f"* [{sec_title}]({filename})")
 
-        for sub in seccion.get("subtemas", []):
-            sub_title = sub
-            sub_slug = slugify(sub_title)
-            if sub_slug == sec_slug:
+        for sub in subtemas:
+            if sub.clave == seccion.seccion:
                 continue
-            carpeta = "02_Instancias_SQL" if "sql" in sub_slug else sec_slug
-            sub_filename = f"{sub_slug}.md"
-            route = f"{carpeta}/{sub_filename}"
+            route = sub.ruta
             key = route.lower()
             if key in seen_paths:
                 if not tolerant:
@@ -95,16 +98,44 @@ def build_sidebar_lines(data: Dict[str, Any], *, tolerant: bool = False) -> List
                 else:
                     continue
             seen_paths.add(key)
-            lines.append(f"  * [{sub_title}]({route})")
+            lines.append(f"  * [{sub.titulo}]({route})")
 
     lines.append("")
     return lines
 
 
+def reemplazar_seccion(lines: List[str], nuevas: List[str]) -> List[str]:
+    """Sustituye en ``lines`` el bloque de la sección que encabeza ``nuevas``.
+
+    El bloque se localiza por la ruta enlazada en su primera línea y abarca
+    las líneas de subtemas que la siguen. Si la sección no figura en
+    ``lines`` se añade al final.
+    """
+    destino = nuevas[0].rsplit("](", 1)[-1]
+    inicio = next(
+        (
+            i
+            for i, line in enumerate(lines)
+            if line.startswith("* ") and line.rsplit("](", 1)[-1] == destino
+        ),
+        None,
+    )
+    if inicio is None:
+        fin = len(lines)
+        while fin and not lines[fin - 1].strip():
+            fin -= 1
+        return lines[:fin] + nuevas + lines[fin:]
+    fin = inicio + 1
+    while fin < len(lines) and lines[fin].startswith("  "):
+        fin += 1
+    return lines[:inicio] + nuevas + lines[fin:]
+
+
 __all__ = [
     "IndexFileNotFoundError",
     "InvalidIndexSchemaError",
     "load_index",
     "validate_index_schema",
     "build_sidebar_lines",
+    "reemplazar_seccion",
 ]
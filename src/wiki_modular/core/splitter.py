@@ -0,0 +1,175 @@
+"""Fragmentación en streaming de ``tmp_full.md`` mediante ``mmap``."""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Iterator, Sequence, Tuple
+
+import numpy as np
+
+# Tamaño de cada ventana al buscar saltos de línea; acota la memoria temporal
+CHUNK_SIZE = 1 << 24
+
+ByteRange = Tuple[int, int]
+
+# Separadores de línea de ``str.splitlines`` (``\r\n`` cuenta como uno solo)
+_SALTOS_RE = re.compile("\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+class MappedMarkdown:
+    """Markdown mapeado en memoria con un índice compacto de líneas.
+
+    Solo se guarda un ``int64`` por salto de línea (el offset de su último
+    byte); el texto se decodifica bajo demanda para cada rango de bytes. La
+    numeración de líneas coincide con ``read_text().splitlines()``, la usada
+    al generar ``mapa_encabezados.yaml``: además de ``\\n``, ``\\r\\n`` y
+    ``\\r`` cuentan como salto ``\\x0b``, ``\\x0c``, ``\\x1c``-``\\x1e``,
+    ``\\x85``, ``\\u2028`` y ``\\u2029``, que a veces aparecen en el Markdown
+    convertido desde DOCX.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fh = self.path.open("rb")
+        self.size = os.fstat(self._fh.fileno()).st_size
+        self._mm = (
+            mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else b""
+        )
+        self.newlines = self._scan()
+        termina_en_salto = len(self.newlines) and self.newlines[-1] == self.size - 1
+        self.lines = len(self.newlines) + (
+            0 if termina_en_salto or not self.size else 1
+        )
+
+    def _scan(self) -> np.ndarray:
+        """Devuelve el offset del último byte de cada salto de línea.
+
+        El archivo se recorre por ventanas; cada una incluye los dos bytes
+        anteriores y el siguiente para reconocer ``\\r\\n`` y los saltos de
+        varios bytes en UTF-8 que quedan a caballo entre dos ventanas.
+        """
+        partes = []
+        for inicio in range(0, self.size, CHUNK_SIZE):
+            fin = min(inicio + CHUNK_SIZE, self.size)
+            desde = max(inicio - 2, 0)
+            hasta = min(fin + 1, self.size)
+            ventana = np.frombuffer(
+                self._mm, dtype=np.uint8, count=hasta - desde, offset=desde
+            )
+            k, largo = inicio - desde, fin - inicio
+            actual = _desplazada(ventana, k, largo, 0)
+            salto = (actual == 0x0A) | ((actual >= 0x0B) & (actual <= 0x0C))
+            salto |= (actual >= 0x1C) & (actual <= 0x1E)
+            salto |= (actual == 0x0D) & (_desplazada(ventana, k, largo, 1) != 0x0A)
+            # U+0085 (C2 85), U+2028 (E2 80 A8) y U+2029 (E2 80 A9)
+            salto |= (actual == 0x85) & (_desplazada(ventana, k, largo, -1) == 0xC2)
+            salto |= (
+                ((actual == 0xA8) | (actual == 0xA9))
+                & (_desplazada(ventana, k, largo, -1) == 0x80)
+                & (_desplazada(ventana, k, largo, -2) == 0xE2)
+            )
+            partes.append(np.flatnonzero(salto) + inicio)
+            del ventana, actual, salto
+        if not partes:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(partes).astype(np.int64, copy=False)
+
+    def __len__(self) -> int:
+        return self.lines
+
+    def __enter__(self) -> "MappedMarkdown":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Libera el mapeo y el descriptor de archivo."""
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._fh.close()
+
+    def byte_range(self, start: int, end: int) -> ByteRange:
+        """Rango de bytes de las líneas ``[start, end)`` (base 0) sin el último salto."""
+        if end <= start:
+            inicio = self._line_start(start) if start < self.lines else self.size
+            return inicio, inicio
+        return self._line_start(start), self._line_end(end - 1)
+
+    def _line_start(self, i: int) -> int:
+        return 0 if i == 0 else int(self.newlines[i - 1]) + 1
+
+    def _line_end(self, i: int) -> int:
+        if i >= len(self.newlines):
+            return self.size
+        ultimo = int(self.newlines[i])
+        return ultimo + 1 - self._largo_salto(ultimo)
+
+    def _largo_salto(self, ultimo: int) -> int:
+        """Bytes del salto de línea que termina en el offset ``ultimo``."""
+        byte = self._mm[ultimo]
+        if byte == 0x0A:
+            return 2 if ultimo and self._mm[ultimo - 1] == 0x0D else 1
+        if byte == 0x85:
+            return 2
+        if byte in (0xA8, 0xA9):
+            return 3
+        return 1
+
+    def read(self, rango: ByteRange) -> str:
+        """Decodifica ``rango`` con cada salto de línea normalizado a ``\\n``."""
+        inicio, fin = rango
+        texto = self._mm[inicio:fin].decode("utf-8")
+        return _SALTOS_RE.sub("\n", texto)
+
+
+def _desplazada(ventana: np.ndarray, k: int, largo: int, d: int) -> np.ndarray:
+    """Bytes ``ventana[k + d : k + d + largo]``, con ceros fuera de ``ventana``."""
+    a, b = k + d, k + d + largo
+    if a >= 0 and b <= len(ventana):
+        return ventana[a:b]
+    antes = min(max(-a, 0), largo)
+    despues = min(max(b - len(ventana), 0), largo - antes)
+    lo = max(a, 0)
+    hi = lo + largo - antes - despues
+    return np.concatenate(
+        [np.zeros(antes, np.uint8), ventana[lo:hi], np.zeros(despues, np.uint8)]
+    )
+
+
+def iter_bloques(
+    mapa: Sequence[dict], fuente: MappedMarkdown
+) -> Iterator[Tuple[str, int, ByteRange]]:
+    """Genera ``(titulo, nivel, rango_bytes)`` para cada entrada válida de ``mapa``.
+
+    ``start_line`` es base 1 y cada bloque termina donde empieza el siguiente,
+    igual que en la fragmentación por listas de líneas.
+    """
+    total = len(fuente)
+    for i, sec in enumerate(mapa):
+        start = sec.get("start_line", 0) - 1
+        end = (
+            (mapa[i + 1].get("start_line", total + 1) - 1)
+            if (i + 1) < len(mapa)
+            else total
+        )
+        titulo = sec.get("titulo") or sec.get("title")
+        nivel = sec.get("h_level", 1)
+
+        if not titulo:
+            logging.warning(f"Bloque sin 'titulo': {sec}")
+            continue
+        if start < 0 or end > total:
+            logging.warning(f"Rango inválido ({start}, {end}) en '{titulo}'")
+            continue
+
+        yield titulo, nivel, fuente.byte_range(start, end)
+
+
+__all__ = ["CHUNK_SIZE", "MappedMarkdown", "iter_bloques"]
@@ -0,0 +1,147 @@
+"""Análisis de ``--cutoff`` con una sola pasada de puntuación."""
+
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from wiki_modular.core.ingest import DestinationResolver
+
+WILDCARD = "99_Nuevas_Secciones"
+
+
+def parse_sweep(spec: str) -> np.ndarray:
+    """Convierte ``inicio:fin:paso`` en el vector de cutoffs (fin incluido)."""
+    try:
+        inicio, fin, paso = (float(p) for p in spec.split(":"))
+    except ValueError as exc:
+        raise ValueError(f"Formato de barrido inválido: '{spec}'") from exc
+    if paso <= 0 or not 0 <= inicio <= fin <= 1:
+        raise ValueError(f"Barrido fuera de rango: '{spec}'")
+    return np.round(np.arange(inicio, fin + paso / 2, paso), 6)
+
+
+def barrido_cutoff(
+    titulos: Sequence[str],
+    resolver: DestinationResolver,
+    cutoffs: np.ndarray,
+    *,
+    top_k: int = 3,
+) -> Dict[str, Any]:
+    """Enruta ``titulos`` para todos los ``cutoffs`` puntuando una sola vez.
+
+    Cada título se compara con el índice una única vez y se guardan sus
+    ``top_k`` mejores similitudes en una matriz ``bloques × top_k``. La
+    decisión para cada cutoff se obtiene comparando esa matriz con el
+    vector de cutoffs, sin volver a puntuar: como
+    :class:`~wiki_modular.core.fuzzy.TrigramIndex` devuelve exactamente los
+    mejores candidatos de :func:`difflib.get_close_matches`, el mejor
+    candidato con el cutoff mínimo es el mismo que elegiría
+    :meth:`DestinationResolver.resolve` con cualquier cutoff mayor, siempre
+    que su similitud lo alcance.
+
+    No se calcula una matriz completa ``bloques × candidatos`` con NumPy: la
+    similitud que decide el destino es la de
+    :class:`~difflib.SequenceMatcher`, que no se puede vectorizar, y
+    cualquier aproximación vectorial (p. ej. Dice de trigramas) daría
+    destinos distintos de los de la ingesta real. Cada título se puntúa en
+    un bucle con :meth:`DestinationResolver.puntuar`, que solo revisa los
+    candidatos cuya cota alcanza el umbral; lo vectorizado es la decisión
+    para todos los cutoffs a la vez.
+    """
+    cutoffs = np.asarray(cutoffs, dtype=float)
+    minimo = float(cutoffs.min()) if cutoffs.size else 0.0
+    destinos: List[str] = []
+    dest_ids: Dict[str, int] = {}
+    scores = np.zeros((len(titulos), top_k))
+    mejor = np.full(len(titulos), -1, dtype=np.int64)
+    es_alias = np.zeros(len(titulos), dtype=bool)
+
+    for i, titulo in enumerate(titulos):
+        alias = resolver.alias.match(titulo)
+        if alias is not None:
+            ruta = str(alias)
+            es_alias[i] = True
+            scores[i, 0] = np.inf
+        else:
+            puntuados = resolver.puntuar(titulo, n=top_k, cutoff=minimo)
+            if not puntuados:
+                continue
+            for j, (score, _ruta) in enumerate(puntuados):
+                scores[i, j] = score
+            ruta = str(puntuados[0][1])
+        mejor[i] = dest_ids.setdefault(ruta, len(dest_ids))
+        if mejor[i] == len(destinos):
+            destinos.append(ruta)
+
+    # bloques × cutoffs: True si el bloque se asigna a su mejor candidato
+    asignado = (scores[:, :1] >= cutoffs[None, :]) & (mejor[:, None] >= 0)
+    coincidencias = asignado.sum(axis=0)
+    alias = int(es_alias.sum())
+
+    filas = []
+    for j, cutoff in enumerate(cutoffs):
+        por_destino = np.bincount(mejor[asignado[:, j]], minlength=len(destinos))
+        carpetas: Counter[str] = Counter()
+        for dest_id in np.flatnonzero(por_destino):
+            carpetas[_carpeta(destinos[dest_id])] += int(por_destino[dest_id])
+        if not asignado[:, j].all():
+            carpetas[WILDCARD] += int(len(titulos) - coincidencias[j])
+        cambios = []
+        if j:
+            for i in np.flatnonzero(asignado[:, j] != asignado[:, j - 1]):
+                cambios.append(
+                    {
+                        "titulo": titulos[i],
+                        "score": round(float(scores[i, 0]), 4),
+                        "antes": destinos[mejor[i]],
+                        "despues": WILDCARD,
+                    }
+                )
+        filas.append(
+            {
+                "cutoff": float(cutoff),
+                "coincidencias": int(coincidencias[j]) - alias,
+                "alias": alias,
+                "wildcard": int(len(titulos) - coincidencias[j]),
+                "carpetas": dict(carpetas.most_common()),
+                "cambios": cambios,
+            }
+        )
+    return {"bloques": len(titulos), "cutoffs": filas}
+
+
+def _carpeta(ruta: str) -> str:
+    """Primer nivel de ``ruta`` dentro de la wiki."""
+    partes = Path(ruta).parts
+    if partes and partes[0] == "wiki":
+        partes = partes[1:]
+    return partes[0] if len(partes) > 1 else "(raíz)"
+
+
+def formatear_barrido(reporte: Dict[str, Any]) -> List[str]:
+    """Devuelve las líneas de texto del informe de :func:`barrido_cutoff`."""
+    lines = [
+        f"Barrido de cutoff sobre {reporte['bloques']} bloques",
+        f"{'cutoff':>7} {'índice':>7} {'alias':>6} {WILDCARD:>20} {'cambios':>8}",
+    ]
+    for fila in reporte["cutoffs"]:
+        lines.append(
+            f"{fila['cutoff']:>7.2f} {fila['coincidencias']:>7} {fila['alias']:>6} "
+            f"{fila['wildcard']:>20} {len(fila['cambios']):>8}"
+        )
+    for fila in reporte["cutoffs"]:
+        carpetas = ", ".join(f"{k}: {v}" for k, v in fila["carpetas"].items())
+        lines.append(f"[{fila['cutoff']:.2f}] {carpetas}")
+        for cambio in fila["cambios"]:
+            lines.append(
+                f"    '{cambio['titulo']}' ({cambio['score']:.2f}) "
+                f"{cambio['antes']} → {cambio['despues']}"
+            )
+    return lines
+
+
+__all__ = ["WILDCARD", "parse_sweep", "barrido_cutoff", "formatear_barrido"]
@@ -0,0 +1,242 @@
+"""Construcción de la wiki en un directorio aparte y publicación atómica.
+
+La wiki publicada (``wiki/``) pasa a ser un enlace simbólico a una versión
+dentro de ``.wiki_builds/``. Cada ejecución construye en
+``.wiki_builds/staging`` y, si todo va bien, :func:`publicar` renombra ese
+directorio y cambia el enlace con ``os.replace``: una sola operación atómica
+sin importar el tamaño de la wiki. Las versiones anteriores se conservan para
+poder volver atrás con :func:`rollback`.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+import yaml
+
+import wiki_modular.config as config
+
+STAGING_NAME = "staging"
+CONFIG_NAME = "staging_config.yaml"
+
+
+def builds_dir(wiki_dir: Path) -> Path:
+    """Directorio hermano donde se guardan las versiones de ``wiki_dir``."""
+    return wiki_dir.parent / f".{wiki_dir.name}_builds"
+
+
+def preparar_staging(wiki_dir: Path, *, limpio: bool = False) -> Path:
+    """Crea un directorio de construcción vacío o copia de la wiki publicada.
+
+    Con ``limpio`` solo se conserva ``README.md``; en otro caso se copia el
+    contenido actual para permitir ingestas incrementales sin tocar la wiki
+    que se está sirviendo.
+    """
+    builds = builds_dir(wiki_dir)
+    builds.mkdir(parents=True, exist_ok=True)
+    staging = builds / STAGING_NAME
+    if staging.exists():
+        shutil.rmtree(staging)
+    if not limpio and wiki_dir.is_dir():
+        shutil.copytree(wiki_dir, staging, symlinks=True)
+    else:
+        staging.mkdir()
+        readme = wiki_dir / "README.md"
+        if readme.exists():
+            shutil.copy2(readme, staging / "README.md")
+    logging.info("Construyendo en %s", staging)
+    return staging
+
+
+def escribir_config_staging(staging: Path) -> Path:
+    """Genera un ``config.yaml`` que apunta todas las rutas a ``staging``.
+
+    Los scripts lanzados como subprocesos lo leen a través de ``WM_CONFIG``.
+    Las rutas configuradas fuera de la wiki se mantienen.
+    """
+
+    def reubicar(ruta: Path) -> str:
+        try:
+            return str(staging / ruta.relative_to(config.WIKI_DIR))
+        except ValueError:
+            return str(ruta)
+
+    data = {
+        "originales_dir": str(config.ORIGINALES_DIR),
+        "wiki_dir": str(staging),
+        "assets_dir": reubicar(config.ASSETS_DIR),
+        "sidebar_file": reubicar(config.SIDEBAR_FILE),
+        "search_index": reubicar(config.SEARCH_INDEX),
+    }
+    path = staging.parent / CONFIG_NAME
+    path.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+    return path
+
+
+def usar_staging(staging: Path) -> Path:
+    """Redirige la configuración de este proceso y sus hijos a ``staging``."""
+    cfg = escribir_config_staging(staging)
+    os.environ["WM_CONFIG"] = str(cfg)
+    config.load_config(cfg)
+    return cfg
+
+
+def reubicar_enlaces(staging: Path, wiki_dir: Path) -> int:
+    """Sustituye ``staging`` por ``wiki_dir`` en los enlaces de los Markdown.
+
+    Pandoc (``--extract-media``) escribe en los enlaces de las imágenes la
+    ruta de ``config.ASSETS_DIR``, que con :func:`usar_staging` apunta a
+    ``staging``; ese directorio se renombra al publicar, así que hay que
+    llamar a esta función antes de indexar y publicar. Solo se tocan los
+    destinos de ``](...)`` y ``src="..."``. Devuelve cuántos archivos cambiaron.
+    """
+    prefijos = sorted({str(staging), str(staging.absolute())}, key=len, reverse=True)
+    patron = re.compile(
+        r"(\]\(<?|\bsrc=[\"'])(?:%s)(?=/)" % "|".join(map(re.escape, prefijos))
+    )
+    destino = str(wiki_dir)
+    cambiados = 0
+    for md in staging.rglob("*.md"):
+        texto = md.read_text(encoding="utf-8")
+        nuevo = patron.sub(lambda m: m.group(1) + destino, texto)
+        if nuevo != texto:
+            md.write_text(nuevo, encoding="utf-8")
+            cambiados += 1
+    return cambiados
+
+
+def versiones(wiki_dir: Path) -> List[Path]:
+    """Versiones publicadas disponibles, de la más antigua a la más reciente."""
+    builds = builds_dir(wiki_dir)
+    if not builds.exists():
+        return []
+    return sorted(p for p in builds.iterdir() if p.is_dir() and p.name != STAGING_NAME)
+
+
+def _enlace_temporal(wiki_dir: Path, destino: Path) -> Path:
+    """Crea junto a ``wiki_dir`` un enlace provisional a ``destino``."""
+    tmp = wiki_dir.with_name(f".{wiki_dir.name}.tmp")
+    if tmp.is_symlink() or tmp.exists():
+        tmp.unlink()
+    tmp.symlink_to(os.path.relpath(destino, wiki_dir.parent), target_is_directory=True)
+    return tmp
+
+
+def _apuntar(wiki_dir: Path, destino: Path) -> None:
+    """Hace que ``wiki_dir`` apunte a ``destino`` con un único ``os.replace``."""
+    os.replace(_enlace_temporal(wiki_dir, destino), wiki_dir)
+
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def _intercambiar(a: Path, b: Path) -> bool:
+    """Intercambia ``a`` y ``b`` de forma atómica con ``renameat2``.
+
+    Solo existe en Linux (glibc 2.28 o posterior); devuelve ``False`` si la
+    llamada no está disponible o el sistema de archivos no la admite.
+    """
+    nombre = ctypes.util.find_library("c")
+    if nombre is None:
+        return False
+    libc = ctypes.CDLL(nombre, use_errno=True)
+    renameat2 = getattr(libc, "renameat2", None)
+    if renameat2 is None:
+        return False
+    ok = renameat2(
+        _AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE
+    )
+    if ok != 0:
+        logging.debug("renameat2 no disponible: %s", os.strerror(ctypes.get_errno()))
+        return False
+    return True
+
+
+def _migrar(wiki_dir: Path, version: Path, antigua: Path) -> None:
+    """Sustituye el directorio real ``wiki_dir`` por un enlace a ``version``.
+
+    El enlace se crea con un nombre provisional y se intercambia con el
+    directorio en una sola operación, de modo que ``wiki_dir`` existe en todo
+    momento; el directorio original queda después en ``antigua``. Sin
+    ``renameat2`` se recurre a dos renombrados y ``wiki_dir`` falta durante
+    un instante.
+    """
+    tmp = _enlace_temporal(wiki_dir, version)
+    if _intercambiar(tmp, wiki_dir):
+        tmp.rename(antigua)
+        return
+    tmp.unlink()
+    logging.warning("Sin intercambio atómico; %s falta durante la migración", wiki_dir)
+    wiki_dir.rename(antigua)
+    _apuntar(wiki_dir, version)
+
+
+def publicar(staging: Path, wiki_dir: Path, *, conservar: int = 2) -> Path:
+    """Publica ``staging`` como nueva versión de ``wiki_dir``.
+
+    Se mantienen la versión activa y las ``conservar`` anteriores. La primera
+    vez, si ``wiki_dir`` es un directorio real, se intercambia por el enlace
+    y se guarda en ``.wiki_builds`` (ver :func:`_migrar`).
+    """
+    builds = builds_dir(wiki_dir)
+    marca = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    # ``_0`` ordena la wiki migrada antes que la versión nueva (``_1``)
+    version = builds / f"{marca}_1"
+    staging.rename(version)
+
+    try:
+        if wiki_dir.exists() and not wiki_dir.is_symlink():
+            _migrar(wiki_dir, version, builds / f"{marca}_0")
+        else:
+            _apuntar(wiki_dir, version)
+    except OSError as e:  # pragma: no cover - sistemas sin enlaces simbólicos
+        logging.warning("Sin enlaces simbólicos (%s); se renombra el directorio", e)
+        if wiki_dir.is_symlink():
+            wiki_dir.unlink()
+        elif wiki_dir.exists():
+            wiki_dir.rename(builds / f"{marca}_0")
+        version.rename(wiki_dir)
+        return wiki_dir
+
+    for antigua in versiones(wiki_dir)[: -(conservar + 1)]:
+        shutil.rmtree(antigua, ignore_errors=True)
+    logging.info("Publicada %s → %s", wiki_dir, version)
+    return version
+
+
+def rollback(wiki_dir: Path) -> Path:
+    """Vuelve a la versión publicada anterior a la activa."""
+    disponibles = versiones(wiki_dir)
+    actual = wiki_dir.resolve()
+    resueltas = [v.resolve() for v in disponibles]
+    if actual in resueltas:
+        anteriores = disponibles[: resueltas.index(actual)]
+    else:
+        anteriores = disponibles
+    if not anteriores:
+        raise RuntimeError("No hay una versión anterior a la que volver")
+    destino = anteriores[-1]
+    _apuntar(wiki_dir, destino)
+    logging.info("Rollback %s → %s", wiki_dir, destino)
+    return destino
+
+
+__all__ = [
+    "builds_dir",
+    "preparar_staging",
+    "escribir_config_staging",
+    "usar_staging",
+    "reubicar_enlaces",
+    "versiones",
+    "publicar",
+    "rollback",
+]
@@ -8,6 +8,7 @@ from typing import Any
 import yaml
 
 __all__ = [
+    "plegar_acentos",
     "limpiar_slug",
     "load_yaml",
     "limpiar_atributos_imagenes",
@@ -16,11 +17,18 @@ __all__ = [
 ]
 
 
+def plegar_acentos(texto: str) -> str:
+    """Descompone ``texto`` con NFKD y elimina las marcas diacríticas."""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)
+    )
+
+
 def limpiar_slug(texto: str) -> str:
     """Devuelve un slug idempotente para nombres de archivo."""
     if not isinstance(texto, str):
         texto = str(texto)
-    ascii_text = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    ascii_text = plegar_acentos(texto).encode("ascii", "ignore").decode()
     ascii_text = ascii_text.lower()
     # Remove anchors like '_toc1234' that may appear in headings
     ascii_text = re.sub(r"_toc\d+", "", ascii_text)
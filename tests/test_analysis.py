@@ -0,0 +1,90 @@
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from wiki_modular import limpiar_slug
+from wiki_modular.core.analysis import STOPWORDS_ES, analizar, stem_es
+from wiki_modular.core.search import BM25Index
+
+WORKER = Path(__file__).resolve().parents[1] / "docs" / "buscar-worker.js"
+
+
+def test_analizar_pliega_filtra_y_reduce():
+    assert analizar("La Configuración de las configuraciones") == [
+        "configuracion",
+        "configuracion",
+    ]
+    assert analizar("Luces y procesos del año") == ["luc", "proces", "ano"]
+    assert stem_es("meses") == "mes"
+    assert stem_es("red") == "red"
+    # Mismo plegado de acentos que los slugs
+    assert analizar("Instalación")[0] == limpiar_slug("Instalacion")
+
+
+def test_stopwords_iguales_en_el_navegador():
+    js = WORKER.read_text(encoding="utf-8")
+    bloque = re.search(r"STOPWORDS_ES = new Set\(\((.*?)\)\.split", js, re.S)
+    palabras = set(" ".join(re.findall(r"'([^']*)'", bloque.group(1))).split())
+    assert palabras == STOPWORDS_ES
+
+
+def test_bm25_encuentra_sin_acentos_ni_plural():
+    indice = BM25Index(
+        {
+            "a.md": {"content": "Configuraciones de red", "headers": []},
+            "b.md": {"content": "Otra cosa", "headers": []},
+        }
+    )
+    hits = indice.search("configuración")
+    assert [h.ruta for h in hits] == ["a.md"]
+    assert hits[0].fragmento.startswith("Configuraciones")
+
+
+SINGULAR_PLURAL = [
+    ("dato", "datos"),
+    ("base", "bases"),
+    ("tipo", "tipos"),
+    ("caso", "casos"),
+    ("nota", "notas"),
+    ("indice", "indices"),
+    ("luz", "luces"),
+    ("vez", "veces"),
+    ("mes", "meses"),
+    ("red", "redes"),
+    ("clave", "claves"),
+    ("tabla", "tablas"),
+    ("papel", "papeles"),
+    ("servidor", "servidores"),
+    ("version", "versiones"),
+    ("backup", "backups"),
+]
+
+
+def test_singular_y_plural_comparten_raiz():
+    for singular, plural in SINGULAR_PLURAL:
+        assert stem_es(singular) == stem_es(plural), (singular, plural)
+    assert stem_es("datos") == "dat"
+    assert stem_es("indices") == "indic"
+    # Las raíces nunca bajan de tres letras
+    assert stem_es("ano") == "ano"
+    assert stem_es("gas") == "gas"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="requiere Node.js")
+def test_stemmer_igual_en_el_navegador():
+    js = WORKER.read_text(encoding="utf-8")
+    inicio = js.index("const MIN_RAIZ")
+    fin = js.index("function analizarTermino")
+    palabras = [p for par in SINGULAR_PLURAL for p in par] + ["ano", "gas", "e", ""]
+    script = (
+        js[inicio:fin]
+        + f"console.log(JSON.stringify({json.dumps(palabras)}.map(stemEs)));"
+    )
+    salida = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True
+    ).stdout
+    assert json.loads(salida) == [stem_es(p) for p in palabras]
@@ -0,0 +1,86 @@
+import sys
+
+import scripts.generar_indice_busqueda as gen
+from wiki_modular.core.autocompletado import (
+    TOP_K,
+    Autocompletado,
+    construir_autocompletado,
+)
+
+
+def _pagina(titulo, *encabezados):
+    return {
+        "metadata": {"titulo": titulo},
+        "content": "",
+        "headers": [
+            {"level": nivel, "text": texto, "slug": texto.lower().replace(" ", "-")}
+            for nivel, texto in encabezados
+        ],
+    }
+
+
+INDICE = {
+    "red/vpn.md": _pagina(
+        "Configuración de la VPN", (2, "Certificados"), (3, "Conexión")
+    ),
+    "red/proxy.md": _pagina("Proxy corporativo", (2, "Configurar el navegador")),
+    "sql/backup.md": _pagina("Copias de seguridad", (2, "Configuración"), (4, "Cron")),
+}
+
+
+def _textos(sugerencias):
+    return [s.texto for s in sugerencias]
+
+
+def test_suggest_ordena_por_peso_y_longitud():
+    auto = Autocompletado(construir_autocompletado(INDICE))
+    # Títulos (peso 6) antes que H2 (4); a igual peso, el texto más corto
+    assert _textos(auto.suggest("config")) == [
+        "Configuración de la VPN",
+        "Configuración",
+        "Configurar el navegador",
+    ]
+    primera = auto.suggest("config", k=1)[0]
+    assert (primera.ruta, primera.slug, primera.peso) == ("red/vpn.md", "", 6)
+
+
+def test_suggest_inicio_de_palabra_y_acentos():
+    auto = Autocompletado(construir_autocompletado(INDICE))
+    assert _textos(auto.suggest("VPN")) == ["Configuración de la VPN"]
+    assert _textos(auto.suggest("conexion")) == ["Conexión"]
+    assert _textos(auto.suggest("  SEGURIDAD")) == ["Copias de seguridad"]
+    # Solo al principio de una palabra y sin palabras vacías
+    assert auto.suggest("uracion") == []
+    assert auto.suggest("de") == []
+    assert auto.suggest("") == []
+
+
+def test_prefijos_cortos_coinciden_con_busqueda_binaria():
+    indice = {
+        f"p{i}.md": _pagina(f"{'abc'[i % 3]}{i} tema", (2, f"c{i % 5} apartado"))
+        for i in range(60)
+    }
+    auto = Autocompletado(construir_autocompletado(indice))
+    for prefijo in ("a", "b", "c", "c1", "a3", "t", "ap"):
+        # ``k`` mayor que ``topK`` fuerza el camino de las búsquedas binarias
+        largo = auto.suggest(prefijo, k=TOP_K + 1)
+        assert auto.suggest(prefijo, k=TOP_K) == largo[:TOP_K]
+
+
+def test_generar_indice_writes_suggest(tmp_path, monkeypatch):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "a.md").write_text("# Alertas\n\n## Correo saliente\n", encoding="utf-8")
+    out = tmp_path / "search_index.json"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(out)]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+
+    auto = Autocompletado.from_json(tmp_path / "search_index.suggest.json")
+    [sugerencia] = auto.suggest("sal")
+    assert (sugerencia.texto, sugerencia.ruta, sugerencia.slug) == (
+        "Correo saliente",
+        "a.md",
+        "correo_saliente",
+    )
+    assert _textos(auto.suggest("al")) == ["Alertas"]
@@ -0,0 +1,67 @@
+import sys
+
+import scripts.generar_indice_busqueda as gen
+from scripts import wiki_cli
+from wiki_modular.core.correccion import (
+    Corrector,
+    borrados,
+    construir_corrector,
+    distancia,
+)
+
+
+def _indice():
+    textos = {
+        "sql.md": "Instalación de SQL Server. Servidor SQL y servicios del servidor.",
+        "red.md": "Configuración del servidor de red. Reiniciar el servicio.",
+        "otro.md": "Servidor de correo con servicio propio.",
+    }
+    return {ruta: {"metadata": {}, "content": texto} for ruta, texto in textos.items()}
+
+
+def test_distancia_y_borrados():
+    assert distancia("servidor", "servidro", 2) == 1
+    assert distancia("servidor", "sevridor", 2) == 1
+    assert distancia("servidor", "srvdr", 2) == 3
+    assert distancia("abc", "abc", 0) == 0
+    assert borrados("abc", 1) == {"abc", "ab", "ac", "bc"}
+
+
+def test_suggest_correction_prefiere_distancia_y_frecuencia():
+    corrector = Corrector(construir_corrector(_indice()))
+    assert corrector.terminos[0] == ["servidor", 4]
+    assert corrector.suggest_correction("Servidro") == "servidor"
+    # Ya correcta (con o sin acentos)
+    assert corrector.suggest_correction("instalacion") == "instalacion"
+    # Primero la menor distancia; a igual distancia, la palabra más frecuente
+    sugerencias = corrector.sugerencias("servicos")
+    assert [(c.termino, c.distancia) for c in sugerencias] == [
+        ("servicios", 1),
+        ("servidor", 2),
+        ("servicio", 2),
+    ]
+    assert corrector.suggest_correction("kubernetes") is None
+
+
+def test_corregir_consulta():
+    corrector = Corrector(construir_corrector(_indice()))
+    assert corrector.corregir("reinciar el servico de sql") == (
+        "reiniciar el servicio de sql"
+    )
+    assert corrector.corregir("servidor 2019") == "servidor 2019"
+
+
+def test_cli_sugiere_correccion(tmp_path, monkeypatch, capsys):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "a.md").write_text("# Alertas\nReplicación de bases\n", encoding="utf-8")
+    out = tmp_path / "search_index.json"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(out), "--spell"]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+
+    argv = ["wiki_cli", "search", "replicasion", "--search-index", str(out)]
+    monkeypatch.setattr(sys, "argv", argv)
+    wiki_cli.main()
+    salida = capsys.readouterr().out.splitlines()
+    assert salida == ["Sin resultados", "¿Quiso decir: replicacion?"]
@@ -0,0 +1,151 @@
+import json
+import random
+import sys
+
+import numpy as np
+
+from scripts import generar_indice_busqueda as gib
+from scripts import wiki_cli
+from wiki_modular.core.duplicados import (
+    FirmasCache,
+    MinHash,
+    buscar_duplicados,
+    huella_firmas,
+    pares_candidatos,
+    shingles,
+    similitud_estimada,
+)
+
+PALABRAS = [f"palabra{i}" for i in range(500)]
+
+
+def _texto(rng, n=300):
+    return " ".join(rng.choices(PALABRAS, k=n))
+
+
+def _variante(rng, texto, cambios):
+    palabras = texto.split()
+    for _ in range(cambios):
+        palabras[rng.randrange(len(palabras))] = rng.choice(PALABRAS)
+    return " ".join(palabras)
+
+
+def _jaccard(a, b):
+    a, b = set(shingles(a).tolist()), set(shingles(b).tolist())
+    return len(a & b) / len(a | b)
+
+
+def test_firmas_estiman_jaccard():
+    rng = random.Random(0)
+    base = _texto(rng)
+    textos = [base] + [_variante(rng, base, c) for c in (2, 10, 40, 300)]
+    firmas = MinHash(256).firmas([shingles(t) for t in textos])
+    assert firmas.shape == (5, 256)
+
+    pares = np.array([[0, i] for i in range(1, 5)])
+    estimada = similitud_estimada(firmas, pares)
+    real = [_jaccard(base, t) for t in textos[1:]]
+    assert np.allclose(estimada, real, atol=0.1)
+    # Calcular por separado da la misma firma que en lote
+    assert (MinHash(256).firmas([shingles(textos[2])])[0] == firmas[2]).all()
+
+
+def test_lsh_encuentra_parejas_parecidas_sin_compararlas_todas():
+    rng = random.Random(1)
+    textos = [_texto(rng) for _ in range(60)]
+    textos += [_variante(rng, textos[i], 3) for i in range(10)]
+    firmas = MinHash().firmas([shingles(t) for t in textos])
+    pares = {tuple(p) for p in pares_candidatos(firmas).tolist()}
+    assert {(i, 60 + i) for i in range(10)} <= pares
+    # Las páginas distintas apenas generan candidatas
+    assert len(pares) < 20
+
+
+def test_grupos_y_canonica(tmp_path):
+    rng = random.Random(2)
+    base = _texto(rng)
+    paginas = {
+        "99_Nuevas_Secciones/copia.md": {"content": _variante(rng, base, 2)},
+        "redes/vpn.md": {"content": base + " " + _texto(rng, 5)},
+        "redes/otra.md": {"content": _texto(rng)},
+        "sistemas/backup.md": {"content": _texto(rng)},
+        "vacia.md": {"content": ""},
+    }
+    paginas["sistemas/backup_v2.md"] = {
+        "content": paginas["sistemas/backup.md"]["content"]
+    }
+
+    cache = FirmasCache(tmp_path / "cache.npz", huella_firmas())
+    grupos, calculadas = buscar_duplicados(paginas, cache=cache)
+    assert calculadas == 5
+    cache.save()
+    assert [g.canonica for g in grupos] == ["redes/vpn.md", "sistemas/backup.md"]
+    assert grupos[0].duplicadas[0][0] == "99_Nuevas_Secciones/copia.md"
+    assert 0.8 <= grupos[0].duplicadas[0][1] < 1
+    assert grupos[1].duplicadas == [("sistemas/backup_v2.md", 1.0)]
+
+    # Solo se calculan las firmas de los contenidos nuevos
+    paginas["redes/otra.md"] = {"content": _texto(rng)}
+    cache = FirmasCache(tmp_path / "cache.npz", huella_firmas())
+    otra_vez, calculadas = buscar_duplicados(paginas, cache=cache)
+    assert calculadas == 1 and cache.hits == 4
+    assert otra_vez == grupos
+
+    # Otros parámetros invalidan la caché
+    assert FirmasCache(tmp_path / "cache.npz", huella_firmas(64)).get("x") is None
+
+
+def test_grupos_no_encadenan_paginas_lejanas_de_la_canonica():
+    rng = random.Random(4)
+    base = _texto(rng).split()
+    cerca = base[:20] + [f"cambio{i}" for i in range(12)] + base[32:]
+    lejos = cerca[:200] + [f"otro{i}" for i in range(12)] + cerca[212:]
+    paginas = {
+        "a.md": {"content": " ".join(base)},
+        "99_Nuevas_Secciones/b.md": {"content": " ".join(cerca)},
+        "99_Nuevas_Secciones/c.md": {"content": " ".join(lejos)},
+    }
+    # b se parece a a y a c, pero c queda por debajo del umbral respecto a a
+    assert _jaccard(paginas["a.md"]["content"], " ".join(cerca)) > 0.87
+    assert _jaccard(" ".join(cerca), " ".join(lejos)) > 0.87
+    assert _jaccard(paginas["a.md"]["content"], " ".join(lejos)) < 0.83
+
+    grupos, _ = buscar_duplicados(paginas, umbral=0.85, num_perm=256)
+    assert [g.canonica for g in grupos] == ["a.md"]
+    assert [r for r, _ in grupos[0].duplicadas] == ["99_Nuevas_Secciones/b.md"]
+    assert all(s >= 0.85 for _, s in grupos[0].duplicadas)
+
+
+def test_cli_dedupe(tmp_path, monkeypatch, capsys):
+    rng = random.Random(3)
+    base = _texto(rng)
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "a.md").write_text(base, encoding="utf-8")
+    (wiki / "b.md").write_text(_variante(rng, base, 1), encoding="utf-8")
+    (wiki / "c.md").write_text(_texto(rng), encoding="utf-8")
+    indice = tmp_path / "search_index.json"
+    gib.update_index(list(wiki.glob("*.md")), wiki_dir=wiki, output=indice)
+    monkeypatch.setattr(wiki_cli.config, "WIKI_DIR", wiki)
+    # El índice queda desfasado: c.md pasa a ser otra copia de a.md
+    (wiki / "c.md").write_text(_variante(rng, base, 2), encoding="utf-8")
+    salida = tmp_path / "grupos.json"
+    argv = [
+        "wiki_cli",
+        "dedupe",
+        "--search-index",
+        str(indice),
+        "--cache",
+        str(tmp_path / "cache.npz"),
+        "--json",
+        str(salida),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    wiki_cli.main()
+
+    lineas = capsys.readouterr().out.splitlines()
+    assert lineas[0] == "Grupo 1: canónica a.md"
+    assert [linea.split()[-1] for linea in lineas[1:3]] == ["b.md", "c.md"]
+    data = json.loads(salida.read_text(encoding="utf-8"))
+    assert data[0]["canonical"] == "a.md"
+    assert (tmp_path / "cache.npz").exists()
@@ -6,7 +6,10 @@ def test_load_and_save(tmp_path, monkeypatch):
     md.write_text("hola", encoding="utf-8")
 
     monkeypatch.setattr(editor, "FILE", md, raising=False)
-    monkeypatch.setattr(editor, "run", lambda cmd: None)
+    actualizados = []
+    monkeypatch.setattr(
+        editor, "update_index", lambda paths, **kw: actualizados.extend(paths)
+    )
 
     client = editor.app.test_client()
     assert client.get("/load").data.decode() == "hola"
@@ -14,3 +17,4 @@ def test_load_and_save(tmp_path, monkeypatch):
     resp = client.post("/save", data="nuevo")
     assert resp.status_code == 200
     assert md.read_text(encoding="utf-8") == "nuevo"
+    assert actualizados == [md]
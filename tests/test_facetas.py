@@ -0,0 +1,138 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+import scripts.generar_indice_busqueda as gen
+from scripts import wiki_cli
+from wiki_modular.core.facetas import Facetas, Rango, construir_facetas
+from wiki_modular.core.search import BM25Index
+
+
+def _paginas():
+    paginas = {}
+    for i in range(20):
+        meta = {
+            "source_file": f"manual_{'ab'[i % 2]}.docx",
+            "conversion_date": f"2024-0{1 + i % 4}-15",
+            "nivel": 1 + i % 3,
+        }
+        paginas[f"p{i:02d}.md"] = {"metadata": meta, "content": f"red {i}"}
+    paginas["sin_meta.md"] = {"metadata": {}, "content": "red"}
+    return paginas
+
+
+def test_mascara_equivale_a_filtrar_metadatos():
+    paginas = _paginas()
+    facetas = Facetas(construir_facetas(paginas))
+    metas = [info["metadata"] for info in paginas.values()]
+    mascara = facetas.mascara(
+        {"source_file": "manual_a.docx", "conversion_date": Rango("2024-02-01")}
+    )
+    esperado = [
+        m.get("source_file") == "manual_a.docx"
+        and m.get("conversion_date", "") >= "2024-02-01"
+        for m in metas
+    ]
+    assert mascara.tolist() == esperado
+
+    nivel = facetas.mascara({"nivel": ["1", "3"]})
+    assert nivel.tolist() == [m.get("nivel") in (1, 3) for m in metas]
+    assert facetas.mascara({}).all()
+    assert not facetas.mascara({"source_file": "otro.docx"}).any()
+    assert facetas.valores("conversion_date")[0] == "2024-01-15"
+    with pytest.raises(ValueError):
+        facetas.mascara({"autor": "x"})
+
+
+def test_search_con_filtro():
+    paginas = _paginas()
+    facetas = Facetas(construir_facetas(paginas))
+    filtro = facetas.mascara({"conversion_date": Rango(hasta="2024-01-31")})
+    hits = BM25Index(paginas).search("red", k=50, filtro=filtro)
+    assert [h.ruta for h in hits] == [f"p{i:02d}.md" for i in range(0, 20, 4)]
+    with pytest.raises(ValueError):
+        BM25Index(paginas).search("red", filtro=np.ones(3, dtype=bool))
+
+
+def test_parse_filtros():
+    filtros = wiki_cli.parse_filtros(
+        ["source_file=a.docx", "source_file=b.docx", "conversion_date>=2024-02-01"]
+    )
+    assert filtros == {
+        "source_file": ["a.docx", "b.docx"],
+        "conversion_date": Rango("2024-02-01", None),
+    }
+    with pytest.raises(ValueError):
+        wiki_cli.parse_filtros(["nivel"])
+    with pytest.raises(ValueError):
+        wiki_cli.parse_filtros(["nivel=1", "nivel>=2"])
+
+
+def test_cli_search_filtra_con_facetas(tmp_path, monkeypatch, capsys):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    for nombre, fecha in (("a", "2024-01-10"), ("b", "2024-03-10")):
+        (wiki / f"{nombre}.md").write_text(
+            f"---\nsource_file: manual.docx\nconversion_date: '{fecha}'\n---\n"
+            "# Alertas\ncorreo\n",
+            encoding="utf-8",
+        )
+    out = tmp_path / "search_index.json"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(out)]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+    assert (tmp_path / "search_index.facets.json").exists()
+
+    argv = [
+        "wiki_cli",
+        "search",
+        "correo",
+        "--search-index",
+        str(out),
+        "--filter",
+        "source_file=manual.docx",
+        "--filter",
+        "conversion_date>=2024-02-01",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    wiki_cli.main()
+    salida = capsys.readouterr().out.splitlines()
+    assert len(salida) == 2 and "b.md" in salida[0]
+
+    # Tras update_index el binario y las facetas están desfasados: se usa el JSON
+    (wiki / "c.md").write_text(
+        "---\nsource_file: manual.docx\nconversion_date: '2024-04-01'\n---\n"
+        "# Alertas\ncorreo\n",
+        encoding="utf-8",
+    )
+    gen.update_index([wiki / "c.md"], wiki_dir=wiki, output=out)
+    hits = wiki_cli.search_wiki(
+        "correo",
+        search_index=out,
+        filtros=wiki_cli.parse_filtros(argv[-3::2]),
+    )
+    assert sorted(h.ruta for h in hits) == ["b.md", "c.md"]
+
+
+def test_facetas_de_otro_indice_se_rechazan(tmp_path):
+    paginas = _paginas()
+    facetas = Facetas(construir_facetas(paginas))
+    facetas.comprobar_rutas(list(paginas))
+    # Mismo número de páginas pero en otro orden: las máscaras no sirven
+    with pytest.raises(ValueError):
+        facetas.comprobar_rutas(sorted(paginas, reverse=True))
+
+    out = tmp_path / "search_index.json"
+    gen.escribir_salidas(
+        paginas, out, {"postings": str(out.with_suffix(gen.POSTINGS_SUFFIX))}
+    )
+    renombradas = {f"x{ruta}": info for ruta, info in paginas.items()}
+    out.with_suffix(gen.FACETS_SUFFIX).write_text(
+        json.dumps(construir_facetas(renombradas)), encoding="utf-8"
+    )
+    with pytest.raises(ValueError):
+        wiki_cli.search_wiki(
+            "red", search_index=out, filtros={"source_file": "manual_a.docx"}
+        )
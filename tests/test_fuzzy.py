@@ -0,0 +1,82 @@
+import random
+import string
+from difflib import get_close_matches
+
+from wiki_modular.core.fuzzy import TrigramIndex, trigramas
+
+CANDIDATOS = [
+    "introduccion",
+    "instalacion_sql",
+    "server",
+    "backup_y_restauracion",
+    "alta_disponibilidad",
+    "configuracion_de_red",
+    "logs",
+]
+
+
+def test_trigramas_padding():
+    assert trigramas("ab") == {" ab", "ab "}
+    assert trigramas("") == set()
+
+
+def test_close_matches_same_as_difflib():
+    indice = TrigramIndex(CANDIDATOS)
+    consultas = [
+        "intrduccion",
+        "instalacion sql",
+        "srrvo",
+        "bakup_restauracion",
+        "xyz",
+        "lgos",
+    ]
+    for consulta in consultas:
+        for cutoff in (0.3, 0.5, 0.8):
+            esperado = get_close_matches(consulta, CANDIDATOS, n=2, cutoff=cutoff)
+            assert indice.close_matches(consulta, n=2, cutoff=cutoff) == esperado
+
+
+def test_misma_respuesta_que_difflib_con_consultas_ajenas_al_indice():
+    rng = random.Random(0)
+    palabras = "replica datos rendimiento configuracion indices faq las red".split()
+    candidatos = list(
+        {"_".join(rng.sample(palabras, rng.randint(1, 4))) for _ in range(300)}
+    )
+    consultas = ["rendimiento_replifacion_configuracion", "faqlas", "", "x"]
+    consultas += [
+        "".join(rng.choices(string.ascii_lowercase + "_", k=rng.randint(2, 30)))
+        for _ in range(30)
+    ]
+    indice = TrigramIndex(candidatos)
+    for consulta in consultas:
+        for cutoff in (0.0, 0.4, 0.6):
+            esperado = get_close_matches(consulta, candidatos, n=3, cutoff=cutoff)
+            assert indice.close_matches(consulta, n=3, cutoff=cutoff) == esperado
+
+
+def test_cadenas_vacias_como_difflib():
+    candidatos = ["", "a", "ab"]
+    indice = TrigramIndex(candidatos)
+    for consulta in ("", "a", "b"):
+        for cutoff in (0.0, 0.6, 1.0):
+            esperado = get_close_matches(consulta, candidatos, n=3, cutoff=cutoff)
+            assert indice.close_matches(consulta, n=3, cutoff=cutoff) == esperado
+
+
+def test_erratas_sin_acotar_todo_el_indice():
+    rng = random.Random(1)
+    palabras = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        for _ in range(200)
+    ]
+    candidatos = list(
+        {"_".join(rng.sample(palabras, rng.randint(2, 4))) for _ in range(2000)}
+    )
+    indice = TrigramIndex(candidatos)
+    consulta = candidatos[7][:-1]
+    assert indice.close_matches(consulta, n=1, cutoff=0.5) == get_close_matches(
+        consulta, candidatos, n=1, cutoff=0.5
+    )
+    # El mejor supera la cota de los candidatos sin trigramas en común: solo
+    # se acotan los de la lista corta
+    assert indice.acotados < len(candidatos) // 4
@@ -1,8 +1,87 @@
 import json
+import os
+import shutil
+import subprocess
 import sys
+from pathlib import Path
+
+import pytest
 
 import scripts.generar_indice_busqueda as gen
 
+WORKER = Path(__file__).resolve().parents[1] / "docs" / "buscar-worker.js"
+CONSULTAS_LUNR = (
+    "servidor",
+    "instalacion",
+    "Instalación",
+    "backup",
+    "manual.docx",
+    "serv*",
+    "copia",
+    "+servidor -sql",
+    "content:memoria",
+    "servidr~1",
+    "xyz",
+)
+
+# Ejecuta buscar-worker.js en Node con lunr.js: carga el índice precalculado
+# (loadPrebuilt) y el construido en el cliente (buildClientSide) y devuelve
+# los resultados de las consultas con ambos
+_NODE_CLIENTE = r"""
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const [worker, lunrJs, dir, consultas] = process.argv.slice(1);
+const ctx = { console, TextEncoder, URL, atob, CONSULTAS: JSON.parse(consultas) };
+ctx.location = { href: 'http://localhost/docs/buscar-worker.js?base=./' };
+ctx.self = ctx;
+ctx.importScripts = () => vm.runInContext(fs.readFileSync(lunrJs, 'utf8'), ctx);
+ctx.fetch = async nombre => {
+  const p = path.join(dir, nombre);
+  if (!fs.existsSync(p)) return { ok: false };
+  const texto = fs.readFileSync(p, 'utf8');
+  return { ok: true, json: async () => JSON.parse(texto) };
+};
+vm.createContext(ctx);
+vm.runInContext(fs.readFileSync(worker, 'utf8'), ctx);
+vm.runInContext(`(async () => {
+  await ready;
+  const refs = i => CONSULTAS.map(q => i.search(q).map(r => [r.ref, r.score]));
+  const prebuilt = [refs(idx), refs(headerIdx)];
+  await buildClientSide();
+  return { prebuilt, cliente: [refs(idx), refs(headerIdx)] };
+})()`, ctx).then(r => process.stdout.write(JSON.stringify(r)));
+"""
+
+
+def _lunr_js():
+    """Ruta de lunr.js para Node (``LUNR_JS`` o el paquete npm ``lunr``)."""
+    node = shutil.which("node")
+    if not node:
+        return None
+    if os.environ.get("LUNR_JS"):
+        return Path(os.environ["LUNR_JS"])
+    res = subprocess.run(
+        [node, "-e", "process.stdout.write(require.resolve('lunr'))"],
+        capture_output=True,
+        text=True,
+    )
+    return Path(res.stdout) if res.returncode == 0 else None
+
+
+def _wiki_lunr(tmp_path):
+    wiki = tmp_path / "wiki"
+    (wiki / "sql").mkdir(parents=True)
+    (wiki / "a.md").write_text(
+        "---\nsource_file: manual.docx\nconversion_date: '2024-05-01'\n---\n\n"
+        "## Instalación\nPasos de instalación del servidor\n### Requisitos\nmemoria\n",
+        encoding="utf-8",
+    )
+    (wiki / "sql" / "b.md").write_text(
+        "## Backup\nCopias de seguridad del servidor SQL\n", encoding="utf-8"
+    )
+    return wiki
+
 
 def test_generar_indice_creates_json(tmp_path, monkeypatch):
     wiki = tmp_path / "wiki"
@@ -25,5 +104,355 @@ def test_generar_indice_creates_json(tmp_path, monkeypatch):
     assert data["sample.md"]["metadata"]["source"] == "doc.docx"
     assert "Intro" in data["sample.md"]["content"]
     headers = data["sample.md"]["headers"]
-    assert {"level": 2, "text": "Intro", "slug": "intro"} in headers
-    assert {"level": 3, "text": "Sub", "slug": "sub"} in headers
+    assert headers == [
+        {"level": 2, "text": "Intro", "slug": "intro", "pos": 0, "end": 23},
+        {"level": 3, "text": "Sub", "slug": "sub", "pos": 15, "end": 23},
+    ]
+
+
+def test_header_offsets_are_utf16_and_close_sections(tmp_path):
+    md = tmp_path / "a.md"
+    cuerpo = "## Instalación 🚀\nPasos\n### Requisitos\nx\n## Backup\ny\n"
+    md.write_text(cuerpo, encoding="utf-8")
+    _, contenido, headers = gen.extraer_frontmatter(md)
+    ofs = {h["slug"]: (h["pos"], h["end"]) for h in headers}
+    # El emoji ocupa dos unidades UTF-16 (como en JavaScript)
+    assert ofs["requisitos"] == (len("## Instalación 🚀\nPasos\n") + 1, ofs["backup"][0])
+    assert ofs["instalacion"] == (0, ofs["backup"][0])
+    assert ofs["backup"][1] == len(contenido.encode("utf-16-le")) // 2
+
+
+def test_lunr_prebuilt_matches_lunr_py_index(tmp_path, monkeypatch):
+    from lunr import lunr
+    from lunr.index import Index
+
+    from wiki_modular.core.analysis import builder_lunr
+
+    wiki = _wiki_lunr(tmp_path)
+    out = tmp_path / "search_index.json"
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "--wiki", str(wiki), "--output", str(out), "--lunr"]
+    )
+    gen.main()
+
+    prebuilt = json.loads((tmp_path / "search_index.lunr.json").read_text("utf-8"))
+    assert prebuilt["index"]["version"] == "2.3.9"
+    idx = Index.load(prebuilt["index"])
+    header_idx = Index.load(prebuilt["headerIndex"])
+
+    # Mismos documentos que construye buscar-avanzado.html en el navegador
+    data = json.loads(out.read_text(encoding="utf-8"))
+    docs = [
+        {
+            "id": doc_id,
+            "content": info["content"],
+            "source_file": info["metadata"].get("source_file", ""),
+            "conversion_date": info["metadata"].get("conversion_date", ""),
+        }
+        for doc_id, info in data.items()
+    ]
+    headers = [
+        {"ref": f"{doc_id}#{h['slug']}", "header": h["text"]}
+        for doc_id, info in data.items()
+        for h in info["headers"]
+    ]
+    cliente = lunr(
+        ref="id",
+        fields=("content", "source_file", "conversion_date"),
+        documents=docs,
+        builder=builder_lunr(),
+    )
+    cliente_headers = lunr(
+        ref="ref", fields=("header",), documents=headers, builder=builder_lunr()
+    )
+
+    consultas = ("servidor", "instalacion", "backup", "manual.docx", "serv*", "copia")
+    for query in (*consultas, "xyz"):
+        assert {r["ref"] for r in idx.search(query)} == {
+            r["ref"] for r in cliente.search(query)
+        }
+        assert {r["ref"] for r in header_idx.search(query)} == {
+            r["ref"] for r in cliente_headers.search(query)
+        }
+    assert {r["ref"] for r in idx.search("servidor")} == {"a.md", "sql/b.md"}
+    # Acentos plegados y plurales reducidos al construir el índice
+    assert {r["ref"] for r in idx.search("instalacion")} == {"a.md"}
+    assert {r["ref"] for r in idx.search("copia")} == {"sql/b.md"}
+    pos = {h["ref"]: h["pos"] for h in prebuilt["headers"]}["a.md#requisitos"]
+    assert data["a.md"]["content"][pos:].startswith("### Requisitos")
+
+    # Sin --lunr se borra el de la compilación anterior para no servirlo desfasado
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "--wiki", str(wiki), "--output", str(out)]
+    )
+    gen.main()
+    assert not (tmp_path / "search_index.lunr.json").exists()
+
+
+@pytest.mark.skipif(
+    _lunr_js() is None, reason="requiere Node y lunr.js (npm i lunr o LUNR_JS)"
+)
+def test_lunr_prebuilt_matches_client_index(tmp_path, monkeypatch):
+    # Compara con lunr.js y el análisis de buscar-worker.js, no con lunr.py
+    wiki = _wiki_lunr(tmp_path)
+    out = tmp_path / "search_index.json"
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "--wiki", str(wiki), "--output", str(out), "--lunr"]
+    )
+    gen.main()
+
+    res = subprocess.run(
+        [
+            shutil.which("node"),
+            "-e",
+            _NODE_CLIENTE,
+            str(WORKER),
+            str(_lunr_js()),
+            str(tmp_path),
+            json.dumps(CONSULTAS_LUNR),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    resultados = json.loads(res.stdout)
+    for prebuilt, cliente in zip(resultados["prebuilt"], resultados["cliente"]):
+        for hits_prebuilt, hits_cliente in zip(prebuilt, cliente):
+            assert [ref for ref, _ in hits_prebuilt] == [ref for ref, _ in hits_cliente]
+            for (_, a), (_, b) in zip(hits_prebuilt, hits_cliente):
+                assert a == pytest.approx(b, rel=1e-6)
+    docs = dict(zip(CONSULTAS_LUNR, resultados["prebuilt"][0]))
+    assert sorted(ref for ref, _ in docs["servidor"]) == ["a.md", "sql/b.md"]
+    assert [ref for ref, _ in docs["instalacion"]] == ["a.md"]
+
+
+def test_shards_stable_names_and_bloom(tmp_path, monkeypatch):
+    from wiki_modular.core.shards import MANIFEST_NAME, bloom_contiene, terminos
+
+    wiki = tmp_path / "wiki"
+    (wiki / "intro").mkdir(parents=True)
+    (wiki / "backup").mkdir()
+    (wiki / "1_intro.md").write_text("# Introducción\nservidores\n", encoding="utf-8")
+    (wiki / "intro" / "alcance.md").write_text("## Alcance\ntexto\n", encoding="utf-8")
+    (wiki / "backup" / "restaurar.md").write_text(
+        "## Restaurar\ncopias\n", encoding="utf-8"
+    )
+    shards = tmp_path / "search"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(tmp_path / "i.json")]
+    monkeypatch.setattr(sys, "argv", argv + ["--shards", str(shards)])
+
+    gen.main()
+    manifest = json.loads((shards / MANIFEST_NAME).read_text(encoding="utf-8"))
+    assert set(manifest["shards"]) == {"intro", "backup"}
+    assert manifest["shards"]["intro"]["docs"] == ["1_intro.md", "intro/alcance.md"]
+    assert manifest["docs"]["1_intro.md"]["title"] == "Introducción"
+    assert manifest["docs"]["backup/restaurar.md"]["headers"][0]["slug"] == "restaurar"
+    filtro = manifest["shards"]["intro"]["terms"]
+    assert all(bloom_contiene(filtro, t) for t in terminos("servidores alcance"))
+    assert not bloom_contiene(manifest["shards"]["backup"]["terms"], "servidor")
+
+    antes = {k: v["file"] for k, v in manifest["shards"].items()}
+    # Los archivos ajenos al manifest se conservan aunque parezcan fragmentos
+    (shards / "ajeno.config.json").write_text("{}", encoding="utf-8")
+    (wiki / "backup" / "restaurar.md").write_text("## Restaurar\notro\n", "utf-8")
+    gen.main()
+    manifest = json.loads((shards / MANIFEST_NAME).read_text(encoding="utf-8"))
+    despues = {k: v["file"] for k, v in manifest["shards"].items()}
+    assert despues["intro"] == antes["intro"]
+    assert despues["backup"] != antes["backup"]
+    assert sorted(p.name for p in shards.iterdir()) == sorted(
+        [MANIFEST_NAME, "ajeno.config.json", *despues.values()]
+    )
+    shard = json.loads((shards / despues["backup"]).read_text(encoding="utf-8"))
+    assert shard["backup/restaurar.md"]["content"].endswith("otro\n")
+
+
+def test_update_index_patches_only_changed_shards(tmp_path, monkeypatch):
+    from wiki_modular.core.shards import MANIFEST_NAME
+
+    wiki = tmp_path / "wiki"
+    (wiki / "intro").mkdir(parents=True)
+    (wiki / "backup").mkdir()
+    (wiki / "1_intro.md").write_text("# Introducción\n", encoding="utf-8")
+    (wiki / "intro" / "alcance.md").write_text("## Alcance\n", encoding="utf-8")
+    (wiki / "backup" / "restaurar.md").write_text("## Restaurar\n", "utf-8")
+    out, shards = tmp_path / "i.json", tmp_path / "search"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(out)]
+    monkeypatch.setattr(sys, "argv", argv + ["--shards", str(shards)])
+    gen.main()
+    antes = json.loads((shards / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+    (wiki / "backup" / "restaurar.md").write_text("## Restaurar\notro\n", "utf-8")
+    (wiki / "backup" / "nuevo.md").write_text("## Nuevo\n", "utf-8")
+    (wiki / "intro" / "alcance.md").unlink()
+    (wiki / "0_guia.md").write_text("## Guía\n", encoding="utf-8")
+    rutas = [wiki / "backup" / "restaurar.md", wiki / "backup" / "nuevo.md"]
+    rutas += [wiki / "intro" / "alcance.md", wiki / "0_guia.md"]
+    gen.update_index(rutas, wiki_dir=wiki, output=out)
+    parcial = (shards / MANIFEST_NAME).read_text(encoding="utf-8")
+    assert "shards" not in gen.salidas_pendientes(out)
+    assert json.loads(parcial)["shards"]["backup"] != antes["shards"]["backup"]
+    nombres = sorted(p.name for p in shards.iterdir())
+
+    # El resultado es idéntico al de una compilación completa
+    gen.main()
+    assert (shards / MANIFEST_NAME).read_text(encoding="utf-8") == parcial
+    assert sorted(p.name for p in shards.iterdir()) == nombres
+
+
+def test_incremental_reparses_only_changed(tmp_path, monkeypatch):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    for nombre in ("a", "b", "c"):
+        (wiki / f"{nombre}.md").write_text(f"## {nombre}\n", encoding="utf-8")
+    out = tmp_path / "search_index.json"
+    argv = [
+        "prog",
+        "--wiki",
+        str(wiki),
+        "--output",
+        str(out),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+    assert gen.ruta_manifest(out).exists()
+
+    parseados = []
+    original = gen.entrada_indice
+
+    def contar(md, texto=None):
+        parseados.append(md.name)
+        return original(md, texto)
+
+    monkeypatch.setattr(gen, "entrada_indice", contar)
+    (wiki / "a.md").write_text("## a\ncambio\n", encoding="utf-8")
+    (wiki / "b.md").unlink()
+    (wiki / "d.md").write_text("## d\n", encoding="utf-8")
+    gen.main()
+
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert sorted(parseados) == ["a.md", "d.md"]
+    assert sorted(data) == ["a.md", "c.md", "d.md"]
+    assert "cambio" in data["a.md"]["content"]
+
+    parseados.clear()
+    postings = out.with_suffix(gen.POSTINGS_SUFFIX)
+    binario = postings.read_bytes()
+    assert gen.salidas_pendientes(out) == set()
+    (wiki / "c.md").write_text("## c\neditado\n", encoding="utf-8")
+    (wiki / "d.md").unlink()
+    cambiadas = gen.update_index(
+        [wiki / "c.md", wiki / "d.md", tmp_path / "fuera.md"],
+        wiki_dir=wiki,
+        output=out,
+    )
+    assert cambiadas == ["c.md", "d.md"]
+    assert parseados == ["c.md"]
+    data = json.loads(out.read_text(encoding="utf-8"))
+    assert sorted(data) == ["a.md", "c.md"]
+    assert "editado" in data["c.md"]["content"]
+    manifest = json.loads(gen.ruta_manifest(out).read_text(encoding="utf-8"))
+    assert sorted(manifest["archivos"]) == ["a.md", "c.md"]
+    # Las salidas derivadas no se reconstruyen: quedan pendientes
+    assert postings.read_bytes() == binario
+    assert gen.salidas_pendientes(out) == {"facets", "postings", "suggest"}
+    gen.main()
+    assert gen.salidas_pendientes(out) == set()
+    assert postings.read_bytes() != binario
+
+
+def test_escribir_json_streaming(tmp_path):
+    import gzip
+
+    import pytest
+
+    from wiki_modular.core.jsonstream import escribir_json
+
+    data = {"a.md": {"content": "línea\nñ", "headers": []}, "b.md": {"x": [1, {}]}}
+    out = tmp_path / "idx.json"
+    total = escribir_json(data.items(), out, gzip=True)
+    esperado = json.dumps(data, ensure_ascii=False, indent=2)
+    assert out.read_text(encoding="utf-8") == esperado
+    assert total == len(esperado.encode("utf-8"))
+    assert gzip.decompress((tmp_path / "idx.json.gz").read_bytes()).decode() == esperado
+
+    escribir_json(iter(data.items()), out, compact=True)
+    compacto = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    assert out.read_text(encoding="utf-8") == compacto
+    escribir_json([], out)
+    assert out.read_text(encoding="utf-8") == "{}"
+
+    def rotas():
+        yield "a.md", {}
+        raise ValueError("fallo")
+
+    with pytest.raises(ValueError):
+        escribir_json(rotas(), out)
+    assert out.read_text(encoding="utf-8") == "{}"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["idx.json", "idx.json.gz"]
+
+
+def test_volcado_relee_el_json_por_bloques(tmp_path, monkeypatch):
+    import pytest
+
+    import wiki_modular.core.jsonstream as js
+
+    data = {
+        "a.md": {"content": "línea\n{ñ}", "headers": [], "n": 12345678},
+        'b "x".md': {"x": [1.5, {}, None, True]},
+        "c.md": 7,
+    }
+    out = tmp_path / "idx.json"
+    monkeypatch.setattr(js, "_BLOQUE", 3)
+    for compact in (False, True):
+        js.escribir_json(data.items(), out, compact=compact)
+        crudo = list(js.iter_json_crudo(out))
+        assert [k for k, _ in crudo] == list(data)
+        assert {k: json.loads(v) for k, v in crudo} == data
+        with js.Volcado.desde_json(out, dir=tmp_path) as volcado:
+            assert dict(volcado.items()) == data
+            volcado["a.md"] = {"nuevo": 1}
+            del volcado["c.md"]
+            assert dict(volcado) == {"a.md": {"nuevo": 1}, 'b "x".md': data['b "x".md']}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["idx.json"]
+
+    out.write_text('{"a": 1 "b": 2}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(js.iter_json_crudo(out))
+
+
+def test_jobs_output_identical_to_serial(tmp_path, monkeypatch):
+    wiki = tmp_path / "wiki"
+    for i in range(30):
+        sub = wiki / f"s{i % 3}"
+        sub.mkdir(parents=True, exist_ok=True)
+        (sub / f"p{i}.md").write_text(
+            f"---\ntitulo: P{i}\n---\n## Sección {i}\ntexto {i}\n", encoding="utf-8"
+        )
+    salidas = {}
+    for jobs in ("1", "3"):
+        out = tmp_path / f"idx{jobs}.json"
+        argv = ["prog", "--wiki", str(wiki), "--output", str(out), "--jobs", jobs]
+        argv.append("--lunr")
+        monkeypatch.setattr(sys, "argv", argv)
+        gen.main()
+        salidas[jobs] = out.read_bytes(), out.with_suffix(".lunr.json").read_bytes()
+    assert salidas["1"] == salidas["3"]
+    assert list(json.loads(salidas["1"][0])) == sorted(json.loads(salidas["1"][0]))
+
+    # Una página nueva añadida con update_index queda en su posición ordenada
+    (wiki / "a.md").write_text("## a\n", encoding="utf-8")
+    gen.update_index([wiki / "a.md"], wiki_dir=wiki, output=tmp_path / "idx3.json")
+    argv = [
+        "prog",
+        "--wiki",
+        str(wiki),
+        "--output",
+        str(tmp_path / "idx1.json"),
+        "--full",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+    assert (tmp_path / "idx1.json").read_bytes() == (
+        tmp_path / "idx3.json"
+    ).read_bytes()
@@ -1,4 +1,5 @@
 import csv
+import json
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -6,6 +7,7 @@ from pathlib import Path
 import yaml
 
 import scripts.ingest_wiki_v2 as ingest
+from wiki_modular.core.ingest import buscar_destino
 
 
 def sample_index():
@@ -24,23 +26,80 @@ def sample_index():
 def test_buscar_destino_alias():
     index = sample_index()
     alias = {"Otro": "wiki/custom.md"}
-    dest = ingest.buscar_destino("Otro", index, alias, 0.5)
+    dest = buscar_destino("Otro", index, alias, 0.5)
     assert dest == Path("wiki/custom.md")
 
 
+def test_buscar_destino_alias_slug_and_patterns():
+    index = sample_index()
+    alias = {
+        "Configuración PAD ": "wiki/pad.md",
+        "Instancia SQL *": "wiki/02_Instancias_SQL/instancias.md",
+        "re:^anexo_\\d+$": "wiki/anexos.md",
+    }
+    assert buscar_destino("configuracion pad", index, alias, 0.5) == Path("wiki/pad.md")
+    assert buscar_destino("Instancia SQL Producción", index, alias, 0.5) == Path(
+        "wiki/02_Instancias_SQL/instancias.md"
+    )
+    assert buscar_destino("Anexo 12", index, alias, 0.5) == Path("wiki/anexos.md")
+    assert buscar_destino("Anexo final", index, alias, 0.5) is None
+
+    resolver = ingest.DestinationResolver(index, alias, 0.5)
+    for titulo in ("Anexo 3", "Introducción", "Intrduccion", "Otro"):
+        resolver.resolve(titulo)
+    assert resolver.estadisticas["alias"] == 1
+    assert resolver.estadisticas["exacto"] == 1
+    assert resolver.estadisticas["fuzzy"] == 1
+    assert resolver.estadisticas["sin_match"] == 1
+
+
+def test_alias_regex_con_grupos_propios():
+    from wiki_modular.core.alias import AliasMatcher
+
+    alias = AliasMatcher(
+        {
+            "re:(?P<n>anexo)_\\d+": "wiki/anexos.md",
+            "re:(?P<n>apendice)": "wiki/apendice.md",
+            "re:(a)\\1": "wiki/aa.md",
+            "Instancia SQL *": "wiki/instancias.md",
+            "re:(?i)FAQ": "wiki/faq.md",
+            "re:.*": "wiki/resto.md",
+        }
+    )
+    assert alias.match("Anexo 2") == Path("wiki/anexos.md")
+    assert alias.match("Apéndice") == Path("wiki/apendice.md")
+    assert alias.match("AA") == Path("wiki/aa.md")
+    assert alias.match("Instancia SQL Test") == Path("wiki/instancias.md")
+    assert alias.match("faq") == Path("wiki/faq.md")
+    # El orden del archivo se respeta aunque las expresiones se compilen aparte
+    assert alias.match("Otro") == Path("wiki/resto.md")
+
+
 def test_buscar_destino_exact_and_subtema():
     index = sample_index()
-    dest1 = ingest.buscar_destino("Introducción", index, {}, 0.5)
+    dest1 = buscar_destino("Introducción", index, {}, 0.5)
     assert dest1 == Path("wiki/1_intro.md")
-    dest2 = ingest.buscar_destino("Instalación SQL", index, {}, 0.5)
+    dest2 = buscar_destino("Instalación SQL", index, {}, 0.5)
     assert dest2 == Path("wiki/02_Instancias_SQL/instalacion_sql.md")
 
 
 def test_buscar_destino_fuzzy_and_none():
     index = sample_index()
-    dest = ingest.buscar_destino("Intrduccion", index, {}, 0.5)
+    dest = buscar_destino("Intrduccion", index, {}, 0.5)
     assert dest == Path("wiki/1_intro.md")
-    assert ingest.buscar_destino("Desconocido", index, {}, 0.5) is None
+    assert buscar_destino("Desconocido", index, {}, 0.5) is None
+
+
+def test_destination_resolver_reuses_route_table():
+    from wiki_modular.core import DestinationResolver, RouteTable
+
+    index = sample_index()
+    routes = RouteTable(index)
+    resolver = DestinationResolver(index, {}, 0.5, routes=routes)
+    assert resolver.routes is routes
+    assert resolver.resolve("Server") == Path("wiki/intro/server.md")
+    assert resolver.resolve("Intrduccion") == Path("wiki/1_intro.md")
+    assert resolver.resolve("Desconocido") is None
 
 
 def test_limpiar_nombre_archivo_basic():
@@ -142,3 +201,256 @@ def test_main_appends_suggestions(tmp_path, monkeypatch):
         rows = list(csv.DictReader(f))
     assert rows[-1]["titulo"] == "Nuevo"
     assert rows[-1]["slug"] == "nuevo"
+
+
+def test_main_cutoff_sweep_reports_without_writing(tmp_path, monkeypatch, capsys):
+    mapa = [
+        {"titulo": "Introducción", "start_line": 1, "h_level": 1},
+        {"titulo": "Intrduccion", "start_line": 3, "h_level": 1},
+        {"titulo": "Nuevo", "start_line": 5, "h_level": 1},
+    ]
+    mapa_file = tmp_path / "mapa.yaml"
+    mapa_file.write_text(yaml.safe_dump(mapa), encoding="utf-8")
+    index_file = tmp_path / "index.yaml"
+    index_file.write_text(yaml.safe_dump(sample_index()), encoding="utf-8")
+    fuente = tmp_path / "full.md"
+    fuente.write_text("# Introducción\n\n# Intrduccion\n\n# Nuevo\n", encoding="utf-8")
+    alias = tmp_path / "alias.yaml"
+    alias.write_text("Nuevo: wiki/custom.md\n", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    args = [
+        "prog",
+        "--mapa",
+        str(mapa_file),
+        "--index",
+        str(index_file),
+        "--fuente",
+        str(fuente),
+        "--alias",
+        str(alias),
+        "--cutoff-sweep",
+        "0.5:1:0.25",
+    ]
+    monkeypatch.setattr(sys, "argv", args)
+    ingest.main()
+
+    assert not (tmp_path / "wiki").exists()
+    out = capsys.readouterr().out
+    assert "Barrido de cutoff sobre 3 bloques" in out
+    assert "'Intrduccion'" in out
+
+
+def test_barrido_cutoff_counts():
+    from wiki_modular.core.ingest import DestinationResolver
+    from wiki_modular.core.sweep import barrido_cutoff, parse_sweep
+
+    cutoffs = parse_sweep("0.5:1:0.25")
+    assert list(cutoffs) == [0.5, 0.75, 1.0]
+    resolver = DestinationResolver(sample_index(), {"Nuevo": "wiki/custom.md"})
+    reporte = barrido_cutoff(
+        ["Introducción", "Intrduccion", "Nuevo", "xyz"], resolver, cutoffs
+    )
+    filas = reporte["cutoffs"]
+    assert [f["coincidencias"] for f in filas] == [2, 2, 1]
+    assert [f["alias"] for f in filas] == [1, 1, 1]
+    assert [f["wildcard"] for f in filas] == [1, 1, 2]
+    assert filas[2]["cambios"][0]["titulo"] == "Intrduccion"
+    assert filas[0]["carpetas"]["(raíz)"] == 3
+
+
+def test_barrido_cutoff_equivale_a_resolver_con_cada_cutoff():
+    import random
+    from collections import Counter
+
+    from wiki_modular.core.ingest import DestinationResolver
+    from wiki_modular.core.sweep import WILDCARD, _carpeta, barrido_cutoff
+
+    rng = random.Random(0)
+    palabras = "replica datos rendimiento configuracion indices faq las red".split()
+    index = {
+        "secciones": [
+            {
+                "id": i,
+                "titulo": " ".join(rng.sample(palabras, 2)),
+                "subtemas": [" ".join(rng.sample(palabras, 3)) for _ in range(5)],
+            }
+            for i in range(1, 13)
+        ]
+    }
+    titulos = ["rendimiento replifacion configuracion", "faqlas", "xyz"]
+    titulos += [" ".join(rng.sample(palabras, rng.randint(1, 3))) for _ in range(30)]
+    cutoffs = [0.3, 0.45, 0.6, 0.75, 0.9]
+    base = DestinationResolver(index)
+    reporte = barrido_cutoff(titulos, base, cutoffs)
+    mejores = [base.puntuar(t, cutoff=cutoffs[0]) for t in titulos]
+    for cutoff, fila in zip(cutoffs, reporte["cutoffs"]):
+        resolver = DestinationResolver(index, fuzzy_cutoff=cutoff)
+        destinos = [resolver.resolve(t) for t in titulos]
+        assert destinos == [
+            m[0][1] if m and m[0][0] >= cutoff else None for m in mejores
+        ]
+        carpetas = Counter(_carpeta(str(d)) if d else WILDCARD for d in destinos)
+        assert fila["coincidencias"] == sum(d is not None for d in destinos)
+        assert fila["carpetas"] == dict(carpetas)
+
+
+def test_routing_cache_hits_and_invalidation(tmp_path):
+    from wiki_modular.core.ingest import (
+        DestinationResolver,
+        RoutingCache,
+        huella_routing,
+    )
+
+    index_file = tmp_path / "index.yaml"
+    index_file.write_text(yaml.safe_dump(sample_index()), encoding="utf-8")
+    cache_file = tmp_path / "cache.json"
+
+    huella = huella_routing(index_file, cutoff=0.5)
+    cache = RoutingCache(cache_file, huella)
+    resolver = DestinationResolver(sample_index(), {}, 0.5, cache=cache)
+    assert resolver.resolve("Intrduccion") == Path("wiki/1_intro.md")
+    assert resolver.resolve("Desconocido") is None
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.save()
+
+    cache = RoutingCache(cache_file, huella)
+    resolver = DestinationResolver(sample_index(), {}, 0.5, cache=cache)
+    assert resolver.resolve("Intrduccion") == Path("wiki/1_intro.md")
+    assert resolver.resolve("Desconocido") is None
+    assert (cache.hits, cache.misses) == (2, 0)
+
+    otra = RoutingCache(cache_file, huella_routing(index_file, cutoff=0.9))
+    assert otra.get("intrduccion") == (False, None)
+
+
+def test_main_plan_and_apply_only_changed(tmp_path, monkeypatch, capsys):
+    mapa = [
+        {"titulo": "Introducción", "start_line": 1, "h_level": 1},
+        {"titulo": "Server", "start_line": 3, "h_level": 1},
+    ]
+    mapa_file = tmp_path / "mapa.yaml"
+    mapa_file.write_text(yaml.safe_dump(mapa), encoding="utf-8")
+    index_file = tmp_path / "index.yaml"
+    index_file.write_text(yaml.safe_dump(sample_index()), encoding="utf-8")
+    fuente = tmp_path / "full.md"
+    fuente.write_text("# Introducción\nuno\n# Server\ndos\n", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    base = ["prog", "--mapa", str(mapa_file), "--index", str(index_file)]
+    base += ["--fuente", str(fuente), "--alias", str(tmp_path / "none.yaml")]
+
+    monkeypatch.setattr(sys, "argv", base + ["--plan-json", "-"])
+    ingest.main()
+    plan = json.loads(capsys.readouterr().out)
+    assert plan["resumen"]["create"] == 2
+    assert not (tmp_path / "wiki").exists()
+
+    monkeypatch.setattr(sys, "argv", base)
+    ingest.main()
+    intro = tmp_path / "wiki" / "1_intro.md"
+    assert intro.read_text(encoding="utf-8") == "# Introducción\nuno"
+    mtime = intro.stat().st_mtime_ns
+
+    fuente.write_text("# Introducción\nuno\n# Server\ncambiado\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", base + ["--plan-json", "-"])
+    ingest.main()
+    plan = json.loads(capsys.readouterr().out)
+    assert plan["resumen"] == {"create": 0, "update": 1, "unchanged": 1, "delete": 0}
+
+    monkeypatch.setattr(sys, "argv", base)
+    ingest.main()
+    assert intro.stat().st_mtime_ns == mtime
+    server = tmp_path / "wiki" / "intro" / "server.md"
+    assert server.read_text(encoding="utf-8") == "# Server\ncambiado"
+
+
+def test_prune_con_manifest_relativo_a_la_raiz(tmp_path, monkeypatch):
+    import shutil
+
+    mapa = [
+        {"titulo": "Introducción", "start_line": 1, "h_level": 1},
+        {"titulo": "Server", "start_line": 3, "h_level": 1},
+    ]
+    mapa_file = tmp_path / "mapa.yaml"
+    mapa_file.write_text(yaml.safe_dump(mapa), encoding="utf-8")
+    index_file = tmp_path / "index.yaml"
+    index_file.write_text(yaml.safe_dump(sample_index()), encoding="utf-8")
+    fuente = tmp_path / "full.md"
+    fuente.write_text("# Introducción\nuno\n# Server\ndos\n", encoding="utf-8")
+    manifest_file = tmp_path / "manifest.json"
+
+    monkeypatch.chdir(tmp_path)
+    argv = ["prog", "--mapa", str(mapa_file), "--index", str(index_file)]
+    argv += ["--fuente", str(fuente), "--alias", str(tmp_path / "none.yaml")]
+    argv += ["--manifest", str(manifest_file), "--no-cache", "--prune"]
+    monkeypatch.setattr(sys, "argv", argv)
+    ingest.main()
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    assert manifest[fuente.as_posix()] == ["1_intro.md", "intro/server.md"]
+
+    # Una ingesta en staging poda dentro de su propia raíz
+    staging = tmp_path / ".wiki_builds" / "staging"
+    shutil.copytree(tmp_path / "wiki", staging)
+    (tmp_path / "fuera.md").write_text("no tocar", encoding="utf-8")
+    manifest[fuente.as_posix()].append("../../fuera.md")
+    manifest_file.write_text(json.dumps(manifest), encoding="utf-8")
+    mapa_file.write_text(yaml.safe_dump(mapa[:1]), encoding="utf-8")
+    monkeypatch.setattr(ingest, "WIKI_DIR", staging)
+    ingest.main()
+
+    assert not (staging / "intro" / "server.md").exists()
+    assert (staging / "1_intro.md").exists()
+    assert (tmp_path / "wiki" / "intro" / "server.md").exists()
+    assert (tmp_path / "fuera.md").exists()
+    manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    assert manifest[fuente.as_posix()] == ["1_intro.md"]
+
+
+def test_suggestion_queue_flushes_once_with_candidates(tmp_path):
+    from wiki_modular.core.ingest import (
+        DestinationResolver,
+        SuggestionQueue,
+        leer_sugerencias,
+    )
+
+    resolver = DestinationResolver(sample_index(), {}, 0.99)
+    suggest = tmp_path / "sug.csv"
+    suggest.write_text("titulo,slug\nViejo,viejo\n", encoding="utf-8")
+
+    cola = SuggestionQueue(suggest)
+    for titulo in ("Intrduccion", "Intrduccion", "Viejo"):
+        destino, candidatos = resolver.resolve_con_candidatos(titulo, n=3)
+        assert destino is None
+        cola.add(
+            titulo,
+            titulo.lower(),
+            destino=Path("wiki/99_Nuevas_Secciones") / f"{titulo}.md",
+            candidatos=candidatos,
+        )
+    assert len(cola) == 2
+    assert cola.flush() == 1
+
+    entradas = leer_sugerencias(suggest)
+    assert list(entradas) == ["Viejo", "Intrduccion"]
+    nueva = entradas["Intrduccion"]
+    assert nueva["destino"] == "99_Nuevas_Secciones/Intrduccion.md"
+    assert nueva["candidatos"][0]["ruta"] == "1_intro.md"
+    assert 0.5 < nueva["candidatos"][0]["score"] < 1
+
+    # Las rutas con ';' o '=' no rompen el CSV
+    cola = SuggestionQueue(suggest)
+    cola.add("Raro", "raro", candidatos=[(0.25, Path("wiki/a;b=c.md"))])
+    cola.flush()
+    assert leer_sugerencias(suggest)["Raro"]["candidatos"] == [
+        {"ruta": "a;b=c.md", "score": 0.25}
+    ]
+    assert leer_sugerencias(suggest)["Intrduccion"] == nueva
+
+    yaml_file = tmp_path / "sug.yaml"
+    cola = SuggestionQueue(yaml_file)
+    cola.add("Nuevo", "nuevo", candidatos=[(0.5, Path("wiki/x.md"))])
+    cola.flush()
+    assert leer_sugerencias(yaml_file)["Nuevo"]["candidatos"] == [
+        {"ruta": "x.md", "score": 0.5}
+    ]
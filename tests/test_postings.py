@@ -0,0 +1,80 @@
+import sys
+
+import numpy as np
+import pytest
+
+import scripts.generar_indice_busqueda as gen
+from scripts import wiki_cli
+from wiki_modular.core.postings import (
+    MmapBM25Index,
+    codificar_varints,
+    decodificar_varints,
+    escribir_postings,
+)
+from wiki_modular.core.search import BM25Index
+
+
+def test_varints_roundtrip():
+    valores = np.array([0, 1, 127, 128, 300, 16384, 2**32 - 1, 7], dtype=np.uint64)
+    data = codificar_varints(valores)
+    assert len(data) == 1 + 1 + 1 + 2 + 2 + 3 + 5 + 1
+    assert decodificar_varints(data.tobytes()).tolist() == valores.tolist()
+    assert decodificar_varints(b"").tolist() == []
+
+
+def test_mmap_index_matches_memory_index(tmp_path):
+    paginas = {
+        f"s{i % 4}/p{i}.md": {
+            "metadata": {"titulo": f"Página {i} backup" if i % 5 == 0 else ""},
+            "content": f"# P{i}\n\n## Restaurar {i % 3}\n" + "datos red " * (i % 7),
+            "headers": [{"level": 2, "text": f"Restaurar {i % 3}", "slug": "r"}],
+        }
+        for i in range(40)
+    }
+    paginas["ñ.md"] = {"metadata": {}, "content": "ñandú único", "headers": []}
+    destino = tmp_path / "idx.bm25"
+    escribir_postings(paginas, destino)
+
+    memoria = BM25Index(paginas)
+    with MmapBM25Index(destino) as disco:
+        assert len(disco) == len(memoria)
+        assert disco.termino("zzz") == -1
+        for consulta in ("backup", "restaurar 2", "datos red", "ñandú", "zzz"):
+            assert disco.search(consulta, k=5) == memoria.search(consulta, k=5)
+
+
+def test_postings_desde_iterable_por_bloques(tmp_path, monkeypatch):
+    import wiki_modular.core.postings as postings
+
+    paginas = {
+        f"p{i}.md": {"metadata": {}, "content": f"backup {i % 3} " * (i % 4 + 1)}
+        for i in range(30)
+    }
+    monkeypatch.setattr(postings, "_FILAS_POR_BLOQUE", 4)
+    destino = tmp_path / "idx.bm25"
+    escribir_postings(iter(paginas.items()), destino)
+
+    memoria = BM25Index(paginas)
+    with MmapBM25Index(destino) as disco:
+        assert list(disco.rutas) == list(paginas)
+        for consulta in ("backup", "0", "2 backup"):
+            assert disco.search(consulta, k=40) == memoria.search(consulta, k=40)
+
+
+def test_generar_indice_writes_postings(tmp_path, monkeypatch, capsys):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "a.md").write_text("# Alertas\ncorreo\n", encoding="utf-8")
+    out = tmp_path / "search_index.json"
+    argv = ["prog", "--wiki", str(wiki), "--output", str(out)]
+    monkeypatch.setattr(sys, "argv", argv)
+    gen.main()
+    assert (tmp_path / "search_index.bm25").exists()
+
+    (wiki / "a.md").unlink()  # la búsqueda usa el índice binario, no la wiki
+    monkeypatch.setattr(wiki_cli.config, "WIKI_DIR", wiki)
+    hits = wiki_cli.search_wiki("correo", search_index=out)
+    assert [h.ruta for h in hits] == ["a.md"]
+
+    with pytest.raises(ValueError):
+        MmapBM25Index(out)
@@ -0,0 +1,85 @@
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+from scripts import generar_indice_busqueda as gib
+from scripts import ingest_wiki_v2 as ingest
+from scripts import wiki_cli
+from wiki_modular.core.routing import RouteTable
+from wiki_modular.core.sidebar import build_sidebar_lines, reemplazar_seccion
+
+INDEX = {
+    "secciones": [
+        {"id": 1, "titulo": "Introducción", "slug": "intro", "subtemas": ["Alcance"]},
+        {"id": 2, "titulo": "Backup", "slug": "backup", "subtemas": ["Restaurar"]},
+    ]
+}
+MAPA = [
+    {"titulo": "Introducción", "start_line": 1, "h_level": 1},
+    {"titulo": "Alcance", "start_line": 3, "h_level": 2},
+    {"titulo": "Backup", "start_line": 5, "h_level": 1},
+    {"titulo": "Restaurar", "start_line": 7, "h_level": 2},
+]
+
+
+def _fuente(restaurar: str) -> str:
+    return (
+        "# Introducción\nuno\n## Alcance\ndos\n"
+        f"# Backup\ntres\n## Restaurar\n{restaurar}\n"
+    )
+
+
+def test_buscar_seccion_por_id_slug_o_titulo():
+    routes = RouteTable(INDEX)
+    assert routes.buscar_seccion("2") == 1
+    assert routes.buscar_seccion("backup") == 1
+    assert routes.buscar_seccion("Introducción") == 0
+
+
+def test_reemplazar_seccion_sidebar():
+    lines = build_sidebar_lines(INDEX)
+    nuevas = ["* [Backup](2_backup.md)", "  * [Otro](backup/otro.md)"]
+    resultado = reemplazar_seccion(lines, nuevas)
+    assert resultado[-3:] == nuevas + [""]
+    assert resultado[:3] == lines[:3]
+
+
+def test_rebuild_section_only_touches_section(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path("index_PlataformaBBDD.yaml").write_text(
+        yaml.safe_dump(INDEX, allow_unicode=True), encoding="utf-8"
+    )
+    Path("_fuentes").mkdir()
+    Path("_fuentes/mapa_encabezados.yaml").write_text(
+        yaml.safe_dump(MAPA, allow_unicode=True), encoding="utf-8"
+    )
+    Path("_fuentes/tmp_full.md").write_text(_fuente("cuatro"), encoding="utf-8")
+
+    monkeypatch.setattr(sys, "argv", ["prog"])
+    ingest.main()
+    wiki = Path("wiki")
+    Path("wiki/_sidebar.md").write_text(
+        "\n".join(build_sidebar_lines(INDEX)), encoding="utf-8"
+    )
+    indice = gib.generar_indice(wiki)
+    Path("wiki/search_index.json").write_text(json.dumps(indice), encoding="utf-8")
+
+    intro = wiki / "1_intro.md"
+    mtime = intro.stat().st_mtime_ns
+    Path("_fuentes/tmp_full.md").write_text(_fuente("cinco"), encoding="utf-8")
+
+    monkeypatch.setattr(sys, "argv", ["prog", "rebuild", "--section", "backup"])
+    wiki_cli.main()
+
+    assert (
+        (wiki / "backup" / "restaurar.md").read_text(encoding="utf-8").endswith("cinco")
+    )
+    assert intro.stat().st_mtime_ns == mtime
+    data = json.loads(Path("wiki/search_index.json").read_text(encoding="utf-8"))
+    assert data["backup/restaurar.md"]["content"].endswith("cinco")
+    assert data["1_intro.md"] == indice["1_intro.md"]
+    assert "* [Backup](2_backup.md)" in Path("wiki/_sidebar.md").read_text(
+        encoding="utf-8"
+    )
@@ -0,0 +1,131 @@
+import json
+import random
+import sys
+from collections import Counter
+
+import numpy as np
+
+import scripts.generar_relacionadas as gen
+from wiki_modular.core.relacionadas import (
+    calcular_idf,
+    calcular_relacionadas,
+    matriz_tfidf,
+    similitudes,
+)
+from wiki_modular.core.search import tokenizar
+
+TEMAS = [
+    "correo servidor buzon smtp cuenta",
+    "impresora cola papel toner driver",
+    "backup copia restauracion disco cinta",
+    "vpn tunel certificado cliente remoto",
+]
+
+
+def _paginas(n=40, seed=0):
+    rng = random.Random(seed)
+    paginas = {}
+    for i in range(n):
+        palabras = TEMAS[i % len(TEMAS)].split() + TEMAS[rng.randrange(4)].split()
+        texto = " ".join(rng.choices(palabras, k=30))
+        paginas[f"s{i % 3}/p{i:02d}.md"] = {
+            "metadata": {},
+            "content": f"# Página {i}\n{texto}",
+        }
+    return paginas
+
+
+def _densa(conteos, idf):
+    terminos = list(idf)
+    m = np.zeros((len(conteos), len(terminos)))
+    for i, conteo in enumerate(conteos):
+        for j, t in enumerate(terminos):
+            if conteo[t]:
+                m[i, j] = (1 + np.log(conteo[t])) * idf[t]
+        norma = np.linalg.norm(m[i])
+        if norma:
+            m[i] /= norma
+    return m
+
+
+def test_similitudes_por_bloques_equivalen_al_producto_denso():
+    paginas = _paginas()
+    conteos = [Counter(tokenizar(i["content"])) for i in paginas.values()]
+    idf = calcular_idf(conteos, max_df=1.0)
+    matriz = matriz_tfidf(conteos, idf)
+    densa = _densa(conteos, idf)
+    esperado = densa @ densa.T
+
+    filas = list(range(len(paginas)))
+    # Un trabajo máximo pequeño obliga a partir en muchos bloques
+    bloques = list(similitudes(matriz, matriz.traspuesta(), filas, max_trabajo=100))
+    assert len(bloques) > 1
+    obtenido = np.vstack([sims for _, sims in bloques])
+    assert np.concatenate([b for b, _ in bloques]).tolist() == filas
+    assert np.allclose(obtenido, esperado, atol=1e-6)
+
+
+def test_relacionadas_son_los_vecinos_mas_parecidos():
+    paginas = _paginas()
+    relacionadas, estado, recalculadas = calcular_relacionadas(paginas, k=3)
+    assert len(recalculadas) == len(paginas)
+    assert relacionadas["titles"]["s0/p00.md"] == "Página 0"
+
+    rutas = list(paginas)
+    textos = [f"Página {n}\n{i['content']}" for n, i in enumerate(paginas.values())]
+    densa = _densa([Counter(tokenizar(t)) for t in textos], estado["idf"])
+    cosenos = densa @ densa.T
+    np.fill_diagonal(cosenos, 0)
+    for i, ruta in enumerate(rutas):
+        vecinos = relacionadas["pages"][ruta]
+        assert len(vecinos) == 3
+        orden = sorted(range(len(rutas)), key=lambda j: (-round(cosenos[i, j], 4), j))
+        assert [r for r, _ in vecinos] == [rutas[j] for j in orden[:3]]
+        assert np.allclose([s for _, s in vecinos], cosenos[i, orden[:3]], atol=1e-4)
+
+
+def test_incremental_equivale_al_calculo_completo():
+    paginas = _paginas()
+    previo, estado, _ = calcular_relacionadas(paginas, k=4)
+
+    nuevas = dict(paginas)
+    nuevas["s1/p01.md"] = {"metadata": {}, "content": "# Cambio\n" + TEMAS[2] * 3}
+    del nuevas["s2/p02.md"]
+    nuevas["s0/p99.md"] = {"metadata": {}, "content": "# Nueva\n" + TEMAS[0] * 2}
+
+    incremental, nuevo_estado, recalculadas = calcular_relacionadas(
+        nuevas, k=4, previo=previo, estado=estado
+    )
+    assert "s1/p01.md" in recalculadas and "s0/p99.md" in recalculadas
+    assert len(recalculadas) < len(nuevas)
+    assert nuevo_estado["idf"] == estado["idf"]
+
+    # Con el mismo idf, el cálculo completo da las mismas listas
+    completo, _, _ = calcular_relacionadas(
+        nuevas,
+        k=4,
+        previo={"pages": {}},
+        estado={**estado, "hashes": {}},
+        max_cambios=1,
+    )
+    assert "s2/p02.md" not in incremental["pages"]
+    for ruta, vecinos in completo["pages"].items():
+        obtenidos = incremental["pages"][ruta]
+        assert [r for r, _ in obtenidos] == [r for r, _ in vecinos]
+        assert np.allclose(
+            [s for _, s in obtenidos], [s for _, s in vecinos], atol=2e-4
+        )
+
+
+def test_script_escribe_related_y_reutiliza_estado(tmp_path, monkeypatch, caplog):
+    indice = tmp_path / "search_index.json"
+    indice.write_text(json.dumps(_paginas(n=12)), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["prog", "--index", str(indice), "-k", "2"])
+    gen.main()
+
+    data = json.loads((tmp_path / "related.json").read_text(encoding="utf-8"))
+    assert set(data["pages"]) == set(_paginas(n=12))
+    assert all(len(v) <= 2 for v in data["pages"].values())
+    assert (tmp_path / "related.state.npz").exists()
+
+    assert gen.generar_relacionadas(indice, tmp_path / "related.json", k=2) == 0
@@ -0,0 +1,61 @@
+import sys
+
+from scripts import wiki_cli
+from wiki_modular.core.search import BM25Index, fragmento
+
+PAGINAS = {
+    "backup.md": {
+        "metadata": {"titulo": "Backup de instancias"},
+        "content": "# Backup de instancias\n\n## Restaurar\nPasos para copiar datos.\n",
+        "headers": [{"level": 2, "text": "Restaurar", "slug": "restaurar"}],
+    },
+    "red.md": {
+        "metadata": {},
+        "content": "# Red\n\nLa red no depende del backup nocturno.\n"
+        + "relleno " * 50,
+        "headers": [],
+    },
+    "vacio.md": {"metadata": {}, "content": "", "headers": []},
+}
+
+
+def test_bm25_ranks_title_and_headers_above_body():
+    indice = BM25Index(PAGINAS)
+    hits = indice.search("backup")
+    assert [h.ruta for h in hits] == ["backup.md", "red.md"]
+    assert hits[0].titulo == "Backup de instancias"
+    assert hits[0].puntuacion > hits[1].puntuacion > 0
+    assert "backup" in hits[1].fragmento
+
+    assert [h.ruta for h in indice.search("restaurar")] == ["backup.md"]
+    assert [h.ruta for h in indice.search("BACKUP red", k=1)] == ["red.md"]
+    assert indice.search("inexistente") == []
+
+
+def test_fragmento_centrado_en_termino():
+    texto = "a " * 200 + "objetivo final " + "b " * 200
+    trozo = fragmento(texto, ["objetivo"], ancho=60)
+    assert trozo.startswith("...") and trozo.endswith("...")
+    assert "objetivo" in trozo
+
+
+def test_wiki_cli_search(tmp_path, monkeypatch, capsys):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "a.md").write_text(
+        "---\ntitulo: Alertas\n---\n# Alertas\ncorreo\n", "utf-8"
+    )
+    (wiki / "b.md").write_text("# Discos\nalertas de espacio\n", encoding="utf-8")
+    monkeypatch.setattr(wiki_cli.config, "WIKI_DIR", wiki)
+    argv = [
+        "wiki_cli",
+        "search",
+        "alertas",
+        "--search-index",
+        str(tmp_path / "no.json"),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    wiki_cli.main()
+    salida = capsys.readouterr().out.splitlines()
+    assert "a.md  Alertas" in salida[0]
+    assert "b.md  Discos" in salida[2]
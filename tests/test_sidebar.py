@@ -17,3 +17,15 @@ def test_build_sidebar_lines():
         "",
     ]
     assert lines == expected
+
+
+def test_build_sidebar_lines_with_routes():
+    from wiki_modular.core.routing import RouteTable
+
+    data = {"secciones": [{"titulo": "Datos", "id": 2, "subtemas": ["Backup SQL"]}]}
+    routes = RouteTable(data)
+    lines = build_sidebar_lines(data, routes=routes)
+    assert lines[1:3] == [
+        "* [Datos](2_datos.md)",
+        "  * [Backup SQL](02_Instancias_SQL/backup_sql.md)",
+    ]
@@ -0,0 +1,57 @@
+from wiki_modular.core import splitter
+from wiki_modular.core.splitter import MappedMarkdown, iter_bloques
+
+
+def test_byte_ranges_match_splitlines(tmp_path, monkeypatch):
+    monkeypatch.setattr(splitter, "CHUNK_SIZE", 4)
+    for texto in ["", "a", "a\n", "a\nb\n\n", "uno\r\ndós\r\n", "ñ\n\nfin"]:
+        md = tmp_path / "doc.md"
+        md.write_bytes(texto.encode("utf-8"))
+        lines = texto.splitlines()
+        with MappedMarkdown(md) as fuente:
+            assert len(fuente) == len(lines)
+            for start in range(len(lines) + 1):
+                for end in range(start, len(lines) + 1):
+                    rango = fuente.byte_range(start, end)
+                    assert fuente.read(rango) == "\n".join(lines[start:end])
+
+
+def test_iter_bloques_uses_start_line(tmp_path):
+    md = tmp_path / "doc.md"
+    md.write_text("## Uno\ntexto\n## Dos\nmás\n", encoding="utf-8")
+    mapa = [
+        {"titulo": "Uno", "start_line": 1, "h_level": 2},
+        {"start_line": 2},
+        {"titulo": "Dos", "start_line": 3, "h_level": 2},
+    ]
+    with MappedMarkdown(md) as fuente:
+        bloques = [(t, n, fuente.read(r)) for t, n, r in iter_bloques(mapa, fuente)]
+    assert bloques == [("Uno", 2, "## Uno"), ("Dos", 2, "## Dos\nmás")]
+
+
+def test_saltos_de_splitlines(tmp_path, monkeypatch):
+    # Separadores que reconoce str.splitlines además de \n (p. ej. de DOCX)
+    texto = (
+        "## Uno\u2028sigue\nx\x0cy\r\nz\rw\x0b\x1c\x1d\x1e"
+        "ñ\x85é\u2029\n## Dos\r\nfin\u2028"
+    )
+    md = tmp_path / "doc.md"
+    md.write_bytes(texto.encode("utf-8"))
+    lines = md.read_text(encoding="utf-8").splitlines()
+    for chunk in (1, 2, 3, 5, 1 << 24):
+        monkeypatch.setattr(splitter, "CHUNK_SIZE", chunk)
+        with MappedMarkdown(md) as fuente:
+            assert len(fuente) == len(lines)
+            for start in range(len(lines) + 1):
+                for end in range(start, len(lines) + 1):
+                    rango = fuente.byte_range(start, end)
+                    assert fuente.read(rango) == "\n".join(lines[start:end])
+
+    dos = lines.index("## Dos") + 1
+    mapa = [
+        {"titulo": "Uno", "start_line": 1, "h_level": 2},
+        {"titulo": "Dos", "start_line": dos, "h_level": 2},
+    ]
+    with MappedMarkdown(md) as fuente:
+        bloques = [fuente.read(r) for _, _, r in iter_bloques(mapa, fuente)]
+    assert bloques[1] == "## Dos\nfin"
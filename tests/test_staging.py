@@ -0,0 +1,155 @@
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+import wiki_modular.config as config
+from scripts import wiki_cli
+from wiki_modular import staging as stg
+from wiki_modular.core.ingest import DestinationResolver
+
+
+def _build(wiki: Path, texto: str) -> Path:
+    staging = stg.preparar_staging(wiki)
+    (staging / "page.md").write_text(texto, encoding="utf-8")
+    return stg.publicar(staging, wiki)
+
+
+def test_publicar_migra_y_rollback(tmp_path):
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "README.md").write_text("inicio", encoding="utf-8")
+    (wiki / "page.md").write_text("v0", encoding="utf-8")
+
+    _build(wiki, "v1")
+    assert wiki.is_symlink()
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v1"
+    assert (wiki / "README.md").read_text(encoding="utf-8") == "inicio"
+
+    _build(wiki, "v2")
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v2"
+    assert not (stg.builds_dir(wiki) / stg.STAGING_NAME).exists()
+
+    stg.rollback(wiki)
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v1"
+    stg.rollback(wiki)
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v0"
+    with pytest.raises(RuntimeError):
+        stg.rollback(wiki)
+
+
+def test_primera_publicacion_sin_hueco(tmp_path, monkeypatch):
+    (tmp_path / "a").write_text("a", encoding="utf-8")
+    (tmp_path / "b").mkdir()
+    if not stg._intercambiar(tmp_path / "a", tmp_path / "b"):
+        pytest.skip("renameat2 no disponible")
+    wiki = tmp_path / "wiki"
+    wiki.mkdir()
+    (wiki / "page.md").write_text("v0", encoding="utf-8")
+
+    renombrar = Path.rename
+
+    def rename(self, destino):
+        resultado = renombrar(self, destino)
+        assert wiki.exists()
+        return resultado
+
+    monkeypatch.setattr(Path, "rename", rename)
+    _build(wiki, "v1")
+    assert wiki.is_symlink()
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v1"
+    assert not wiki.with_name(".wiki.tmp").exists()
+    migrada = stg.versiones(wiki)[0]
+    assert (migrada / "page.md").read_text(encoding="utf-8") == "v0"
+
+
+def test_publicar_conserva_versiones(tmp_path):
+    wiki = tmp_path / "wiki"
+    for i in range(5):
+        _build(wiki, f"v{i}")
+    assert len(stg.versiones(wiki)) == 3
+    assert (wiki / "page.md").read_text(encoding="utf-8") == "v4"
+
+
+def test_resolver_wiki_dir(tmp_path):
+    index = {"secciones": [{"id": 1, "titulo": "Intro", "subtemas": []}]}
+    staging = tmp_path / "staging"
+    resolver = DestinationResolver(
+        index, {"Otro": "wiki/otro.md"}, 0.5, wiki_dir=staging
+    )
+    assert resolver.resolve("Intro") == staging / "1_intro.md"
+    assert resolver.resolve("Otro") == staging / "otro.md"
+
+
+def test_wiki_cli_full_staging(tmp_path, monkeypatch):
+    doc = tmp_path / "doc.docx"
+    doc.write_text("dummy", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    nombres = ("WIKI_DIR", "ASSETS_DIR", "SIDEBAR_FILE", "SEARCH_INDEX")
+    for nombre in nombres + ("CONFIG_FILE", "CONFIG"):
+        monkeypatch.setattr(config, nombre, getattr(config, nombre))
+    monkeypatch.setenv("WM_CONFIG", str(config.CONFIG_FILE))
+    monkeypatch.setattr(config, "WIKI_DIR", Path("wiki"))
+    monkeypatch.setattr(config, "SEARCH_INDEX", Path("wiki/search_index.json"))
+
+    calls = []
+
+    def fake_run(cmd):
+        calls.append(cmd)
+        if Path(cmd[-1]).name == "search_index.json":
+            # La wiki publicada sigue intacta mientras se construye
+            assert not Path("wiki").exists()
+            Path(cmd[-1]).write_text("{}", encoding="utf-8")
+
+    monkeypatch.setattr(wiki_cli, "run", fake_run)
+    monkeypatch.setattr(sys, "argv", ["prog", "full", str(doc), "--staging"])
+
+    wiki_cli.main()
+
+    assert calls[0][-1] == "--keep-wiki"
+    assert Path(calls[-2][1]).name == "generar_indice_busqueda.py"
+    assert Path(calls[-1][1]).name == "generar_relacionadas.py"
+    assert Path("wiki").is_symlink()
+    assert (tmp_path / "wiki" / "search_index.json").exists()
+
+
+def test_wiki_cli_staging_enlaces_imagenes(tmp_path, monkeypatch):
+    doc = tmp_path / "doc.docx"
+    doc.write_text("dummy", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    nombres = ("WIKI_DIR", "ASSETS_DIR", "SIDEBAR_FILE", "SEARCH_INDEX")
+    for nombre in nombres + ("CONFIG_FILE", "CONFIG"):
+        monkeypatch.setattr(config, nombre, getattr(config, nombre))
+    monkeypatch.setenv("WM_CONFIG", str(config.CONFIG_FILE))
+    monkeypatch.setattr(config, "WIKI_DIR", Path("wiki"))
+    monkeypatch.setattr(config, "ASSETS_DIR", Path("wiki/assets"))
+    monkeypatch.setattr(config, "SEARCH_INDEX", Path("wiki/search_index.json"))
+
+    def fake_run(cmd):
+        if cmd[0] != "pandoc":
+            return
+        # Lo que dejan pandoc e ingest_wiki_v2: la imagen y una página que la enlaza
+        media = Path(next(a for a in cmd if a.startswith("--extract-media=")))
+        media = Path(str(media).split("=", 1)[1]) / "media"
+        media.mkdir(parents=True)
+        (media / "image1.png").write_bytes(b"png")
+        (config.WIKI_DIR / "intro").mkdir()
+        (config.WIKI_DIR / "intro" / "page.md").write_text(
+            f'![](<{media}/image1.png>)\n<img src="{media}/image1.png" />\n',
+            encoding="utf-8",
+        )
+
+    monkeypatch.setattr(wiki_cli, "run", fake_run)
+    monkeypatch.setattr(sys, "argv", ["prog", "full", str(doc), "--staging"])
+
+    wiki_cli.main()
+
+    texto = (tmp_path / "wiki" / "intro" / "page.md").read_text(encoding="utf-8")
+    enlaces = re.findall(r"\(<([^>]+)>\)|src=\"([^\"]+)\"", texto)
+    assert len(enlaces) == 2
+    for enlace in enlaces:
+        destino = "".join(enlace)
+        assert destino == "wiki/assets/media/image1.png"
+        assert (tmp_path / destino).read_bytes() == b"png"
+    assert not (stg.builds_dir(Path("wiki")) / stg.STAGING_NAME).exists()